@@ -0,0 +1,218 @@
+"""
+Dekodierung von Claude-Antworten
+Gemeinsamer Weg von einer Messages-Response (oder ihrem Rohtext) zum
+Daten-Dictionary für streamlit_app und main_app: Tool-Input wird unverändert
+übernommen, gültiger Text geht direkt an json.loads, erst danach greift der
+tolerante Parser (json_reparatur)
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from json_reparatur import (
+    REPARATUR_ABGESCHNITTEN,
+    REPARATUR_TEXT_DANACH,
+    REPARATUR_TEXT_DAVOR,
+    lade_tolerant,
+    lade_vollstaendige
+)
+from reparatur_statistik import hole_reparatur_statistik
+
+
+# Wurzelschlüssel der erwarteten Antworten (Speiseplan, Rezepte, Tag, Prüfung, Analyse)
+ERWARTETE_SCHLUESSEL = ("speiseplan", "rezepte", "tag", "pruefung", "analyse")
+# Hüllen, in die das Modell die Antwort gelegentlich verpackt
+HUELLEN = ("input", "data", "result", "output")
+
+# Die häufigste Abweichung: gültiges JSON in einem Markdown-Block, ggf. mit Erklärtext
+_MARKDOWN_BLOCK = re.compile(r"```[a-zA-Z]*[ \t]*\r?\n(.*?)```", re.DOTALL)
+
+QUELLE_TOOL = "tool"      # Tool-Input als Objekt, ohne Parsen
+QUELLE_TEXT = "text"      # Text über json.loads oder den toleranten Parser
+QUELLE_KEINE = "keine"
+
+
+@dataclass
+class Dekodierung:
+    """Ergebnis einer Dekodierung"""
+    daten: Optional[Dict] = None
+    fehler: Optional[str] = None
+    quelle: str = QUELLE_KEINE
+    reparaturen: List[str] = field(default_factory=list)
+    abgeschnitten: bool = False
+    verworfen: Optional[Tuple] = None  # Pfad des verworfenen Elements bei abgeschnittener Antwort
+    huelle: bool = False               # Antwort war in {"input": ...} o.ä. verpackt
+
+
+def normalisiere_antwort(daten: Any) -> Optional[Dict]:
+    """
+    Entfernt Hüllen um die eigentliche Antwort
+
+    {"input": {"speiseplan": ...}} und {"data": {"rezepte": ...}} werden zu
+    {"speiseplan": ...} bzw. {"rezepte": ...}; alles andere bleibt unverändert.
+
+    Returns:
+        dict oder None, falls die Antwort kein Objekt ist
+    """
+    if not isinstance(daten, dict):
+        return None
+    if any(schluessel in daten for schluessel in ERWARTETE_SCHLUESSEL):
+        return daten
+    for huelle in HUELLEN:
+        innen = daten.get(huelle)
+        if isinstance(innen, dict) and (
+            huelle == "input" or any(schluessel in innen for schluessel in ERWARTETE_SCHLUESSEL)
+        ):
+            return innen
+    return daten
+
+
+def _lade_umrahmt(text: str) -> Optional[Any]:
+    """
+    Schnellpfad für gültiges JSON mit Markdown-Zaun oder Erklärtext drumherum
+
+    Returns:
+        Der Wert oder None, falls der Kern kein gültiges JSON ist
+    """
+    block = _MARKDOWN_BLOCK.search(text)
+    if block:
+        kern = block.group(1)
+    else:
+        anfang = min((p for p in (text.find("{"), text.find("[")) if p >= 0), default=-1)
+        ende = max(text.rfind("}"), text.rfind("]"))
+        if anfang < 0 or ende <= anfang or (anfang == 0 and ende == len(text) - 1):
+            return None
+        kern = text[anfang:ende + 1]
+    try:
+        return json.loads(kern)
+    except ValueError:
+        return None
+
+
+def _erfasse(ergebnis: Dekodierung) -> Dekodierung:
+    """Zählt den Dekodierpfad in der Reparaturstatistik"""
+    hole_reparatur_statistik().erfasse_dekodierung(
+        ergebnis.quelle,
+        ergebnis.reparaturen,
+        ergebnis.huelle,
+        ergebnis.abgeschnitten,
+        ergebnis.daten is not None
+    )
+    return ergebnis
+
+
+def dekodiere_text(text: str, abgeschnitten: bool = False) -> Dekodierung:
+    """
+    Dekodiert den JSON-Text einer Antwort
+
+    Schnellpfad: json.loads auf den Text bzw. den Inhalt eines Markdown-
+    Blocks oder den Bereich zwischen erster und letzter Klammer. Sonst liest
+    json_reparatur in einem Durchlauf. Ein abgeschnittener Text gilt als
+    Fehler, es sei denn, abgeschnitten=True (stop_reason "max_tokens") -
+    dann bleiben nur die vollständigen Elemente erhalten.
+
+    Args:
+        text (str): Antworttext oder Tool-JSON
+        abgeschnitten (bool): Die API hat bei max_tokens abgebrochen
+
+    Returns:
+        Dekodierung
+    """
+    return _erfasse(_dekodiere_text(text, abgeschnitten))
+
+
+def _dekodiere_text(text: str, abgeschnitten: bool) -> Dekodierung:
+    """dekodiere_text ohne Statistik (für dekodiere_antwort)"""
+    if not text or not text.strip():
+        return Dekodierung(fehler="Leere Antwort")
+
+    reparaturen: List[str] = []
+    verworfen = None
+    try:
+        wert = json.loads(text)
+    except ValueError:
+        wert = _lade_umrahmt(text)
+        if wert is not None:
+            reparaturen = [REPARATUR_TEXT_DAVOR, REPARATUR_TEXT_DANACH]
+        elif abgeschnitten:
+            wert, reparaturen, verworfen = lade_vollstaendige(text)
+        else:
+            wert, reparaturen = lade_tolerant(text)
+
+    if REPARATUR_ABGESCHNITTEN in reparaturen and not abgeschnitten:
+        return Dekodierung(
+            fehler="Antwort ist abgeschnitten",
+            quelle=QUELLE_TEXT,
+            reparaturen=reparaturen,
+            abgeschnitten=True
+        )
+
+    daten = normalisiere_antwort(wert)
+    if daten is None:
+        return Dekodierung(fehler="Kein JSON-Objekt in der Antwort", quelle=QUELLE_TEXT, reparaturen=reparaturen)
+    return Dekodierung(
+        daten=daten,
+        quelle=QUELLE_TEXT,
+        reparaturen=reparaturen,
+        abgeschnitten=abgeschnitten,
+        verworfen=verworfen,
+        huelle=daten is not wert
+    )
+
+
+def dekodiere_antwort(
+    antwort: Dict[str, Any],
+    tool_name: Optional[str] = None,
+    abgeschnitten: Optional[bool] = None
+) -> Dekodierung:
+    """
+    Dekodiert eine Messages-Response (auch Batch-Ergebnis oder Stream-Zusammenfassung)
+
+    Ein tool_use-Block hat Vorrang; sein Input ist bereits ein Objekt und wird
+    ohne Parsen übernommen. Sonst wird der erste nicht-leere Textblock
+    dekodiert.
+
+    Args:
+        antwort (dict): Response mit 'content' (und optional 'stop_reason')
+        tool_name (str): Optional - nur tool_use-Blöcke dieses Tools
+        abgeschnitten (bool): Überschreibt stop_reason == "max_tokens"
+
+    Returns:
+        Dekodierung
+    """
+    return _erfasse(_dekodiere_antwort(antwort, tool_name, abgeschnitten))
+
+
+def _dekodiere_antwort(
+    antwort: Dict[str, Any],
+    tool_name: Optional[str],
+    abgeschnitten: Optional[bool]
+) -> Dekodierung:
+    """dekodiere_antwort ohne Statistik"""
+    if abgeschnitten is None:
+        abgeschnitten = antwort.get("stop_reason") == "max_tokens"
+    inhalt = [block for block in antwort.get("content") or [] if isinstance(block, dict)]
+
+    for block in inhalt:
+        if block.get("type") != "tool_use" or (tool_name and block.get("name") != tool_name):
+            continue
+        tool_input = block.get("input")
+        if isinstance(tool_input, str):
+            return _dekodiere_text(tool_input, abgeschnitten)
+        daten = normalisiere_antwort(tool_input)
+        if daten:
+            return Dekodierung(
+                daten=daten,
+                quelle=QUELLE_TOOL,
+                abgeschnitten=abgeschnitten,
+                huelle=daten is not tool_input
+            )
+
+    for block in inhalt:
+        text = block.get("text")
+        if block.get("type", "text") == "text" and text and text.strip():
+            return _dekodiere_text(text, abgeschnitten)
+
+    return Dekodierung(fehler="Keine gültige Antwort von API", abgeschnitten=abgeschnitten)
@@ -0,0 +1,182 @@
+"""
+Client für die Anthropic Message Batches API
+Sendet viele Anfragen als einen asynchronen Batch (50 % günstiger, Ergebnis innerhalb von 24 h)
+"""
+
+import json
+import time
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+import requests
+
+
+BATCH_API_URL = "https://api.anthropic.com/v1/messages/batches"
+API_VERSION = "2023-06-01"
+# Schlüssel in secrets.toml, mit dem beide Frontends einen anderen Endpunkt nutzen
+BATCH_URL_SCHLUESSEL = "ANTHROPIC_BATCH_URL"
+
+# Polling: Start-Intervall, Faktor und Maximum (Sekunden)
+POLL_START_SEKUNDEN = 5.0
+POLL_FAKTOR = 1.5
+POLL_MAXIMUM_SEKUNDEN = 120.0
+# Batches laufen höchstens 24 Stunden
+MAX_WARTEZEIT_SEKUNDEN = 24 * 3600
+
+
+def lese_batch_url(einstellungen: Optional[Mapping[str, Any]]) -> str:
+    """
+    Liest den Batch-Endpunkt aus den Einstellungen (z.B. st.secrets)
+
+    Args:
+        einstellungen: Mapping mit optionalem BATCH_URL_SCHLUESSEL
+
+    Returns:
+        str: Konfigurierte URL oder BATCH_API_URL
+    """
+    try:
+        if einstellungen is not None and BATCH_URL_SCHLUESSEL in einstellungen:
+            return str(einstellungen[BATCH_URL_SCHLUESSEL])
+    except Exception:
+        # st.secrets ohne secrets.toml wirft beim Zugriff
+        pass
+    return BATCH_API_URL
+
+
+class MessageBatchClient:
+    """
+    Schickt Messages-Anfragen gesammelt über die Batches API
+
+    Jede Anfrage trägt eine custom_id (z.B. "w1-Montag" oder "rezept-7"),
+    über die die Ergebnisse wieder zugeordnet werden. Die Basis-URL ist
+    konfigurierbar, damit sich der Client gegen einen lokalen Stub-Server
+    (tests/batch_stub.py) testen lässt.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = BATCH_API_URL,
+        timeout: float = 60,
+        poll_start: float = POLL_START_SEKUNDEN,
+        poll_maximum: float = POLL_MAXIMUM_SEKUNDEN,
+        max_wartezeit: float = MAX_WARTEZEIT_SEKUNDEN
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.poll_start = poll_start
+        self.poll_maximum = poll_maximum
+        self.max_wartezeit = max_wartezeit
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Content-Type": "application/json",
+            "x-api-key": api_key,
+            "anthropic-version": API_VERSION
+        })
+
+    def sende(self, anfragen: Dict[str, Dict[str, Any]]) -> Dict:
+        """
+        Legt einen neuen Batch an
+
+        Args:
+            anfragen (dict): custom_id -> Messages-Payload (model, max_tokens, messages, ...)
+
+        Returns:
+            dict: Das Batch-Objekt der API (u.a. 'id', 'processing_status')
+        """
+        body = {
+            "requests": [
+                {"custom_id": custom_id, "params": params}
+                for custom_id, params in anfragen.items()
+            ]
+        }
+        response = self.session.post(self.base_url, json=body, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def hole_status(self, batch_id: str) -> Dict:
+        """Liest den aktuellen Zustand eines Batches"""
+        response = self.session.get(f"{self.base_url}/{batch_id}", timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def warte(self, batch_id: str, bei_status: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """
+        Pollt mit wachsendem Intervall, bis der Batch beendet ist
+
+        Args:
+            batch_id (str): ID des Batches
+            bei_status: Optional - Callback mit dem Batch-Objekt nach jeder Abfrage
+
+        Returns:
+            dict: Das beendete Batch-Objekt (processing_status == "ended")
+        """
+        intervall = self.poll_start
+        ende = time.monotonic() + self.max_wartezeit
+        while True:
+            batch = self.hole_status(batch_id)
+            if bei_status:
+                bei_status(batch)
+            if batch.get("processing_status") == "ended":
+                return batch
+            if time.monotonic() + intervall > ende:
+                raise TimeoutError(f"Batch {batch_id} nach {self.max_wartezeit:.0f}s nicht beendet")
+            time.sleep(intervall)
+            intervall = min(intervall * POLL_FAKTOR, self.poll_maximum)
+
+    def hole_ergebnisse(self, batch: Dict) -> Dict[str, Tuple[Optional[Dict], Optional[str]]]:
+        """
+        Lädt die Ergebnisse (JSONL) eines beendeten Batches
+
+        Returns:
+            dict: custom_id -> (message, error_message)
+        """
+        url = batch.get("results_url") or f"{self.base_url}/{batch['id']}/results"
+        ergebnisse = {}
+        with self.session.get(url, stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            response.encoding = "utf-8"
+            for zeile in response.iter_lines(decode_unicode=True):
+                if not zeile:
+                    continue
+                eintrag = json.loads(zeile)
+                ergebnis = eintrag.get("result", {})
+                if ergebnis.get("type") == "succeeded":
+                    ergebnisse[eintrag["custom_id"]] = (ergebnis.get("message", {}), None)
+                else:
+                    fehler = ergebnis.get("error", {})
+                    if isinstance(fehler, dict):
+                        innen = fehler.get("error", fehler)
+                        fehler = innen.get("message", str(innen)) if isinstance(innen, dict) else str(innen)
+                    ergebnisse[eintrag["custom_id"]] = (
+                        None, f"Batch-Anfrage {ergebnis.get('type', 'fehlgeschlagen')}: {fehler or ''}".rstrip(": ")
+                    )
+        return ergebnisse
+
+    def fuehre_aus(
+        self,
+        anfragen: Dict[str, Dict[str, Any]],
+        bei_status: Optional[Callable[[Dict], None]] = None
+    ) -> Tuple[Dict[str, Tuple[Optional[Dict], Optional[str]]], Optional[str]]:
+        """
+        Sendet einen Batch, wartet auf das Ende und lädt die Ergebnisse
+
+        Returns:
+            Tuple von ({custom_id: (message, error)}, error_message)
+        """
+        if not anfragen:
+            return {}, None
+        try:
+            batch = self.sende(anfragen)
+            if bei_status:
+                bei_status(batch)
+            batch = self.warte(batch["id"], bei_status)
+            ergebnisse = self.hole_ergebnisse(batch)
+        except requests.exceptions.RequestException as e:
+            return {}, f"Batch-API-Fehler: {str(e)}"
+        except TimeoutError as e:
+            return {}, str(e)
+
+        # Anfragen ohne Ergebnis-Zeile als Fehler melden
+        for custom_id in anfragen:
+            ergebnisse.setdefault(custom_id, (None, "Kein Ergebnis im Batch"))
+        return ergebnisse, None
@@ -0,0 +1,99 @@
+"""
+Benchmark des Antwort-Dekoders
+Läuft beide Einstiege (dekodiere_antwort für ganze Messages-Responses wie in
+streamlit_app/main_app, dekodiere_text für Tool-JSON und Stream-Text) über
+den Korpus fehlerhafter Modell-Antworten und prüft Ergebnis und Laufzeit
+
+Aufruf: python benchmark_dekoder.py [korpus.jsonl] [--wiederholungen N]
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from antwort_dekoder import Dekodierung, dekodiere_antwort, dekodiere_text
+
+
+STANDARD_KORPUS = "benchmark_korpus.jsonl"
+STANDARD_WIEDERHOLUNGEN = 20
+
+
+def lade_korpus(pfad: str) -> List[Dict[str, Any]]:
+    """
+    Liest den Korpus (eine Antwort pro Zeile)
+
+    Felder: name, beschreibung, antwort (Messages-Response), erwartet
+    (dekodierte Daten oder null, wenn die Antwort abgelehnt werden muss),
+    optional verworfen (Pfad des verworfenen Elements)
+    """
+    with open(pfad, 'r', encoding='utf-8') as f:
+        return [json.loads(zeile) for zeile in f if zeile.strip()]
+
+
+def antwort_als_text(antwort: Dict[str, Any]) -> Tuple[str, bool]:
+    """Der Rohtext einer Antwort, wie ihn der Stream-Sammler liefert (Tool-JSON oder Text)"""
+    for block in antwort.get("content", []):
+        if block.get("type") == "tool_use":
+            eingabe = block.get("input")
+            return (eingabe if isinstance(eingabe, str) else json.dumps(eingabe, ensure_ascii=False)), False
+        if block.get("text"):
+            return block["text"], antwort.get("stop_reason") == "max_tokens"
+    return "", False
+
+
+def pruefe(fall: Dict[str, Any], ergebnis: Dekodierung) -> bool:
+    """Vergleicht eine Dekodierung mit der Erwartung des Korpus"""
+    if ergebnis.daten != fall["erwartet"]:
+        return False
+    erwartet_verworfen = fall.get("verworfen")
+    return list(ergebnis.verworfen or []) == list(erwartet_verworfen or [])
+
+
+def miss(funktion: Callable[[], Dekodierung], wiederholungen: int) -> Tuple[Dekodierung, float]:
+    """Führt eine Dekodierung wiederholt aus und liefert (Ergebnis, Mikrosekunden pro Lauf)"""
+    ergebnis = funktion()
+    start = time.perf_counter()
+    for _ in range(wiederholungen):
+        funktion()
+    return ergebnis, (time.perf_counter() - start) / wiederholungen * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("korpus", nargs="?", default=STANDARD_KORPUS)
+    parser.add_argument("--wiederholungen", type=int, default=STANDARD_WIEDERHOLUNGEN)
+    args = parser.parse_args()
+
+    faelle = lade_korpus(args.korpus)
+    fehlgeschlagen = 0
+    summe = {"antwort": 0.0, "text": 0.0}
+
+    print(f"{'Fall':<36} {'Größe':>8} {'antwort µs':>11} {'text µs':>9}  Quelle  Reparaturen")
+    for fall in faelle:
+        antwort = fall["antwort"]
+        text, abgeschnitten = antwort_als_text(antwort)
+
+        ergebnis_antwort, zeit_antwort = miss(lambda: dekodiere_antwort(antwort), args.wiederholungen)
+        ergebnis_text, zeit_text = miss(lambda: dekodiere_text(text, abgeschnitten), args.wiederholungen)
+        summe["antwort"] += zeit_antwort
+        summe["text"] += zeit_text
+
+        ok = pruefe(fall, ergebnis_antwort) and pruefe(fall, ergebnis_text)
+        if not ok:
+            fehlgeschlagen += 1
+        print(
+            f"{'  ' if ok else '✗ '}{fall['name']:<34} {len(text):>8} {zeit_antwort:>11.1f} {zeit_text:>9.1f}  "
+            f"{ergebnis_antwort.quelle:<6}  {', '.join(ergebnis_antwort.reparaturen) or ergebnis_antwort.fehler or '-'}"
+        )
+
+    print(
+        f"\n{len(faelle) - fehlgeschlagen}/{len(faelle)} Fälle korrekt, "
+        f"gesamt {summe['antwort'] / 1000:.1f} ms (antwort) / {summe['text'] / 1000:.1f} ms (text) pro Durchlauf"
+    )
+    return 1 if fehlgeschlagen else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
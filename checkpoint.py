@@ -0,0 +1,108 @@
+"""
+Checkpoints für lange Speiseplan-Generierungen
+Speichert fertige Tage, Wochen und Rezepte atomar auf der Festplatte,
+damit ein abgebrochener Lauf an der letzten Stelle fortgesetzt werden kann
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Any, Optional
+
+
+# Neben dem Modul statt im Arbeitsverzeichnis, damit jeder Start denselben Ort nutzt
+CHECKPOINT_VERZEICHNIS = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".checkpoints")
+
+
+def erstelle_run_id(*bestandteile: Any) -> str:
+    """
+    Berechnet eine stabile Run-ID aus der Konfiguration eines Laufs
+
+    Gleiche Konfiguration (und gleiche Prompts) ergibt dieselbe ID, so dass
+    ein erneuter Start nach Abbruch die vorhandenen Checkpoints findet. Eine
+    Sitzungs-ID unter den Bestandteilen trennt die Läufe verschiedener
+    Sitzungen, die sonst denselben Speicher teilen und gegenseitig löschen.
+
+    Returns:
+        str: 16-stelliger Hex-Hash
+    """
+    material = json.dumps(bestandteile, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()[:16]
+
+
+class CheckpointStore:
+    """
+    Dateibasierter Checkpoint-Speicher für einen Generierungslauf
+
+    Jeder Eintrag (z.B. Art "tag", Schlüssel "w2-Montag") liegt als eigene
+    JSON-Datei unter <verzeichnis>/<run_id>/. Geschrieben wird über eine
+    temporäre Datei und os.replace, so dass ein Absturz nie eine halb
+    geschriebene Datei hinterlässt. Da jeder Eintrag eine eigene Datei ist,
+    können parallele Worker gleichzeitig speichern.
+    """
+
+    def __init__(self, run_id: str, verzeichnis: str = CHECKPOINT_VERZEICHNIS):
+        """
+        Initialisiert den Speicher
+
+        Args:
+            run_id (str): ID des Laufs (siehe erstelle_run_id)
+            verzeichnis (str): Basisverzeichnis für alle Läufe
+        """
+        self.run_id = run_id
+        self.pfad = os.path.join(verzeichnis, run_id)
+
+    def _datei(self, art: str, schluessel: str) -> str:
+        sicher = "".join(c if c.isalnum() or c in "-_" else "_" for c in str(schluessel))
+        return os.path.join(self.pfad, f"{art}--{sicher}.json")
+
+    def speichere(self, art: str, schluessel: str, daten: Any):
+        """
+        Speichert einen Checkpoint atomar
+
+        Args:
+            art (str): Art des Eintrags ("tag", "woche", "rezepte")
+            schluessel (str): Eindeutiger Schlüssel innerhalb der Art
+            daten: JSON-serialisierbare Daten
+        """
+        os.makedirs(self.pfad, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.pfad, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(daten, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self._datei(art, schluessel))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def lade(self, art: str, schluessel: str) -> Optional[Any]:
+        """
+        Lädt einen Checkpoint
+
+        Returns:
+            Die gespeicherten Daten oder None, falls nicht vorhanden/lesbar
+        """
+        try:
+            with open(self._datei(art, schluessel), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def anzahl(self, art: Optional[str] = None) -> int:
+        """Anzahl gespeicherter Checkpoints (optional nur einer Art)"""
+        if not os.path.isdir(self.pfad):
+            return 0
+        praefix = f"{art}--" if art else ""
+        return sum(
+            1 for name in os.listdir(self.pfad)
+            if name.endswith(".json") and name.startswith(praefix)
+        )
+
+    def loesche(self):
+        """Entfernt alle Checkpoints dieses Laufs (nach erfolgreichem Abschluss)"""
+        shutil.rmtree(self.pfad, ignore_errors=True)
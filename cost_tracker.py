@@ -3,12 +3,19 @@ Kosten-Tracker für Claude API-Nutzung
 Berechnet und zeigt die Kosten der API-Aufrufe an
 """
 
+import threading
+
 import streamlit as st
 
 # Claude Sonnet 4 Preise (Stand: Oktober 2024)
 # Diese können Sie anpassen wenn sich die Preise ändern
 PREIS_PRO_1M_INPUT_TOKENS = 3.0   # $3 pro 1M Input-Tokens
 PREIS_PRO_1M_OUTPUT_TOKENS = 15.0  # $15 pro 1M Output-Tokens
+# Prompt-Caching: Schreiben kostet 1,25x, Lesen 0,1x des Input-Preises
+PREIS_PRO_1M_CACHE_WRITE_TOKENS = 3.75  # $3.75 pro 1M Cache-Write-Tokens
+PREIS_PRO_1M_CACHE_READ_TOKENS = 0.30   # $0.30 pro 1M Cache-Read-Tokens
+# Message Batches API: 50% Rabatt auf alle Token-Preise
+BATCH_RABATT = 0.5
 
 
 class CostTracker:
@@ -18,26 +25,53 @@ class CostTracker:
     
     def __init__(self):
         """Initialisiert den Cost-Tracker"""
+        self._lock = threading.Lock()
         self.reset()
     
     def reset(self):
         """Setzt alle Zähler zurück"""
         self.input_tokens = 0
         self.output_tokens = 0
+        self.cache_write_tokens = 0
+        self.cache_read_tokens = 0
+        self.batch_rabatt = 0.0
         self.api_calls = 0
+        self.cache_hits = 0
     
     def add_usage(self, usage_data):
         """
-        Fügt Nutzungsdaten hinzu
+        Fügt Nutzungsdaten hinzu (thread-sicher)
+        
+        Antworten aus dem lokalen Antwort-Cache ('cache_hit': True) verursachen
+        keine Kosten und werden nur als Cache-Treffer gezählt. Anfragen aus
+        der Message Batches API ('batch': True) werden mit BATCH_RABATT verbilligt.
         
         Args:
             usage_data (dict): Usage-Daten von der API-Response
-                Format: {'input_tokens': int, 'output_tokens': int}
+                Format: {'input_tokens': int, 'output_tokens': int,
+                         'cache_creation_input_tokens': int, 'cache_read_input_tokens': int}
         """
         if usage_data:
-            self.input_tokens += usage_data.get('input_tokens', 0)
-            self.output_tokens += usage_data.get('output_tokens', 0)
-            self.api_calls += 1
+            with self._lock:
+                if usage_data.get('cache_hit'):
+                    self.cache_hits += 1
+                    return
+                input_tokens = usage_data.get('input_tokens', 0)
+                output_tokens = usage_data.get('output_tokens', 0)
+                cache_write = usage_data.get('cache_creation_input_tokens') or 0
+                cache_read = usage_data.get('cache_read_input_tokens') or 0
+                self.input_tokens += input_tokens
+                self.output_tokens += output_tokens
+                self.cache_write_tokens += cache_write
+                self.cache_read_tokens += cache_read
+                if usage_data.get('batch'):
+                    self.batch_rabatt += BATCH_RABATT * (
+                        input_tokens * PREIS_PRO_1M_INPUT_TOKENS
+                        + output_tokens * PREIS_PRO_1M_OUTPUT_TOKENS
+                        + cache_write * PREIS_PRO_1M_CACHE_WRITE_TOKENS
+                        + cache_read * PREIS_PRO_1M_CACHE_READ_TOKENS
+                    ) / 1_000_000
+                self.api_calls += 1
     
     def get_costs(self):
         """
@@ -48,16 +82,32 @@ class CostTracker:
         """
         input_cost = (self.input_tokens / 1_000_000) * PREIS_PRO_1M_INPUT_TOKENS
         output_cost = (self.output_tokens / 1_000_000) * PREIS_PRO_1M_OUTPUT_TOKENS
-        total_cost = input_cost + output_cost
+        cache_write_cost = (self.cache_write_tokens / 1_000_000) * PREIS_PRO_1M_CACHE_WRITE_TOKENS
+        cache_read_cost = (self.cache_read_tokens / 1_000_000) * PREIS_PRO_1M_CACHE_READ_TOKENS
+        total_cost = input_cost + output_cost + cache_write_cost + cache_read_cost - self.batch_rabatt
+        
+        # Ersparnis gegenüber Abrechnung aller gecachten Tokens zum normalen Input-Preis
+        cache_savings = (
+            (self.cache_read_tokens / 1_000_000) * PREIS_PRO_1M_INPUT_TOKENS - cache_read_cost
+            - (self.cache_write_tokens / 1_000_000) * (PREIS_PRO_1M_CACHE_WRITE_TOKENS - PREIS_PRO_1M_INPUT_TOKENS)
+        )
         
         return {
             'input_tokens': self.input_tokens,
             'output_tokens': self.output_tokens,
-            'total_tokens': self.input_tokens + self.output_tokens,
+            'cache_write_tokens': self.cache_write_tokens,
+            'cache_read_tokens': self.cache_read_tokens,
+            'total_tokens': (self.input_tokens + self.output_tokens
+                             + self.cache_write_tokens + self.cache_read_tokens),
             'input_cost': input_cost,
             'output_cost': output_cost,
+            'cache_write_cost': cache_write_cost,
+            'cache_read_cost': cache_read_cost,
+            'cache_savings': cache_savings,
+            'batch_discount': self.batch_rabatt,
             'total_cost': total_cost,
-            'api_calls': self.api_calls
+            'api_calls': self.api_calls,
+            'cache_hits': self.cache_hits
         }
     
     def format_tokens(self, tokens):
@@ -145,14 +195,18 @@ def zeige_kosten_anzeige(cost_tracker):
         **Token-Nutzung:**
         - Input-Tokens: {costs['input_tokens']:,} ({cost_tracker.format_cost(costs['input_cost'])})
         - Output-Tokens: {costs['output_tokens']:,} ({cost_tracker.format_cost(costs['output_cost'])})
+        - Prompt-Cache geschrieben: {costs['cache_write_tokens']:,} ({cost_tracker.format_cost(costs['cache_write_cost'])})
+        - Prompt-Cache gelesen: {costs['cache_read_tokens']:,} ({cost_tracker.format_cost(costs['cache_read_cost'])})
         - Gesamt: {costs['total_tokens']:,} Tokens
         
         **Kosten:**
         - Input-Kosten: {cost_tracker.format_cost(costs['input_cost'])} (${PREIS_PRO_1M_INPUT_TOKENS}/1M Tokens)
         - Output-Kosten: {cost_tracker.format_cost(costs['output_cost'])} (${PREIS_PRO_1M_OUTPUT_TOKENS}/1M Tokens)
+        - Prompt-Caching: {cost_tracker.format_cost(costs['cache_write_cost'] + costs['cache_read_cost'])} (Ersparnis: {cost_tracker.format_cost(costs['cache_savings'])})
+        - Batch-Rabatt: -{cost_tracker.format_cost(costs['batch_discount'])}
         - **Gesamtkosten: {cost_tracker.format_cost(costs['total_cost'])}**
         
-        **API-Aufrufe:** {costs['api_calls']} Aufrufe
+        **API-Aufrufe:** {costs['api_calls']} Aufrufe ({costs['cache_hits']} weitere aus dem lokalen Cache, kostenlos)
         
         ---
         
@@ -209,7 +263,7 @@ def zeige_kosten_in_sidebar(cost_tracker):
             "Kosten",
             cost_tracker.format_cost(costs['total_cost'])
         )
-        st.sidebar.caption(f"{cost_tracker.format_tokens(costs['total_tokens'])} Tokens | {costs['api_calls']} API-Aufrufe")
+        st.sidebar.caption(f"{cost_tracker.format_tokens(costs['total_tokens'])} Tokens | {costs['api_calls']} API-Aufrufe | {costs['cache_hits']} Cache-Treffer")
 
 
 # Funktion zum einfachen Auskommentieren
@@ -0,0 +1,223 @@
+"""
+Erkennung ähnlicher Rezepte
+MinHash-Signaturen mit Locality Sensitive Hashing (LSH) über normalisierte
+Namen und Zutaten
+"""
+
+import hashlib
+import random
+import re
+from typing import Dict, Iterable, List, Set, Tuple
+
+
+# 96 Hashes in 32 Bändern à 3 Zeilen: Paare mit einer Jaccard-Ähnlichkeit ab
+# 0.5 werden zu ca. 98.6 %, ab 0.4 zu 88 % Kandidaten; Paare mit 0.2 zu ca.
+# 23 %, mit 0.1 zu 3 % (die genaue Prüfung sortiert sie wieder aus)
+ANZAHL_HASHES = 96
+ANZAHL_BAENDER = 32
+
+# Ab dieser Ähnlichkeit gilt ein Rezept als Duplikat (wird markiert) ...
+AEHNLICHKEIT_SCHWELLE = 0.5
+# ... ab dieser wird es mit dem vorhandenen Rezept zusammengeführt
+ZUSAMMENFUEHREN_SCHWELLE = 0.85
+
+# Jede Zutat zählt so oft wie ein Wort des Namens: Gleiche Zutaten sagen
+# mehr über das Gericht als ein anders formulierter Name
+ZUTATEN_GEWICHT = 2
+
+# Bei Änderungen an merkmale() erhöhen - gespeicherte Indizes werden dann
+# neu aufgebaut
+MERKMAL_VERSION = 2
+
+# Wörter ohne Aussagekraft für die Identität eines Gerichts
+STOPPWOERTER = {
+    "mit", "und", "an", "auf", "aus", "in", "im", "vom", "von", "zum", "zur",
+    "der", "die", "das", "dem", "den", "des", "ein", "eine", "nach", "art",
+    "dazu", "sowie", "oder", "frisch", "frischem", "frischen", "hausgemacht"
+}
+
+# Grundzutaten, die fast jedes Rezept enthält und die nichts unterscheiden
+GRUNDZUTATEN = {
+    "salz", "pfeffer", "wasser", "oel", "rapsoel", "sonnenblumenoel", "olivenoel",
+    "zucker", "butter", "mehl", "zwiebel", "zwiebeln", "knoblauch", "petersilie"
+}
+
+# Bestimmungswörter zusammengesetzter Gerichtnamen (mit Fugenelement) und
+# ihre Grundform: "rindergulasch" -> "rind" + "gulasch"
+BESTIMMUNGSWOERTER = {
+    "rinder": "rind", "rind": "rind", "schweine": "schwein", "schwein": "schwein",
+    "kalbs": "kalb", "kalb": "kalb", "lamm": "lamm", "huehner": "huhn",
+    "haehnchen": "haehnchen", "puten": "pute", "enten": "ente", "wild": "wild",
+    "hack": "hack", "fisch": "fisch", "lachs": "lachs", "gemuese": "gemuese",
+    "kartoffel": "kartoffel", "kaese": "kaese", "tomaten": "tomate", "pilz": "pilz",
+    "spinat": "spinat", "linsen": "linse", "erbsen": "erbse", "bohnen": "bohne",
+    "reis": "reis", "nudel": "nudel", "apfel": "apfel"
+}
+# Kürzester Rest, der nach dem Bestimmungswort noch als Grundwort gilt
+MIN_GRUNDWORT = 4
+
+_UMLAUTE = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss"})
+_PRIMZAHL = (1 << 61) - 1
+
+# Feste Permutationen, damit Signaturen über Programmstarts stabil bleiben
+_zufall = random.Random(20251027)
+_PERMUTATIONEN = [
+    (_zufall.randrange(1, _PRIMZAHL), _zufall.randrange(0, _PRIMZAHL))
+    for _ in range(ANZAHL_HASHES)
+]
+
+
+def _woerter(text: str) -> List[str]:
+    """Kleingeschriebene Wörter ohne Umlaute und Stoppwörter"""
+    text = (text or "").lower().translate(_UMLAUTE)
+    return [w for w in re.findall(r"[a-z0-9]+", text) if w not in STOPPWOERTER]
+
+
+def normalisiere_name(name: str) -> str:
+    """
+    Vereinheitlicht einen Gerichtnamen für den Vergleich
+
+    "Rindergulasch mit Spätzle " -> "rindergulasch spaetzle"
+    """
+    return " ".join(_woerter(name))
+
+
+def zerlege_wort(wort: str) -> List[str]:
+    """
+    Zerlegt ein zusammengesetztes Wort an einem bekannten Bestimmungswort
+
+    "rindergulasch" -> ["rind", "gulasch"], "gulasch" -> ["gulasch"]
+    """
+    for praefix in sorted(BESTIMMUNGSWOERTER, key=len, reverse=True):
+        if wort.startswith(praefix) and len(wort) - len(praefix) >= MIN_GRUNDWORT:
+            return [BESTIMMUNGSWOERTER[praefix], wort[len(praefix):]]
+    return [wort]
+
+
+def merkmale(name: str, zutaten: Iterable = ()) -> Set[str]:
+    """
+    Merkmalsmenge eines Rezepts für den Ähnlichkeitsvergleich
+
+    Aus dem Namen kommen die Wörter, ihre Bestandteile (damit "Rindergulasch"
+    und "Gulasch vom Rind" die Wörter "rind" und "gulasch" teilen) und deren
+    Buchstaben-Trigramme, aus den Zutaten jeweils das erste aussagekräftige
+    Wort (ohne GRUNDZUTATEN) in ZUTATEN_GEWICHT Kopien.
+
+    Args:
+        name (str): Name des Gerichts
+        zutaten: Zutaten als Dictionaries mit 'name' oder als Strings
+
+    Returns:
+        set: Merkmale mit Präfix (w: Wort, g: Trigramm, z0:, z1:, ... Zutat)
+    """
+    ergebnis = set()
+    for wort in _woerter(name):
+        ergebnis.add(f"w:{wort}")
+        for teil in zerlege_wort(wort):
+            ergebnis.add(f"w:{teil}")
+            for i in range(len(teil) - 2):
+                ergebnis.add(f"g:{teil[i:i + 3]}")
+    for zutat in zutaten or ():
+        zutat_name = zutat.get("name", "") if isinstance(zutat, dict) else str(zutat)
+        woerter = _woerter(zutat_name)
+        if woerter and woerter[0] not in GRUNDZUTATEN:
+            for kopie in range(ZUTATEN_GEWICHT):
+                ergebnis.add(f"z{kopie}:{woerter[0]}")
+    return ergebnis
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    """Jaccard-Ähnlichkeit zweier Merkmalsmengen (0 bis 1)"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def signatur(merkmalsmenge: Set[str]) -> Tuple[int, ...]:
+    """
+    Berechnet die MinHash-Signatur einer Merkmalsmenge
+
+    Returns:
+        tuple: ANZAHL_HASHES Minima (leer bei leerer Menge)
+    """
+    if not merkmalsmenge:
+        return ()
+    werte = [
+        int.from_bytes(hashlib.blake2b(m.encode("utf-8"), digest_size=8).digest(), "big")
+        for m in merkmalsmenge
+    ]
+    return tuple(
+        min((a * h + b) % _PRIMZAHL for h in werte)
+        for a, b in _PERMUTATIONEN
+    )
+
+
+def lsh_buckets(sig: Tuple[int, ...]) -> List[Tuple[int, int]]:
+    """
+    Zerlegt eine Signatur in LSH-Bänder
+
+    Rezepte, die in mindestens einem (band, bucket)-Paar übereinstimmen,
+    sind Kandidaten für einen genauen Vergleich.
+
+    Returns:
+        list: (band, bucket) mit bucket als vorzeichenbehaftete 64-Bit-Zahl
+    """
+    if not sig:
+        return []
+    zeilen = len(sig) // ANZAHL_BAENDER
+    buckets = []
+    for band in range(ANZAHL_BAENDER):
+        teil = ",".join(map(str, sig[band * zeilen:(band + 1) * zeilen]))
+        bucket = int.from_bytes(hashlib.blake2b(teil.encode(), digest_size=8).digest(), "big", signed=True)
+        buckets.append((band, bucket))
+    return buckets
+
+
+def bewerte_kandidaten(
+    name: str,
+    zutaten: Iterable,
+    kandidaten: Dict[int, Tuple[str, Iterable]],
+    schwelle: float = AEHNLICHKEIT_SCHWELLE
+) -> List[Tuple[int, str, float]]:
+    """
+    Vergleicht ein Rezept genau mit LSH-Kandidaten
+
+    Ein gleicher normalisierter Name zählt immer als Ähnlichkeit 1.0.
+
+    Args:
+        name (str): Name des neuen Rezepts
+        zutaten: Zutaten des neuen Rezepts
+        kandidaten (dict): ID -> (Name, Zutaten)
+        schwelle (float): Mindestähnlichkeit
+
+    Returns:
+        list: (ID, Name, Ähnlichkeit), absteigend sortiert
+    """
+    eigene = merkmale(name, zutaten)
+    eigener_name = normalisiere_name(name)
+    treffer = []
+    for rezept_id, (kandidat_name, kandidat_zutaten) in kandidaten.items():
+        if eigener_name and normalisiere_name(kandidat_name) == eigener_name:
+            wert = 1.0
+        else:
+            wert = jaccard(eigene, merkmale(kandidat_name, kandidat_zutaten))
+        if wert >= schwelle:
+            treffer.append((rezept_id, kandidat_name, wert))
+    return sorted(treffer, key=lambda t: t[2], reverse=True)
+
+
+def index_schluessel(name: str, zutaten: Iterable = ()) -> List[Tuple[int, int]]:
+    """
+    Alle Index-Einträge eines Rezepts: die LSH-Bänder seiner Signatur plus
+    ein Eintrag im Band -1 für den normalisierten Namen, so dass gleich
+    benannte Rezepte unabhängig von den Zutaten immer Kandidaten sind
+
+    Returns:
+        list: (band, bucket)
+    """
+    schluessel = lsh_buckets(signatur(merkmale(name, zutaten)))
+    normalisiert = normalisiere_name(name)
+    if normalisiert:
+        bucket = int.from_bytes(hashlib.blake2b(normalisiert.encode(), digest_size=8).digest(), "big", signed=True)
+        schluessel.append((-1, bucket))
+    return schluessel
@@ -0,0 +1,180 @@
+"""
+Hintergrund-Jobs für lange Generierungen
+Führt Jobs in einem Thread-Pool unabhängig vom Streamlit-Script-Rerun aus
+"""
+
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+MAX_PARALLELE_JOBS = 2
+MAX_GESPEICHERTE_JOBS = 50   # Fertige Jobs darüber hinaus werden verworfen (älteste zuerst)
+MAX_FORTSCHRITT_EREIGNISSE = 200
+
+
+class JobStatus(Enum):
+    """Lebenszyklus eines Jobs"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+@dataclass
+class Job:
+    """Eintrag der Job-Tabelle"""
+    id: str
+    titel: str
+    besitzer: Optional[str] = None
+    status: JobStatus = JobStatus.QUEUED
+    erstellt_am: float = field(default_factory=time.time)
+    gestartet_am: Optional[float] = None
+    beendet_am: Optional[float] = None
+    fortschritt: List[Tuple[float, str]] = field(default_factory=list)
+    ergebnis: Any = None
+    fehler: Optional[str] = None
+
+    @property
+    def aktiv(self) -> bool:
+        """True solange der Job wartet oder läuft"""
+        return self.status in (JobStatus.QUEUED, JobStatus.RUNNING)
+
+    @property
+    def letzte_meldung(self) -> Optional[str]:
+        """Die jüngste Fortschrittsmeldung"""
+        return self.fortschritt[-1][1] if self.fortschritt else None
+
+    @property
+    def dauer(self) -> Optional[float]:
+        """Laufzeit in Sekunden (bis jetzt, falls noch aktiv)"""
+        if self.gestartet_am is None:
+            return None
+        return (self.beendet_am or time.time()) - self.gestartet_am
+
+
+class JobRunner:
+    """
+    Job-Tabelle mit Thread-Pool
+
+    Jobs laufen in Worker-Threads weiter, auch wenn Streamlit das Script neu
+    startet; die UI fragt den Zustand nur per hole()/liste() ab. Die
+    Job-Funktion erhält einen Callback für Fortschrittsmeldungen und
+    signalisiert Fehler per Exception. Mit @st.cache_resource erzeugt, teilen
+    sich alle Sitzungen einen Runner - die Jobs werden über 'besitzer'
+    (Sitzungs-ID) getrennt.
+    """
+
+    def __init__(self, max_workers: int = MAX_PARALLELE_JOBS, max_jobs: int = MAX_GESPEICHERTE_JOBS):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self.max_jobs = max_jobs
+
+    def starte(
+        self,
+        titel: str,
+        funktion: Callable[[Callable[[str], None]], Any],
+        besitzer: Optional[str] = None
+    ) -> str:
+        """
+        Stellt einen Job in die Warteschlange
+
+        Args:
+            titel (str): Anzeigename
+            funktion: Wird als funktion(fortschritt_callback) im Worker ausgeführt
+            besitzer (str): Optional - z.B. Sitzungs-ID für die Job-Liste
+
+        Returns:
+            str: Job-ID
+        """
+        job = Job(id=uuid.uuid4().hex[:12], titel=titel, besitzer=besitzer)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._aufraeumen()
+        self._pool.submit(self._ausfuehren, job.id, funktion)
+        return job.id
+
+    def _ausfuehren(self, job_id: str, funktion: Callable[[Callable[[str], None]], Any]):
+        """Führt einen Job im Worker-Thread aus und pflegt seinen Status"""
+        self._aktualisiere(job_id, status=JobStatus.RUNNING, gestartet_am=time.time())
+
+        def melde(nachricht: str):
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is not None:
+                    job.fortschritt.append((time.time(), nachricht))
+                    del job.fortschritt[:-MAX_FORTSCHRITT_EREIGNISSE]
+
+        try:
+            ergebnis = funktion(melde)
+        except Exception as e:
+            self._aktualisiere(
+                job_id,
+                status=JobStatus.FAILED,
+                fehler=str(e) or traceback.format_exc(limit=1),
+                beendet_am=time.time()
+            )
+            return
+        self._aktualisiere(job_id, status=JobStatus.DONE, ergebnis=ergebnis, beendet_am=time.time())
+
+    def _aktualisiere(self, job_id: str, **felder):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                for name, wert in felder.items():
+                    setattr(job, name, wert)
+
+    def _aufraeumen(self):
+        """Verwirft die ältesten beendeten Jobs über max_jobs (Lock muss gehalten werden)"""
+        beendet = sorted(
+            (job for job in self._jobs.values() if not job.aktiv),
+            key=lambda job: job.beendet_am or job.erstellt_am
+        )
+        for job in beendet[:max(0, len(self._jobs) - self.max_jobs)]:
+            del self._jobs[job.id]
+
+    def hole(self, job_id: str) -> Optional[Job]:
+        """
+        Liest einen Job
+
+        Returns:
+            Job: Momentaufnahme (Kopie) oder None, falls unbekannt
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return replace(job, fortschritt=list(job.fortschritt)) if job else None
+
+    def liste(self, besitzer: Optional[str] = None) -> List[Job]:
+        """
+        Listet Jobs (neueste zuerst)
+
+        Args:
+            besitzer (str): Optional - nur Jobs dieses Besitzers
+
+        Returns:
+            list: Momentaufnahmen der Jobs
+        """
+        with self._lock:
+            jobs = [
+                replace(job, fortschritt=list(job.fortschritt))
+                for job in self._jobs.values()
+                if besitzer is None or job.besitzer == besitzer
+            ]
+        return sorted(jobs, key=lambda job: job.erstellt_am, reverse=True)
+
+    def position(self, job_id: str) -> int:
+        """Position in der Warteschlange (0 = läuft bereits oder beendet)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != JobStatus.QUEUED:
+                return 0
+            return 1 + sum(
+                1 for other in self._jobs.values()
+                if other.status == JobStatus.QUEUED and other.erstellt_am < job.erstellt_am
+            )
@@ -0,0 +1,378 @@
+"""
+Toleranter JSON-Parser für Modell-Antworten
+Liest fehlerhaftes JSON (Markdown-Blöcke, typografische Anführungszeichen,
+Kommentare, fehlende oder überzählige Kommata, abgeschnittenes Ende) in
+einem einzigen linearen Durchlauf und meldet die angewendeten Reparaturen
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Kennungen der Reparaturen (Reihenfolge des ersten Auftretens)
+REPARATUR_TEXT_DAVOR = "text_davor"                    # Markdown-Zaun oder Erklärtext vor dem JSON
+REPARATUR_TEXT_DANACH = "text_danach"                  # dito nach dem JSON
+REPARATUR_ANFUEHRUNGSZEICHEN = "anfuehrungszeichen"    # typografische oder einfache Anführungszeichen
+REPARATUR_ZITAT_IM_STRING = "zitat_im_string"          # unmaskiertes " innerhalb eines Strings
+REPARATUR_KOMMENTAR = "kommentar"
+REPARATUR_KOMMA_ZUVIEL = "komma_zuviel"
+REPARATUR_KOMMA_FEHLT = "komma_fehlt"
+REPARATUR_DOPPELPUNKT_FEHLT = "doppelpunkt_fehlt"
+REPARATUR_SCHLUESSEL = "schluessel_ohne_anfuehrungszeichen"
+REPARATUR_WERT = "wert_ohne_anfuehrungszeichen"
+REPARATUR_WERT_FEHLT = "wert_fehlt"                    # z.B. "a": , -> null
+REPARATUR_STEUERZEICHEN = "steuerzeichen"              # Zeilenumbruch/Tab roh im String
+REPARATUR_ESCAPE = "ungueltiges_escape"
+REPARATUR_KLAMMER = "klammer"                          # falsche oder überzählige schließende Klammer
+REPARATUR_ABGESCHNITTEN = "abgeschnitten"              # Ende fehlt, offene Strukturen geschlossen
+
+# Öffnende Anführungszeichen -> Zeichen, die den String schließen
+_ANFUEHRUNGSZEICHEN = {
+    '"': '"',
+    "'": "'",
+    "“": "“”\"",   # “
+    "”": "“”\"",   # ”
+    "„": "“”\"",   # „
+}
+
+# Vorkompilierte Muster: String-Inhalt ohne Sonderzeichen je Anführungszeichen
+_STRING_STUECK = {
+    start: re.compile("[^" + re.escape(ende + '"') + "\\\\\x00-\x1f]*")
+    for start, ende in _ANFUEHRUNGSZEICHEN.items()
+}
+_LEERRAUM = re.compile(r"\s*")
+_ZAHL = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+_WORT = re.compile(r"[^\s,:{}\[\]\"'/]*")
+_ZEILENENDE = re.compile(r"[^\n]*")
+_ESCAPES = set('"\\/bfnrtu')
+_HEX4 = re.compile(r"[0-9a-fA-F]{4}")
+_LITERALE = {"true": True, "false": False, "null": None, "True": True, "False": False, "None": None}
+_JSON_LITERALE = {"true", "false", "null"}
+# Steuerzeichen, die in JSON-Strings maskiert werden müssen
+_STEUERZEICHEN = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+
+
+class _Abgeschnitten(Exception):
+    """Das Textende wurde mitten in einem Wert erreicht"""
+
+
+class _Leser:
+    """Rekursiver Abstieg über den Text mit Positionszeiger"""
+
+    def __init__(self, text: str, nur_vollstaendige: bool = False):
+        self.text = text
+        self.pos = 0
+        self.ende = len(text)
+        self.reparaturen: Dict[str, None] = {}
+        # Wiederherstellungs-Modus: abgeschnittene Array-Elemente verwerfen
+        self.nur_vollstaendige = nur_vollstaendige
+        self.abgeschnitten = False
+        self.pfad: List[Any] = []
+        self.verworfen: Optional[Tuple] = None
+
+    def melde(self, reparatur: str):
+        self.reparaturen.setdefault(reparatur, None)
+        if reparatur == REPARATUR_ABGESCHNITTEN:
+            self.abgeschnitten = True
+
+    def leerraum(self):
+        """Überspringt Leerraum und Kommentare"""
+        text = self.text
+        while True:
+            self.pos = _LEERRAUM.match(text, self.pos).end()
+            if text.startswith("//", self.pos):
+                self.pos = _ZEILENENDE.match(text, self.pos).end()
+            elif text.startswith("/*", self.pos):
+                schluss = text.find("*/", self.pos + 2)
+                self.pos = self.ende if schluss < 0 else schluss + 2
+            else:
+                return
+            self.melde(REPARATUR_KOMMENTAR)
+
+    def wert(self) -> Any:
+        """Liest einen beliebigen Wert ab der aktuellen Position"""
+        self.leerraum()
+        if self.pos >= self.ende:
+            raise _Abgeschnitten()
+        zeichen = self.text[self.pos]
+        if zeichen == "{":
+            return self.objekt()
+        if zeichen == "[":
+            return self.liste()
+        if zeichen in _ANFUEHRUNGSZEICHEN:
+            return self.string()
+        if zeichen in ",}]":
+            self.melde(REPARATUR_WERT_FEHLT)
+            return None
+        return self.wort(REPARATUR_WERT)
+
+    def wort(self, reparatur: str) -> Any:
+        """Liest ein Wort ohne Anführungszeichen (Zahl, Literal, Schlüssel oder Text)"""
+        treffer = _WORT.match(self.text, self.pos)
+        roh = treffer.group()
+        if not roh:
+            # Unlesbares Zeichen (z.B. ein einzelnes '/') überspringen
+            self.pos += 1
+            self.melde(reparatur)
+            return None
+        self.pos = treffer.end()
+        if self.pos >= self.ende:
+            # Das Wort kann mitten im Token abgeschnitten sein (z.B. 45 statt 450)
+            self.melde(REPARATUR_ABGESCHNITTEN)
+        if reparatur == REPARATUR_WERT:
+            if _ZAHL.fullmatch(roh):
+                try:
+                    return int(roh)
+                except ValueError:
+                    return float(roh)
+            if roh in _LITERALE:
+                if roh not in _JSON_LITERALE:
+                    # Python-Schreibweise (True/False/None)
+                    self.melde(reparatur)
+                return _LITERALE[roh]
+        self.melde(reparatur)
+        return roh
+
+    def string(self) -> str:
+        """Liest einen String bis zum passenden Anführungszeichen"""
+        text = self.text
+        start = text[self.pos]
+        schliesser = _ANFUEHRUNGSZEICHEN[start]
+        stueck = _STRING_STUECK[start]
+        if start != '"':
+            self.melde(REPARATUR_ANFUEHRUNGSZEICHEN)
+        self.pos += 1
+        teile = []
+        while True:
+            treffer = stueck.match(text, self.pos)
+            teile.append(treffer.group())
+            self.pos = treffer.end()
+            if self.pos >= self.ende:
+                self.melde(REPARATUR_ABGESCHNITTEN)
+                return self._dekodiere(teile)
+            zeichen = text[self.pos]
+            self.pos += 1
+            if zeichen in schliesser and self._ist_stringende(zeichen):
+                return self._dekodiere(teile)
+            if zeichen == "\\":
+                if self.pos >= self.ende:
+                    self.melde(REPARATUR_ABGESCHNITTEN)
+                    return self._dekodiere(teile)
+                naechstes = text[self.pos]
+                if naechstes == "u" and not _HEX4.match(text, self.pos + 1):
+                    naechstes = None
+                if naechstes in _ESCAPES:
+                    teile.append("\\" + naechstes)
+                    self.pos += 1
+                else:
+                    self.melde(REPARATUR_ESCAPE)
+                    teile.append("\\\\")
+            elif zeichen == '"':
+                # Inneres " (in String mit anderem Anführungszeichen oder als Zitat)
+                if start == '"':
+                    self.melde(REPARATUR_ZITAT_IM_STRING)
+                teile.append('\\"')
+            elif zeichen in _STEUERZEICHEN:
+                self.melde(REPARATUR_STEUERZEICHEN)
+                teile.append(_STEUERZEICHEN[zeichen])
+            elif zeichen < " ":
+                self.melde(REPARATUR_STEUERZEICHEN)
+                teile.append(f"\\u{ord(zeichen):04x}")
+            else:
+                # Anderes Anführungszeichen mitten im Text (z.B. „ in einem “-String)
+                teile.append(zeichen)
+
+    def _ist_stringende(self, zeichen: str) -> bool:
+        """
+        Entscheidet, ob ein Anführungszeichen den String beendet
+
+        Ein " gefolgt von einem Buchstaben oder einer Ziffer auf derselben
+        Zeile ist ein unmaskiertes Zitat im Text ("Nudeln "al dente" kochen").
+        """
+        if zeichen != '"':
+            return True
+        text = self.text
+        pos = self.pos
+        while pos < self.ende and text[pos] in " \t":
+            pos += 1
+        return pos >= self.ende or not text[pos].isalnum()
+
+    def _dekodiere(self, teile: List[str]) -> str:
+        roh = "".join(teile)
+        try:
+            return json.loads(f'"{roh}"')
+        except ValueError:
+            self.melde(REPARATUR_ESCAPE)
+            return roh
+
+    def objekt(self) -> Dict:
+        """Liest ein Objekt; bei Textende werden die vollständigen Paare behalten"""
+        self.pos += 1
+        ergebnis = {}
+        komma = False
+        while True:
+            self.leerraum()
+            if self.pos >= self.ende:
+                self.melde(REPARATUR_ABGESCHNITTEN)
+                return ergebnis
+            zeichen = self.text[self.pos]
+            if zeichen in "}]":
+                self.pos += 1
+                if komma:
+                    self.melde(REPARATUR_KOMMA_ZUVIEL)
+                if zeichen == "]":
+                    self.melde(REPARATUR_KLAMMER)
+                return ergebnis
+            if zeichen == ",":
+                self.pos += 1
+                if komma or not ergebnis:
+                    self.melde(REPARATUR_KOMMA_ZUVIEL)
+                komma = True
+                continue
+            if ergebnis and not komma:
+                self.melde(REPARATUR_KOMMA_FEHLT)
+            komma = False
+
+            if zeichen in _ANFUEHRUNGSZEICHEN:
+                schluessel = self.string()
+            else:
+                schluessel = self.wort(REPARATUR_SCHLUESSEL)
+                if schluessel is None:
+                    continue
+            self.leerraum()
+            if self.pos >= self.ende:
+                self.melde(REPARATUR_ABGESCHNITTEN)
+                return ergebnis
+            if self.text[self.pos] == ":":
+                self.pos += 1
+            else:
+                self.melde(REPARATUR_DOPPELPUNKT_FEHLT)
+            self.pfad.append(str(schluessel))
+            try:
+                wert = self.wert()
+            except _Abgeschnitten:
+                self.melde(REPARATUR_ABGESCHNITTEN)
+                return ergebnis
+            finally:
+                self.pfad.pop()
+            # Abgeschnittene Einzelwerte sind unbrauchbar, Strukturen behalten
+            # ihre vollständigen Elemente
+            if not (self.abgeschnitten and self.nur_vollstaendige and not isinstance(wert, (dict, list))):
+                ergebnis[str(schluessel)] = wert
+            if self.abgeschnitten:
+                return ergebnis
+
+    def liste(self) -> List:
+        """Liest ein Array; bei Textende werden die gelesenen Elemente behalten"""
+        self.pos += 1
+        ergebnis = []
+        komma = False
+        while True:
+            self.leerraum()
+            if self.pos >= self.ende:
+                self.melde(REPARATUR_ABGESCHNITTEN)
+                return ergebnis
+            zeichen = self.text[self.pos]
+            if zeichen in "]}":
+                self.pos += 1
+                if komma:
+                    self.melde(REPARATUR_KOMMA_ZUVIEL)
+                if zeichen == "}":
+                    self.melde(REPARATUR_KLAMMER)
+                return ergebnis
+            if zeichen == ",":
+                self.pos += 1
+                if komma or not ergebnis:
+                    self.melde(REPARATUR_KOMMA_ZUVIEL)
+                komma = True
+                continue
+            if ergebnis and not komma:
+                self.melde(REPARATUR_KOMMA_FEHLT)
+            komma = False
+            self.pfad.append(len(ergebnis))
+            try:
+                wert = self.wert()
+            except _Abgeschnitten:
+                self.melde(REPARATUR_ABGESCHNITTEN)
+                return ergebnis
+            finally:
+                self.pfad.pop()
+            if self.abgeschnitten and self.nur_vollstaendige:
+                # Das äußerste verworfene Element wird zuletzt gemeldet
+                self.verworfen = tuple(self.pfad) + (len(ergebnis),)
+                return ergebnis
+            ergebnis.append(wert)
+            if self.abgeschnitten:
+                return ergebnis
+
+
+def _lade(text: str, nur_vollstaendige: bool) -> Tuple[Optional[Any], Optional[_Leser]]:
+    """Gemeinsamer Einstieg: json.loads, sonst ein toleranter Durchlauf"""
+    if not text:
+        return None, None
+    try:
+        return json.loads(text), None
+    except ValueError:
+        pass
+
+    leser = _Leser(text, nur_vollstaendige)
+    anfaenge = [p for p in (text.find("{"), text.find("[")) if p >= 0]
+    if not anfaenge:
+        return None, leser
+    leser.pos = min(anfaenge)
+    if text[:leser.pos].strip():
+        leser.melde(REPARATUR_TEXT_DAVOR)
+
+    wert = leser.objekt() if text[leser.pos] == "{" else leser.liste()
+
+    leser.leerraum()
+    if leser.pos < leser.ende:
+        leser.melde(REPARATUR_TEXT_DANACH)
+    return wert, leser
+
+
+def lade_tolerant(text: str) -> Tuple[Optional[Any], List[str]]:
+    """
+    Parst fehlerhaftes JSON in einem Durchlauf
+
+    Gültiges JSON wird direkt mit json.loads gelesen. Sonst beginnt der
+    Parser beim ersten '{' bzw. '[' und repariert unterwegs: typografische
+    und einfache Anführungszeichen, Kommentare, fehlende und überzählige
+    Kommata, Schlüssel ohne Anführungszeichen, rohe Zeilenumbrüche in
+    Strings und ein abgeschnittenes Ende (offene Strings, Arrays und Objekte
+    werden geschlossen, ein unvollständiges letztes Paar verworfen).
+    String-Inhalte bleiben unverändert.
+
+    Args:
+        text (str): Antworttext des Modells
+
+    Returns:
+        tuple: (geparster Wert oder None, Liste der angewendeten Reparaturen)
+    """
+    wert, leser = _lade(text, nur_vollstaendige=False)
+    return wert, list(leser.reparaturen) if leser else []
+
+
+def lade_vollstaendige(text: str) -> Tuple[Optional[Any], List[str], Optional[Tuple]]:
+    """
+    Stellt eine abgeschnittene Antwort (z.B. bei max_tokens) wieder her
+
+    Wie lade_tolerant, aber nur vollständig empfangene Elemente bleiben
+    erhalten: Das Array-Element, in dem der Text endet, wird samt Inhalt
+    verworfen (ein halber Tag, ein halbes Rezept), ebenso ein
+    abgeschnittener Einzelwert. Die umgebenden Arrays und Objekte werden
+    geschlossen, so dass z.B. {"rezepte": [r1, r2, r3...} zu
+    {"rezepte": [r1, r2]} wird.
+
+    Args:
+        text (str): Abgeschnittener Antworttext
+
+    Returns:
+        tuple: (Wert oder None, Reparaturen, Pfad des verworfenen Elements
+        oder None, z.B. ("rezepte", 2))
+    """
+    wert, leser = _lade(text, nur_vollstaendige=True)
+    if leser is None:
+        return wert, [], None
+    return wert, list(leser.reparaturen), leser.verworfen
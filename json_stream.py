@@ -0,0 +1,295 @@
+"""
+Streaming-Verarbeitung für Claude API-Antworten
+Liest Server-Sent Events und setzt das Tool-JSON inkrementell zusammen
+"""
+
+import json
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+# Arrays, deren Elemente sofort nach ihrem Abschluss gemeldet werden
+STANDARD_ZIEL_SCHLUESSEL = ("tage", "rezepte")
+
+
+class InkrementellerJSONScanner:
+    """
+    Zeichenweiser JSON-Scanner für unvollständige Eingaben
+
+    Der Scanner verfolgt Verschachtelung, Strings und Objekt-Schlüssel des
+    bisher empfangenen Textes. Sobald ein Element eines Arrays, dessen
+    Schlüssel in 'ziel_schluessel' steht (z.B. "tage" oder "rezepte"),
+    vollständig ist, wird es geparst und an 'bei_element' übergeben - lange
+    bevor das gesamte JSON-Dokument abgeschlossen ist.
+    """
+
+    def __init__(
+        self,
+        ziel_schluessel: Iterable[str] = STANDARD_ZIEL_SCHLUESSEL,
+        bei_element: Optional[Callable[[str, Any], None]] = None
+    ):
+        self.ziel_schluessel = set(ziel_schluessel)
+        self.bei_element = bei_element
+        self.elemente: List[Tuple[Tuple, Any]] = []
+        self._stuecke: List[str] = []
+        self._pos = 0
+        # Stack-Einträge: [typ, pfad, erwarte_schluessel, schluessel, index, element_start]
+        self._stack: List[List[Any]] = []
+        self._in_string = False
+        self._escape = False
+        # Zeichen des aktuell gelesenen Objekt-Schlüssels (None = kein Schlüssel)
+        self._schluessel: Optional[List[str]] = None
+
+    @property
+    def text(self) -> str:
+        """Der bisher empfangene Text"""
+        if len(self._stuecke) > 1:
+            self._stuecke = ["".join(self._stuecke)]
+        return self._stuecke[0] if self._stuecke else ""
+
+    def feed(self, chunk: str):
+        """
+        Verarbeitet das nächste Textstück
+
+        Args:
+            chunk (str): Neuer Teil des JSON-Textes (beliebig geschnitten)
+        """
+        if not chunk:
+            return
+        # Nur das neue Stück wird gescannt; der Gesamttext wird erst beim
+        # Abschluss eines Elements zusammengefügt (kein quadratischer Aufwand)
+        self._stuecke.append(chunk)
+        basis = self._pos
+        self._pos += len(chunk)
+
+        for j, zeichen in enumerate(chunk):
+            i = basis + j
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif zeichen == '\\':
+                    self._escape = True
+                elif zeichen == '"':
+                    self._in_string = False
+                    self._string_beendet()
+                    continue
+                if self._schluessel is not None:
+                    self._schluessel.append(zeichen)
+                continue
+
+            if zeichen.isspace():
+                continue
+
+            if self._stack and self._stack[-1][0] == '[' and self._stack[-1][5] is None and zeichen != ']':
+                self._stack[-1][5] = i
+
+            if zeichen == '"':
+                self._in_string = True
+                oben = self._stack[-1] if self._stack else None
+                self._schluessel = [] if oben and oben[0] == '{' and oben[2] else None
+            elif zeichen in '{[':
+                self._oeffne(zeichen)
+            elif zeichen in '}]':
+                self._schliesse(i)
+            elif zeichen == ',':
+                self._komma(i)
+            elif zeichen == ':' and self._stack and self._stack[-1][0] == '{':
+                self._stack[-1][2] = False
+
+    def _kind_pfad(self) -> Tuple:
+        """Pfad des Wertes, der an der aktuellen Position beginnt"""
+        if not self._stack:
+            return ()
+        eltern = self._stack[-1]
+        if eltern[0] == '{':
+            return eltern[1] + (eltern[3],)
+        return eltern[1] + (eltern[4],)
+
+    def _oeffne(self, zeichen: str):
+        self._stack.append([zeichen, self._kind_pfad(), zeichen == '{', None, 0, None])
+
+    def _string_beendet(self):
+        if self._schluessel is None:
+            return
+        roh = "".join(self._schluessel)
+        self._schluessel = None
+        try:
+            self._stack[-1][3] = json.loads(f'"{roh}"')
+        except ValueError:
+            self._stack[-1][3] = roh
+
+    def _komma(self, pos: int):
+        if not self._stack:
+            return
+        oben = self._stack[-1]
+        if oben[0] == '{':
+            oben[2] = True
+            return
+        self._melde_element(oben, pos)
+        oben[4] += 1
+        oben[5] = None
+
+    def _schliesse(self, pos: int):
+        if not self._stack:
+            return
+        oben = self._stack.pop()
+        if oben[0] == '[' and oben[5] is not None:
+            self._melde_element(oben, pos)
+
+    def _melde_element(self, array: List[Any], ende: int):
+        """Parst ein abgeschlossenes Array-Element und meldet es, falls gewünscht"""
+        pfad = array[1]
+        if not pfad or pfad[-1] not in self.ziel_schluessel or array[5] is None:
+            return
+        try:
+            element = json.loads(self.text[array[5]:ende])
+        except ValueError:
+            return
+        self.elemente.append((pfad + (array[4],), element))
+        if self.bei_element:
+            self.bei_element(pfad[-1], element)
+
+    def teilergebnis(self) -> Optional[Dict]:
+        """
+        Baut aus den vollständigen Elementen eine Teilstruktur auf
+
+        Nützlich, wenn der Stream abbricht: Bereits empfangene Tage oder
+        Rezepte bleiben erhalten, unvollständige werden verworfen.
+
+        Returns:
+            dict: Verschachtelte Struktur mit allen vollständigen Elementen oder None
+        """
+        if not self.elemente:
+            return None
+
+        wurzel: Dict = {}
+        for pfad, element in self.elemente:
+            knoten: Any = wurzel
+            for schritt, naechster in zip(pfad[:-1], pfad[1:]):
+                leer = [] if isinstance(naechster, int) else {}
+                if isinstance(knoten, list):
+                    while len(knoten) <= schritt:
+                        knoten.append({})
+                    if not isinstance(knoten[schritt], type(leer)):
+                        knoten[schritt] = leer
+                    knoten = knoten[schritt]
+                else:
+                    knoten = knoten.setdefault(schritt, leer)
+            knoten.append(element)
+        return wurzel
+
+
+def lese_sse(zeilen: Iterable[str]) -> Iterator[Tuple[str, Dict]]:
+    """
+    Zerlegt einen Server-Sent-Events-Stream in (event, daten)-Paare
+
+    Args:
+        zeilen: Dekodierte Zeilen des Streams (z.B. response.iter_lines())
+
+    Yields:
+        tuple: (Event-Name, geparstes JSON der data-Zeile)
+    """
+    event = None
+    daten: List[str] = []
+    for zeile in zeilen:
+        if zeile is None:
+            continue
+        if zeile == "":
+            if daten:
+                try:
+                    yield event or "message", json.loads("\n".join(daten))
+                except ValueError:
+                    pass
+            event, daten = None, []
+        elif zeile.startswith("event:"):
+            event = zeile[6:].strip()
+        elif zeile.startswith("data:"):
+            daten.append(zeile[5:].lstrip())
+    if daten:
+        try:
+            yield event or "message", json.loads("\n".join(daten))
+        except ValueError:
+            pass
+
+
+class StreamSammler:
+    """
+    Setzt eine gestreamte Messages-API-Antwort zusammen
+
+    Verarbeitet die SSE-Events (message_start, content_block_*,
+    message_delta, error), sammelt Usage-Daten und gibt die input_json_delta-
+    bzw. text_delta-Stücke an einen InkrementellerJSONScanner weiter.
+    """
+
+    def __init__(
+        self,
+        tool_name: Optional[str] = "return_json",
+        ziel_schluessel: Iterable[str] = STANDARD_ZIEL_SCHLUESSEL,
+        bei_element: Optional[Callable[[str, Any], None]] = None
+    ):
+        self.tool_name = tool_name
+        self.scanner = InkrementellerJSONScanner(ziel_schluessel, bei_element)
+        self.text_scanner = InkrementellerJSONScanner(ziel_schluessel, bei_element)
+        self.usage: Dict[str, Any] = {}
+        self.stop_reason: Optional[str] = None
+        self.fehler: Optional[str] = None
+        self._block_typen: Dict[int, str] = {}
+
+    def verarbeite(self, event: str, daten: Dict):
+        """Verarbeitet ein einzelnes SSE-Event"""
+        typ = daten.get("type", event)
+
+        if typ == "message_start":
+            self.usage.update(daten.get("message", {}).get("usage", {}))
+        elif typ == "content_block_start":
+            block = daten.get("content_block", {})
+            if block.get("type") == "tool_use" and (self.tool_name is None or block.get("name") == self.tool_name):
+                self._block_typen[daten.get("index", 0)] = "tool"
+            elif block.get("type") == "text":
+                self._block_typen[daten.get("index", 0)] = "text"
+        elif typ == "content_block_delta":
+            delta = daten.get("delta", {})
+            art = self._block_typen.get(daten.get("index", 0))
+            if delta.get("type") == "input_json_delta" and art == "tool":
+                self.scanner.feed(delta.get("partial_json", ""))
+            elif delta.get("type") == "text_delta" and art == "text":
+                self.text_scanner.feed(delta.get("text", ""))
+        elif typ == "message_delta":
+            self.stop_reason = daten.get("delta", {}).get("stop_reason", self.stop_reason)
+            self.usage.update(daten.get("usage", {}))
+        elif typ == "error":
+            fehler = daten.get("error", {})
+            self.fehler = fehler.get("message", str(fehler)) if isinstance(fehler, dict) else str(fehler)
+
+    def verarbeite_zeilen(self, zeilen: Iterable[str]):
+        """Verarbeitet alle Events eines Streams"""
+        for event, daten in lese_sse(zeilen):
+            self.verarbeite(event, daten)
+
+    @property
+    def tool_json(self) -> str:
+        """Vollständiger bisher empfangener Tool-Input als Text"""
+        return self.scanner.text
+
+    @property
+    def text(self) -> str:
+        """Bisher empfangener Text-Inhalt (Fallback ohne Tool-Call)"""
+        return self.text_scanner.text
+
+    def ergebnis(self) -> Optional[Any]:
+        """
+        Parst den vollständigen Tool-Input
+
+        Returns:
+            Das geparste JSON oder None, falls (noch) unvollständig
+        """
+        if not self.tool_json.strip():
+            return None
+        try:
+            return json.loads(self.tool_json)
+        except ValueError:
+            return None
+
+    def teilergebnis(self) -> Optional[Dict]:
+        """Teilstruktur aus allen vollständig empfangenen Elementen"""
+        return self.scanner.teilergebnis() or self.text_scanner.teilergebnis()
@@ -10,15 +10,58 @@ Author: Diätisch ausgebildeter Küchenmeister-KI-Assistent
 
 import streamlit as st
 import requests
+import asyncio
+import copy
 import json
-import re
 import logging
-from typing import List, Dict, Any, Tuple, Optional, Union
+from typing import List, Dict, Any, Tuple, Optional, Union, Callable
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 import time
+import uuid
 from functools import wraps
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from response_cache import ResponseCache, hole_standard_cache
+from rate_limiter import RateLimiter, hole_rate_limiter, schaetze_tokens
+from json_stream import StreamSammler
+from antwort_dekoder import Dekodierung, dekodiere_antwort, dekodiere_text, normalisiere_antwort
+from batch_client import BATCH_API_URL, MessageBatchClient, lese_batch_url
+from checkpoint import CheckpointStore, erstelle_run_id
+from job_runner import Job, JobRunner, JobStatus
+from prompts import CACHE_TRENNER, erstelle_nachrichten_inhalt
+from rezept_datenbank import BIBLIOTHEK_MIN_BEWERTUNG, RezeptDatenbank, erstelle_gericht_schluessel
+from duplikat_index import normalisiere_name
+from reparatur_statistik import (
+    EREIGNIS_API_AUFRUF,
+    EREIGNIS_NACHFORDERUNG,
+    EREIGNIS_SCHEMA_VERSTOSS,
+    EREIGNIS_TAG_AUFGEFUELLT,
+    EREIGNIS_WIEDERHOLUNG,
+    hole_reparatur_statistik
+)
+from schemata import (
+    PLAN_PRUEFUNG_SCHEMA,
+    REZEPTE_SCHEMA,
+    TOOL_JSON,
+    TOOL_PRUEFUNG,
+    TOOL_REZEPTE,
+    TOOL_TAG,
+    WOCHENTAGE,
+    erstelle_tool,
+    pruefe_menu,
+    pruefe_plan_pruefung,
+    pruefe_rezept,
+    pruefe_tag,
+    pruefe_woche,
+    tag_schema
+)
+
+try:
+    import httpx  # optional, nur für AsyncAnthropicClient
+except ImportError:
+    httpx = None
 
 # ===================== KONFIGURATION =====================
 
@@ -34,22 +77,35 @@ DEFAULT_MODEL = "claude-sonnet-4-20250514"
 API_TIMEOUT = 180
 MAX_RETRIES = 3
 RETRY_DELAY = 2
+MAX_PARALLELE_ANFRAGEN = 4
 
 # Planungs-Parameter
 SCHWELLWERT_AUFTEILUNG = 8
 TAGE_PRO_GRUPPE = 2
 MAX_WOCHEN = 4
 MAX_MENULINIEN = 5
-MIN_BEILAGEN = 2
 MAX_TOKENS_SPEISEPLAN = 16000
 MAX_TOKENS_REZEPTE = 10000
 MAX_TOKENS_TAG = 6000
+# Nachforderungen fehlender Menüs/Rezepte nach einer abgeschnittenen Antwort
+MAX_NACHFORDERUNGEN = 2
+
+# Hintergrund-Jobs
+JOB_POLL_SEKUNDEN = 2
 
 # UI-Konfiguration
 PAGE_TITLE = "Speiseplan-Generator Professional"
 PAGE_ICON = "👨‍🍳"
 LAYOUT = "wide"
 
+# Sortier-Optionen der Rezept-Bibliothek (Anzeige -> Schlüssel in SEITEN_SORTIERUNGEN)
+BIBLIOTHEK_SORTIERUNGEN = {
+    "Neueste": "neueste",
+    "Name A-Z": "name",
+    "Beste Bewertung": "bewertung",
+    "Meistverwendet": "verwendet",
+}
+
 # ===================== LOGGING SETUP =====================
 
 logging.basicConfig(
@@ -71,6 +127,13 @@ class MenuTyp(Enum):
     GLUTENFREI = "Glutenfrei"
     LAKTOSEFREI = "Laktosefrei"
 
+class ExecutionMode(Enum):
+    """Ausführungsmodus für die Tages-Generierung"""
+    SEQUENTIELL = "sequentiell"
+    PARALLEL = "parallel"
+    ASYNC = "async"
+    BATCH = "batch"
+
 @dataclass
 class APIConfig:
     """API-Konfigurationsobjekt"""
@@ -78,10 +141,15 @@ class APIConfig:
     model: str = DEFAULT_MODEL
     max_retries: int = MAX_RETRIES
     timeout: int = API_TIMEOUT
+    max_parallel: int = MAX_PARALLELE_ANFRAGEN
+    use_cache: bool = True
+    batch_url: str = BATCH_API_URL  # z.B. lokaler Stub-Server für Tests
     
     def __post_init__(self):
         if not self.api_key:
             raise ValueError("API-Key ist erforderlich")
+        if self.max_parallel < 1:
+            raise ValueError("max_parallel muss mindestens 1 sein")
 
 @dataclass
 class PlanConfig:
@@ -89,6 +157,10 @@ class PlanConfig:
     wochen: int
     menulinien: int
     menu_namen: List[str]
+    execution_mode: ExecutionMode = ExecutionMode.PARALLEL
+    max_parallel: Optional[int] = None  # None = Limit aus APIConfig
+    checkpoint: bool = True  # Fertige Tage/Wochen/Rezepte speichern und bei Neustart fortsetzen
+    rezepte_aus_bibliothek: bool = True  # Gut bewertete Rezepte aus der Datenbank statt neu generieren
     
     def __post_init__(self):
         # Validierung
@@ -98,6 +170,16 @@ class PlanConfig:
             raise ValueError(f"Menülinien muss zwischen 1 und {MAX_MENULINIEN} liegen")
         if len(self.menu_namen) != self.menulinien:
             raise ValueError("Anzahl der Menünamen muss mit Anzahl Menülinien übereinstimmen")
+        if self.max_parallel is not None and self.max_parallel < 1:
+            raise ValueError("max_parallel muss mindestens 1 sein")
+
+@dataclass
+class RecipeResolution:
+    """Ergebnis der Bibliotheks-Suche für die Rezepte eines (Wochen-)Plans"""
+    hits: List[Dict] = field(default_factory=list)  # Rezepte aus der Bibliothek
+    plan: Optional[Dict] = None  # Plan mit den übrigen Gerichten (None = alle gefunden)
+    keys: Dict[Tuple[str, str, str], str] = field(default_factory=dict)  # (woche, tag, menu) -> Gericht-Schlüssel
+    total: int = 0
 
 # ===================== DEKORATOREN =====================
 
@@ -114,6 +196,7 @@ def retry_on_error(max_retries: int = MAX_RETRIES, delay: float = RETRY_DELAY):
                     last_exception = e
                     if attempt < max_retries - 1:
                         logger.warning(f"Versuch {attempt + 1} fehlgeschlagen: {e}")
+                        hole_reparatur_statistik().zaehle(EREIGNIS_WIEDERHOLUNG)
                         time.sleep(delay * (attempt + 1))
                     else:
                         logger.error(f"Alle Versuche fehlgeschlagen: {e}")
@@ -135,136 +218,47 @@ def measure_time(func):
 # ===================== JSON-VERARBEITUNG =====================
 
 class JSONProcessor:
-    """Robuste JSON-Verarbeitung mit mehreren Fallback-Strategien"""
-    
-    # Smart Quotes Mapping
-    SMART_QUOTES = {
-        """: '"', """: '"', "„": '"',
-        "'": "'", "‚": "'", "'": "'",
-        "–": "-", "—": "-"
-    }
-    
-    @classmethod
-    def sanitize_text(cls, text: str) -> str:
-        """Bereinigt Text für JSON-Parsing"""
-        if not text:
-            return ""
-            
-        # Entferne Markdown-Code-Blöcke
-        text = re.sub(r"```(?:json)?\s*", "", text, flags=re.IGNORECASE)
-        text = text.replace("```", "").strip()
-        
-        # Ersetze Smart Quotes
-        for old, new in cls.SMART_QUOTES.items():
-            text = text.replace(old, new)
-        
-        # Entferne Kommentare
-        text = cls._remove_comments(text)
-        
-        # Entferne trailing commas
-        text = re.sub(r",\s*(?=[}\]])", "", text)
-        
-        # Normalisiere Whitespace
-        text = re.sub(r"\s+", " ", text)
-        
-        return text.strip()
+    """Robuste JSON-Verarbeitung über den gemeinsamen Antwort-Dekoder (antwort_dekoder)"""
     
     @staticmethod
-    def _remove_comments(text: str) -> str:
-        """Entfernt JavaScript-style Kommentare aus Text"""
-        # Einzeilige Kommentare
-        text = re.sub(r"//.*?$", "", text, flags=re.MULTILINE)
-        # Mehrzeilige Kommentare
-        text = re.sub(r"/\*.*?\*/", "", text, flags=re.DOTALL)
-        return text
-    
-    @classmethod
-    def parse_json_safe(cls, text: str) -> Optional[Dict]:
+    def parse_json_safe(text: str) -> Optional[Dict]:
         """
-        Versucht JSON mit mehreren Strategien zu parsen
+        Parst JSON in einem Durchlauf und repariert typische Modellfehler
+        
+        Gültiges JSON geht direkt an json.loads. Abgeschnittene Antworten
+        gelten hier als nicht lesbar, damit kein unvollständiges Ergebnis
+        weiterverarbeitet wird.
         
         Returns:
             Geparster JSON oder None bei Fehler
         """
         if not text:
             return None
-            
-        # Strategie 1: Direktes Parsing
-        try:
-            return json.loads(text)
-        except json.JSONDecodeError:
-            pass
-        
-        # Strategie 2: Nach Bereinigung
-        cleaned = cls.sanitize_text(text)
-        try:
-            return json.loads(cleaned)
-        except json.JSONDecodeError:
-            pass
-        
-        # Strategie 3: Extrahiere größtes JSON-Objekt
-        extracted = cls._extract_json_object(cleaned)
-        if extracted:
-            try:
-                return json.loads(extracted)
-            except json.JSONDecodeError:
-                pass
-        
-        # Strategie 4: Repariere fehlende Kommata
-        repaired = cls._auto_fix_commas(cleaned)
-        try:
-            return json.loads(repaired)
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON-Parsing endgültig fehlgeschlagen: {e}")
-            return None
+        return JSONProcessor.log_result(dekodiere_text(text)).daten
     
     @staticmethod
-    def _extract_json_object(text: str) -> Optional[str]:
-        """Extrahiert das größte JSON-Objekt aus Text"""
-        stack = []
-        start_idx = None
-        
-        for i, char in enumerate(text):
-            if char in '{[':
-                if not stack:
-                    start_idx = i
-                stack.append(char)
-            elif char in '}]':
-                if stack:
-                    opener = stack.pop()
-                    expected = '{' if char == '}' else '['
-                    if opener == expected and not stack and start_idx is not None:
-                        return text[start_idx:i+1]
-        
-        return None
-    
-    @staticmethod
-    def _auto_fix_commas(text: str) -> str:
-        """Versucht fehlende Kommata automatisch zu ergänzen"""
-        # Füge Kommata zwischen aufeinanderfolgenden JSON-Werten ein
-        patterns = [
-            (r'("\w+":\s*"[^"]*")\s+(")', r'\1, \2'),
-            (r'("\w+":\s*\d+)\s+(")', r'\1, \2'),
-            (r'("\w+":\s*true)\s+(")', r'\1, \2'),
-            (r'("\w+":\s*false)\s+(")', r'\1, \2'),
-            (r'("\w+":\s*null)\s+(")', r'\1, \2'),
-            (r'(})\s+(")', r'\1, \2'),
-            (r'(])\s+(")', r'\1, \2'),
-        ]
-        
-        for pattern, replacement in patterns:
-            text = re.sub(pattern, replacement, text)
-        
-        return text
-
-# ===================== WOCHENTAGE =====================
-
-WOCHENTAGE = ["Montag", "Dienstag", "Mittwoch", "Donnerstag", "Freitag", "Samstag", "Sonntag"]
+    def log_result(result: Dekodierung) -> Dekodierung:
+        """Protokolliert Reparaturen, verworfene Elemente und Fehler einer Dekodierung"""
+        if result.fehler:
+            logger.error(f"JSON-Parsing fehlgeschlagen: {result.fehler}")
+        elif result.reparaturen:
+            logger.info(f"JSON repariert: {', '.join(result.reparaturen)}")
+        if result.verworfen:
+            logger.warning(
+                f"Antwort abgeschnitten, unvollständiges Element "
+                f"{'/'.join(map(str, result.verworfen))} verworfen"
+            )
+        return result
 
 # ===================== VALIDIERUNG =====================
 
 class PlanValidator:
-    """Validierung von Speiseplan-Strukturen"""
+    """
+    Validierung von Speiseplan- und Rezept-Strukturen
+    
+    Die Prüfungen laufen über die kompilierten Schemata (schemata.py), die
+    auch als input_schema der Tools an die API gehen.
+    """
     
     @staticmethod
     def validate_day_structure(day: Dict[str, Any], menulinien: int) -> List[str]:
@@ -274,141 +268,244 @@ class PlanValidator:
         Returns:
             Liste von Fehlermeldungen (leer wenn valide)
         """
-        errors = []
-        
-        if not isinstance(day, dict):
-            return ["Tag-Struktur ist kein Dictionary"]
-        
-        # Prüfe Tag-Name
-        if "tag" not in day:
-            errors.append("Feld 'tag' fehlt")
-        elif day["tag"] not in WOCHENTAGE:
-            errors.append(f"Ungültiger Tag: {day.get('tag')}")
-        
-        # Prüfe Menüs
-        if "menues" not in day:
-            errors.append("Feld 'menues' fehlt")
-            return errors
-        
-        if not isinstance(day["menues"], list):
-            errors.append("'menues' ist keine Liste")
-            return errors
-        
-        if len(day["menues"]) != menulinien:
-            errors.append(f"Anzahl Menüs ({len(day['menues'])}) != {menulinien}")
-        
-        # Validiere jedes Menü
-        for idx, menu in enumerate(day["menues"], 1):
-            menu_errors = PlanValidator._validate_menu_structure(menu, idx)
-            errors.extend(menu_errors)
-        
-        return errors
+        return [str(f) for f in pruefe_tag(day, menulinien)]
     
     @staticmethod
     def _validate_menu_structure(menu: Dict[str, Any], idx: int) -> List[str]:
-        """Validiert die Struktur eines einzelnen Menüs"""
-        errors = []
-        
-        if not isinstance(menu, dict):
-            return [f"Menü {idx}: ist kein Dictionary"]
-        
-        # Pflichtfelder
-        required_fields = ["menuName", "fruehstueck", "mittagessen", "abendessen"]
-        for field in required_fields:
-            if field not in menu:
-                errors.append(f"Menü {idx}: Feld '{field}' fehlt")
-        
-        # Validiere Mittagessen im Detail
-        if "mittagessen" in menu:
-            mittag = menu["mittagessen"]
-            if not isinstance(mittag, dict):
-                errors.append(f"Menü {idx}: 'mittagessen' ist kein Dictionary")
-            else:
-                # Pflichtfelder für Mittagessen
-                mittag_required = ["hauptgericht", "beilagen"]
-                for field in mittag_required:
-                    if field not in mittag:
-                        errors.append(f"Menü {idx} Mittagessen: '{field}' fehlt")
-                
-                # Validiere Beilagen
-                if "beilagen" in mittag:
-                    if not isinstance(mittag["beilagen"], list):
-                        errors.append(f"Menü {idx}: 'beilagen' ist keine Liste")
-                    elif len(mittag["beilagen"]) < MIN_BEILAGEN:
-                        errors.append(f"Menü {idx}: Zu wenige Beilagen ({len(mittag['beilagen'])} < {MIN_BEILAGEN})")
-                
-                # Validiere Nährwerte
-                if "naehrwerte" in mittag and isinstance(mittag["naehrwerte"], dict):
-                    nw = mittag["naehrwerte"]
-                    if "kalorien" not in nw or "protein" not in nw:
-                        errors.append(f"Menü {idx}: Unvollständige Nährwerte")
-        
-        return errors
+        """Validiert die Struktur eines einzelnen Menüs (idx ab 1, für die Meldungen)"""
+        return [str(f.unter(idx - 1).unter("menues")) for f in pruefe_menu(menu)]
     
     @staticmethod
     def validate_week_structure(week: Dict[str, Any], menulinien: int) -> List[str]:
         """Validiert die Struktur einer Woche"""
-        errors = []
+        return [str(f) for f in pruefe_woche(week, menulinien)]
+    
+    @staticmethod
+    def validate_recipe(recipe: Dict[str, Any]) -> List[str]:
+        """Validiert ein Rezept (Zutaten, Zubereitung, Nährwerte)"""
+        return [str(f) for f in pruefe_rezept(recipe)]
+
+# ===================== ANTHROPIC API CLIENT =====================
+
+class BaseAnthropicClient:
+    """Gemeinsame Payload- und Response-Verarbeitung für sync und async Clients"""
+    
+    def __init__(
+        self,
+        config: APIConfig,
+        cache: Optional[ResponseCache] = None,
+        cost_tracker: Optional["CostTracker"] = None,
+        rate_limiter: Optional[RateLimiter] = None
+    ):
+        self.config = config
+        self.cache = cache if cache is not None else (hole_standard_cache() if config.use_cache else None)
+        self.cost_tracker = cost_tracker
+        # Prozessweit geteilt, damit parallele Läufe gemeinsam unter den Account-Limits bleiben
+        self.rate_limiter = rate_limiter or hole_rate_limiter()
+    
+    def _cache_key(self, payload: Dict[str, Any]) -> str:
+        """Berechnet den Cache-Schlüssel eines Payloads"""
+        return ResponseCache.erstelle_schluessel(
+            payload["model"],
+            payload["messages"],
+            payload["max_tokens"],
+            payload.get("temperature"),
+            payload.get("tools")
+        )
+    
+    def _lookup_cache(
+        self,
+        payload: Dict[str, Any]
+    ) -> Tuple[Optional[str], Optional[Tuple[Optional[Dict], Optional[str], Optional[Dict]]]]:
+        """
+        Sucht ein Payload im Antwort-Cache
         
-        if not isinstance(week, dict):
-            return ["Wochen-Struktur ist kein Dictionary"]
+        Returns:
+            Tuple von (cache_key, call_api-Ergebnis oder None bei Miss)
+        """
+        if self.cache is None:
+            return None, None
+        
+        key = self._cache_key(payload)
+        hit = self.cache.hole(key)
+        if hit is None:
+            return key, None
+        
+        parsed, usage = hit
+        usage = dict(usage, cache_hit=True)
+        self._track_usage(usage)
+        return key, (parsed, None, usage)
+    
+    def _store_cache(self, key: Optional[str], parsed: Dict, usage: Dict) -> None:
+        """Legt eine erfolgreiche Antwort im Cache ab"""
+        if self.cache is not None and key is not None:
+            try:
+                self.cache.speichere(key, parsed, usage)
+            except Exception as e:
+                logger.warning(f"Antwort-Cache nicht beschreibbar: {e}")
+    
+    def _track_usage(self, usage: Optional[Dict]) -> None:
+        """Meldet Usage-Daten an den Cost-Tracker (Cache-Treffer kosten nichts)"""
+        if self.cost_tracker is not None and usage:
+            self.cost_tracker.add_usage(usage)
+    
+    def _headers(self) -> Dict[str, str]:
+        """Erstellt die Request-Header"""
+        return {
+            "Content-Type": "application/json",
+            "x-api-key": self.config.api_key,
+            "anthropic-version": API_VERSION
+        }
+    
+    def _build_payload(
+        self,
+        prompt: str,
+        max_tokens: int,
+        use_tool_call: bool,
+        tool: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Erstellt das API-Payload
         
-        if "woche" not in week:
-            errors.append("Feld 'woche' fehlt")
+        Tools, System-Prompt und der statische Prompt-Anfang (vor CACHE_TRENNER)
+        werden mit cache_control für serverseitiges Prompt-Caching markiert.
+        Das Tool (schemata.erstelle_tool, z.B. return_tag mit tag_schema) gibt
+        die erwartete Struktur vor; ohne Tool wird das untypisierte
+        return_json verwendet.
+        """
         
-        if "tage" not in week:
-            errors.append("Feld 'tage' fehlt")
-            return errors
+        base_payload = {
+            "model": self.config.model,
+            "max_tokens": max_tokens,
+            "temperature": 0,
+            "top_p": 0.1,
+            "messages": [{"role": "user", "content": erstelle_nachrichten_inhalt(prompt)}]
+        }
         
-        if not isinstance(week["tage"], list):
-            errors.append("'tage' ist keine Liste")
-            return errors
+        if use_tool_call:
+            tool = tool or erstelle_tool(TOOL_JSON)
+            base_payload["tools"] = [dict(tool, cache_control={"type": "ephemeral"})]
+            base_payload["tool_choice"] = {"type": "tool", "name": tool["name"]}
+            base_payload["system"] = [{
+                "type": "text",
+                "text": (
+                    "Du bist ein diätisch ausgebildeter Küchenmeister mit 25 Jahren Erfahrung. "
+                    f"Gib dein Ergebnis AUSSCHLIESSLICH als Tool-Aufruf '{tool['name']}' zurück. "
+                    "Keine Erklärungen, kein Markdown, nur strukturiertes JSON im Tool-Call."
+                ),
+                "cache_control": {"type": "ephemeral"}
+            }]
         
-        if len(week["tage"]) != 7:
-            errors.append(f"Woche hat {len(week['tage'])} Tage statt 7")
+        return base_payload
+    
+    def _extract_response(self, data: Dict[str, Any], truncated: bool = False) -> Optional[Dict]:
+        """
+        Extrahiert die Antwort aus der API-Response
         
-        # Validiere jeden Tag
-        for tag in week["tage"]:
-            day_errors = PlanValidator.validate_day_structure(tag, menulinien)
-            errors.extend(day_errors)
+        Mit truncated=True (stop_reason "max_tokens") werden aus Text nur die
+        vollständig empfangenen Elemente übernommen.
+        """
+        return JSONProcessor.log_result(dekodiere_antwort(data, abgeschnitten=truncated)).daten
+    
+    def _normalize_response(self, data: Any) -> Optional[Dict]:
+        """Normalisiert die Response-Struktur"""
+        return normalisiere_antwort(data)
+    
+    def _extract_error_message(self, response: Any) -> str:
+        """Extrahiert Fehlermeldung aus Response (requests oder httpx)"""
+        try:
+            error_data = response.json()
+            if "error" in error_data:
+                return error_data["error"].get("message", str(error_data["error"]))
+            return response.text
+        except:
+            return f"Status {response.status_code}: {response.text[:200]}"
+    
+    def _handle_status(self, response: Any, attempt: int) -> Optional[float]:
+        """
+        Meldet eine Response an den Rate-Limiter
         
-        return errors
-
-# ===================== ANTHROPIC API CLIENT =====================
+        Returns:
+            Wartezeit in Sekunden, falls bei 429/529 ein weiterer Versuch sinnvoll ist, sonst None
+        """
+        pause = self.rate_limiter.melde_antwort(response.status_code, response.headers)
+        if response.status_code in (429, 529) and attempt < self.config.max_retries - 1:
+            logger.warning(
+                f"API überlastet (Status {response.status_code}), "
+                f"pausiere {pause:.0f}s (Versuch {attempt + 1}/{self.config.max_retries})"
+            )
+            hole_reparatur_statistik().zaehle(EREIGNIS_WIEDERHOLUNG)
+            return pause
+        return None
+    
+    def _release(self, reserved: int) -> int:
+        """Gibt die Reservierung eines Versuchs ohne Verbrauch an den Rate-Limiter zurück"""
+        self.rate_limiter.verbuche(reserved, None)
+        return 0
+    
+    @staticmethod
+    def _record_call(payload: Dict[str, Any], start: float) -> None:
+        """Erfasst Dauer (inkl. Wartezeiten bei 429/529) eines API-Aufrufs je Tool"""
+        hole_reparatur_statistik().erfasse_aufruf(
+            payload.get("tool_choice", {}).get("name"),
+            time.monotonic() - start
+        )
 
-class AnthropicClient:
+class AnthropicClient(BaseAnthropicClient):
     """Verbesserter Anthropic API Client mit Fehlerbehandlung"""
     
-    def __init__(self, config: APIConfig):
-        self.config = config
+    def __init__(
+        self,
+        config: APIConfig,
+        cache: Optional[ResponseCache] = None,
+        cost_tracker: Optional["CostTracker"] = None,
+        rate_limiter: Optional[RateLimiter] = None
+    ):
+        super().__init__(config, cache, cost_tracker, rate_limiter)
         self.session = requests.Session()
-        self.session.headers.update({
-            "Content-Type": "application/json",
-            "x-api-key": config.api_key,
-            "anthropic-version": API_VERSION
-        })
+        self.session.headers.update(self._headers())
+        # Connection-Pool passend zum Parallelitäts-Limit
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=config.max_parallel)
+        self.session.mount("https://", adapter)
     
     @retry_on_error(max_retries=3)
     def call_api(
         self,
         prompt: str,
         max_tokens: int = MAX_TOKENS_SPEISEPLAN,
-        use_tool_call: bool = True
+        use_tool_call: bool = True,
+        tool: Optional[Dict[str, Any]] = None
     ) -> Tuple[Optional[Dict], Optional[str], Optional[Dict]]:
         """
         Ruft die Anthropic API auf
         
+        Bricht die Antwort bei max_tokens ab, enthält das Ergebnis nur die
+        vollständigen Elemente und usage_info["abgeschnitten"] ist True.
+        
         Returns:
             Tuple von (parsed_response, error_message, usage_info)
         """
-        payload = self._build_payload(prompt, max_tokens, use_tool_call)
+        payload = self._build_payload(prompt, max_tokens, use_tool_call, tool)
+        cache_key, cached = self._lookup_cache(payload)
+        if cached is not None:
+            return cached
         
+        reserved, usage = 0, None
         try:
-            response = self.session.post(
-                API_BASE_URL,
-                json=payload,
-                timeout=self.config.timeout
-            )
+            estimate = schaetze_tokens(prompt)
+            start = time.monotonic()
+            for attempt in range(self.config.max_retries):
+                reserved = self.rate_limiter.erwerbe(estimate)
+                response = self.session.post(
+                    API_BASE_URL,
+                    json=payload,
+                    timeout=self.config.timeout
+                )
+                # Der Rate-Limiter pausiert alle Aufrufer gemeinsam; hier nur erneut anstellen
+                if self._handle_status(response, attempt) is None:
+                    break
+                reserved = self._release(reserved)
+            self._record_call(payload, start)
             
             if response.status_code != 200:
                 error_msg = self._extract_error_message(response)
@@ -416,12 +513,18 @@ class AnthropicClient:
                 return None, error_msg, None
             
             data = response.json()
-            parsed = self._extract_response(data)
+            truncated = data.get("stop_reason") == "max_tokens"
+            parsed = self._extract_response(data, truncated)
             usage = data.get("usage", {})
+            self._track_usage(usage)
             
             if parsed is None:
                 return None, "Konnte Antwort nicht parsen", usage
             
+            if truncated:
+                # Unvollständig: nicht cachen, Aufrufer fordert den Rest nach
+                return parsed, None, dict(usage, abgeschnitten=True)
+            self._store_cache(cache_key, parsed, usage)
             return parsed, None, usage
             
         except requests.exceptions.Timeout:
@@ -438,86 +541,319 @@ class AnthropicClient:
             error_msg = f"Unerwarteter Fehler: {str(e)}"
             logger.error(error_msg)
             return None, error_msg, None
+        
+        finally:
+            # Ohne Usage (Fehlerstatus, Exception) wird die Reservierung zurückgegeben
+            self.rate_limiter.verbuche(reserved, usage)
     
-    def _build_payload(
+    def call_batch(
         self,
-        prompt: str,
-        max_tokens: int,
-        use_tool_call: bool
-    ) -> Dict[str, Any]:
-        """Erstellt das API-Payload"""
+        prompts: Dict[str, Tuple[str, int]],
+        batch_client: MessageBatchClient,
+        on_status: Optional[Callable[[Dict], None]] = None,
+        use_tool_call: bool = True,
+        tool: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Tuple[Optional[Dict], Optional[str], Optional[Dict]]]:
+        """
+        Sendet mehrere Prompts als einen Message Batch
         
-        base_payload = {
-            "model": self.config.model,
-            "max_tokens": max_tokens,
-            "temperature": 0,
-            "top_p": 0.1,
-            "messages": [{"role": "user", "content": prompt}]
-        }
+        Antworten aus dem Antwort-Cache werden nicht erneut angefragt. Die
+        Usage-Daten werden mit 'batch': True gemeldet (halber Preis).
         
-        if use_tool_call:
-            base_payload["tools"] = [{
-                "name": "return_json",
-                "description": "Rückgabe des Ergebnisses als strukturiertes JSON",
-                "input_schema": {"type": "object"}
-            }]
-            base_payload["tool_choice"] = {"type": "tool", "name": "return_json"}
-            base_payload["system"] = (
-                "Du bist ein diätisch ausgebildeter Küchenmeister mit 25 Jahren Erfahrung. "
-                "Gib dein Ergebnis AUSSCHLIESSLICH als Tool-Aufruf 'return_json' zurück. "
-                "Keine Erklärungen, kein Markdown, nur strukturiertes JSON im Tool-Call."
-            )
+        Args:
+            prompts: custom_id -> (prompt, max_tokens)
+            tool: Tool (schemata.erstelle_tool) für alle Prompts
         
-        return base_payload
-    
-    def _extract_response(self, data: Dict[str, Any]) -> Optional[Dict]:
-        """Extrahiert die Antwort aus der API-Response"""
-        
-        # Versuche Tool-Call zu extrahieren
-        content = data.get("content", [])
-        for item in content:
-            if isinstance(item, dict) and item.get("type") == "tool_use":
-                tool_input = item.get("input")
-                if tool_input:
-                    return self._normalize_response(tool_input)
-        
-        # Fallback: Text-Response parsen
-        if content and isinstance(content[0], dict):
-            text = content[0].get("text", "")
-            if text:
-                parsed = JSONProcessor.parse_json_safe(text)
-                if parsed:
-                    return self._normalize_response(parsed)
+        Returns:
+            custom_id -> (parsed_response, error_message, usage_info)
+        """
+        results = {}
+        pending = {}
+        cache_keys = {}
+        for custom_id, (prompt, max_tokens) in prompts.items():
+            payload = self._build_payload(prompt, max_tokens, use_tool_call, tool)
+            cache_keys[custom_id], cached = self._lookup_cache(payload)
+            if cached is not None:
+                results[custom_id] = cached
+            else:
+                pending[custom_id] = payload
+        
+        if not pending:
+            return results
+        
+        start = time.monotonic()
+        answers, batch_error = batch_client.fuehre_aus(pending, on_status)
+        statistik = hole_reparatur_statistik()
+        statistik.zaehle(EREIGNIS_API_AUFRUF, len(pending))
+        statistik.erfasse_dauer(f"batch:{tool['name'] if tool else TOOL_JSON}", time.monotonic() - start)
+        for custom_id in pending:
+            if batch_error:
+                results[custom_id] = (None, batch_error, None)
+                continue
+            
+            message, error = answers[custom_id]
+            if error:
+                logger.error(f"Batch-Anfrage {custom_id}: {error}")
+                results[custom_id] = (None, error, None)
+                continue
+            
+            usage = message.get("usage", {})
+            self._track_usage(dict(usage, batch=True))
+            truncated = message.get("stop_reason") == "max_tokens"
+            parsed = self._extract_response(message, truncated)
+            if parsed is None:
+                results[custom_id] = (None, "Konnte Antwort nicht parsen", usage)
+                continue
+            
+            if truncated:
+                results[custom_id] = (parsed, None, dict(usage, abgeschnitten=True))
+                continue
+            self._store_cache(cache_keys[custom_id], parsed, usage)
+            results[custom_id] = (parsed, None, usage)
         
-        return None
+        if batch_error:
+            logger.error(batch_error)
+        return results
     
-    def _normalize_response(self, data: Any) -> Optional[Dict]:
-        """Normalisiert die Response-Struktur"""
-        if not isinstance(data, dict):
-            return None
+    def call_api_stream(
+        self,
+        prompt: str,
+        max_tokens: int = MAX_TOKENS_SPEISEPLAN,
+        use_tool_call: bool = True,
+        on_element: Optional[Callable[[str, Any], None]] = None,
+        tool: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Optional[Dict], Optional[str], Optional[Dict]]:
+        """
+        Ruft die Anthropic API per SSE-Streaming auf
         
-        # Prüfe auf erwartete Strukturen
-        if any(key in data for key in ["speiseplan", "rezepte", "tag", "pruefung"]):
-            return data
+        Das Tool-JSON wird aus den input_json_delta-Stücken inkrementell
+        zusammengesetzt. Jeder vollständige Tag bzw. jedes vollständige Rezept
+        wird sofort an on_element(schluessel, element) übergeben. Bricht der
+        Stream ab (Timeout, Netzwerk), werden die bis dahin vollständigen
+        Elemente als Teilergebnis zurückgegeben; usage["stream_abgebrochen"]
+        enthält dann den Grund. Bei max_tokens gilt dasselbe mit
+        usage["abgeschnitten"] = True.
         
-        # Prüfe verschachtelte Strukturen
-        for key in ["data", "result", "output"]:
-            if key in data and isinstance(data[key], dict):
-                nested = data[key]
-                if any(k in nested for k in ["speiseplan", "rezepte", "tag"]):
-                    return nested
+        Returns:
+            Tuple von (parsed_response, error_message, usage_info)
+        """
+        payload = self._build_payload(prompt, max_tokens, use_tool_call, tool)
+        cache_key, cached = self._lookup_cache(payload)
+        if cached is not None:
+            parsed = cached[0]
+            if on_element and parsed:
+                for tag in (
+                    t for w in parsed.get("speiseplan", {}).get("wochen", []) for t in w.get("tage", [])
+                ):
+                    on_element("tage", tag)
+                for rezept in parsed.get("rezepte", []):
+                    on_element("rezepte", rezept)
+            return cached
+        
+        payload["stream"] = True
+        tool_name = payload["tool_choice"]["name"] if use_tool_call else None
+        sammler = StreamSammler(tool_name, bei_element=on_element)
+        start = time.monotonic()
+        deadline = start + self.config.timeout
+        
+        reserved = 0
+        try:
+            estimate = schaetze_tokens(prompt)
+            for attempt in range(self.config.max_retries):
+                reserved = self.rate_limiter.erwerbe(estimate)
+                response = self.session.post(
+                    API_BASE_URL,
+                    json=payload,
+                    stream=True,
+                    timeout=self.config.timeout
+                )
+                if self._handle_status(response, attempt) is None:
+                    break
+                response.close()
+                reserved = self._release(reserved)
+            
+            if response.status_code != 200:
+                # Verbindung an den Pool zurückgeben (stream=True liest den Body nicht)
+                with response:
+                    error_msg = self._extract_error_message(response)
+                logger.error(f"API-Fehler: {error_msg}")
+                self._release(reserved)
+                return None, error_msg, None
+            
+            def lines():
+                # Gesamt-Timeout, da der Read-Timeout nur pro Chunk greift
+                for line in response.iter_lines(decode_unicode=True):
+                    if time.monotonic() > deadline:
+                        raise requests.exceptions.Timeout()
+                    yield line
+            
+            response.encoding = "utf-8"
+            with response:
+                sammler.verarbeite_zeilen(lines())
+            abbruch = sammler.fehler
         
-        return data
+        except requests.exceptions.Timeout:
+            abbruch = "API-Timeout: Stream dauerte zu lange"
+        except requests.exceptions.RequestException as e:
+            abbruch = f"Netzwerkfehler: {str(e)}"
+        except Exception as e:
+            error_msg = f"Unerwarteter Fehler: {str(e)}"
+            logger.error(error_msg)
+            self._release(reserved)
+            return None, error_msg, None
+        self._record_call(payload, start)
+        
+        # Abgebrochene Streams ohne Usage geben die Reservierung zurück
+        usage = sammler.usage
+        self.rate_limiter.verbuche(reserved, usage)
+        if usage:
+            self._track_usage(usage)
+        
+        if not abbruch:
+            # Genau eine Dekodierung pro Antwort: unvollständiges oder fehlerhaftes
+            # Tool-JSON geht als String an den Dekoder, der es repariert bzw. bei
+            # max_tokens nur die vollständigen Elemente übernimmt
+            tool_input = sammler.ergebnis()
+            truncated = tool_input is None and sammler.stop_reason == "max_tokens"
+            if tool_input is None:
+                tool_input = sammler.tool_json
+            content = (
+                [{"type": "tool_use", "name": tool_name, "input": tool_input}] if tool_input
+                else [{"type": "text", "text": sammler.text}]
+            )
+            parsed = self._extract_response({"content": content}, truncated)
+            if parsed is not None:
+                if truncated:
+                    return parsed, None, dict(usage, abgeschnitten=True)
+                self._store_cache(cache_key, parsed, usage)
+                return parsed, None, usage
+            if not truncated:
+                return None, "Konnte Antwort nicht parsen", usage
+            abbruch = "Antwort bei max_tokens abgeschnitten"
+        
+        logger.error(abbruch)
+        partial = sammler.teilergebnis()
+        if partial is None:
+            return None, abbruch, usage or None
+        
+        logger.warning(f"Stream abgebrochen, verwende {len(sammler.scanner.elemente or sammler.text_scanner.elemente)} vollständige Elemente")
+        return self._normalize_response(partial), None, dict(usage, stream_abgebrochen=abbruch)
+
+class AsyncAnthropicClient(BaseAnthropicClient):
+    """
+    Asynchroner Anthropic API Client auf Basis von httpx
+    
+    Alle Aufrufe teilen sich einen AsyncClient mit Connection-Pool, so dass
+    viele Anfragen aus einer Event-Loop per gather() laufen können, ohne
+    einen Thread pro Anfrage. Verwendung als async Context-Manager.
+    """
+    
+    def __init__(
+        self,
+        config: APIConfig,
+        cache: Optional[ResponseCache] = None,
+        cost_tracker: Optional["CostTracker"] = None,
+        rate_limiter: Optional[RateLimiter] = None
+    ):
+        if httpx is None:
+            raise ImportError("AsyncAnthropicClient benötigt das Paket 'httpx' (pip install httpx)")
+        super().__init__(config, cache, cost_tracker, rate_limiter)
+        self._client: Optional["httpx.AsyncClient"] = None
+    
+    async def __aenter__(self) -> "AsyncAnthropicClient":
+        await self.open()
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+    
+    async def open(self) -> None:
+        """Öffnet den gemeinsamen Connection-Pool"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=self._headers(),
+                timeout=self.config.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.config.max_parallel,
+                    max_keepalive_connections=self.config.max_parallel
+                )
+            )
     
-    def _extract_error_message(self, response: requests.Response) -> str:
-        """Extrahiert Fehlermeldung aus Response"""
+    async def aclose(self) -> None:
+        """Schließt den Connection-Pool"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def call_api(
+        self,
+        prompt: str,
+        max_tokens: int = MAX_TOKENS_SPEISEPLAN,
+        use_tool_call: bool = True,
+        tool: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Optional[Dict], Optional[str], Optional[Dict]]:
+        """
+        Ruft die Anthropic API asynchron auf
+        
+        Returns:
+            Tuple von (parsed_response, error_message, usage_info)
+        """
+        await self.open()
+        payload = self._build_payload(prompt, max_tokens, use_tool_call, tool)
+        cache_key, cached = self._lookup_cache(payload)
+        if cached is not None:
+            return cached
+        
+        reserved, usage = 0, None
         try:
-            error_data = response.json()
-            if "error" in error_data:
-                return error_data["error"].get("message", str(error_data["error"]))
-            return response.text
-        except:
-            return f"Status {response.status_code}: {response.text[:200]}"
+            estimate = schaetze_tokens(prompt)
+            start = time.monotonic()
+            for attempt in range(self.config.max_retries):
+                reserved = await self.rate_limiter.erwerbe_async(estimate)
+                response = await self._client.post(API_BASE_URL, json=payload)
+                if self._handle_status(response, attempt) is None:
+                    break
+                reserved = self._release(reserved)
+            self._record_call(payload, start)
+            
+            if response.status_code != 200:
+                error_msg = self._extract_error_message(response)
+                logger.error(f"API-Fehler: {error_msg}")
+                return None, error_msg, None
+            
+            data = response.json()
+            truncated = data.get("stop_reason") == "max_tokens"
+            parsed = self._extract_response(data, truncated)
+            usage = data.get("usage", {})
+            self._track_usage(usage)
+            
+            if parsed is None:
+                return None, "Konnte Antwort nicht parsen", usage
+            
+            if truncated:
+                # Unvollständig: nicht cachen, Aufrufer fordert den Rest nach
+                return parsed, None, dict(usage, abgeschnitten=True)
+            self._store_cache(cache_key, parsed, usage)
+            return parsed, None, usage
+            
+        except httpx.TimeoutException:
+            error_msg = "API-Timeout: Anfrage dauerte zu lange"
+            logger.error(error_msg)
+            return None, error_msg, None
+            
+        except httpx.HTTPError as e:
+            error_msg = f"Netzwerkfehler: {str(e)}"
+            logger.error(error_msg)
+            return None, error_msg, None
+            
+        except Exception as e:
+            error_msg = f"Unerwarteter Fehler: {str(e)}"
+            logger.error(error_msg)
+            return None, error_msg, None
+        
+        finally:
+            # Ohne Usage (Fehlerstatus, Exception) wird die Reservierung zurückgegeben
+            self.rate_limiter.verbuche(reserved, usage)
 
 # ===================== PROMPT GENERATOR =====================
 
@@ -525,21 +861,22 @@ class PromptGenerator:
     """Generiert optimierte Prompts für verschiedene Aufgaben"""
     
     @staticmethod
-    def create_day_prompt(tag: str, config: PlanConfig) -> str:
-        """Erstellt Prompt für einen einzelnen Tag"""
+    def create_day_prompt(tag: str, config: PlanConfig, menu_namen: Optional[List[str]] = None) -> str:
+        """
+        Erstellt Prompt für einen einzelnen Tag
+        
+        Mit menu_namen werden nur diese Menülinien angefragt (Nachforderung
+        nach einer abgeschnittenen Antwort).
+        """
         
+        menu_namen = menu_namen or config.menu_namen
         menu_list = "\n".join([
             f"  {i+1}. {name}"
-            for i, name in enumerate(config.menu_namen)
+            for i, name in enumerate(menu_namen)
         ])
         
         return f"""Du bist ein diätisch ausgebildeter Küchenmeister mit 25 Jahren Erfahrung in der Gemeinschaftsverpflegung.
 
-AUFGABE: Erstelle einen professionellen Speiseplan für {tag} mit {config.menulinien} Menülinie(n).
-
-MENÜLINIEN:
-{menu_list}
-
 QUALITÄTSKRITERIEN:
 ✓ Seniorengerechte Zubereitung (leicht kaubar, gut verdaulich)
 ✓ Ausgewogene Ernährung nach DGE-Standards
@@ -555,7 +892,7 @@ STRUKTUR PRO MENÜLINIE:
 
 ANTWORT-SCHEMA (exakt einhalten):
 {{
-  "tag": "{tag}",
+  "tag": "Wochentag",
   "menues": [
     {{
       "menuName": "Exakter Name der Menülinie",
@@ -587,14 +924,19 @@ ANTWORT-SCHEMA (exakt einhalten):
     }}
   ]
 }}
+{CACHE_TRENNER}
+AUFGABE: Erstelle einen professionellen Speiseplan für {tag} mit {len(menu_namen)} Menülinie(n).
+Setze "tag" auf "{tag}".
 
-WICHTIG: Erstelle GENAU {config.menulinien} Menü-Einträge, einen für jede Menülinie."""
+MENÜLINIEN:
+{menu_list}
+
+WICHTIG: Erstelle GENAU {len(menu_namen)} Menü-Einträge, einen für jede Menülinie."""
     
     @staticmethod
-    def create_recipe_prompt(speiseplan: Dict[str, Any], max_recipes: int = 10) -> str:
-        """Erstellt Prompt für Rezepte basierend auf Speiseplan"""
+    def collect_dishes(speiseplan: Dict[str, Any], max_recipes: int = 10) -> List[Dict[str, Any]]:
+        """Hauptgerichte des Speiseplans, für die Rezepte angefragt werden"""
         
-        # Extrahiere Hauptgerichte für Rezepte
         gerichte = []
         for woche in speiseplan.get("speiseplan", {}).get("wochen", []):
             woche_nr = woche.get("woche", 1)
@@ -612,8 +954,13 @@ WICHTIG: Erstelle GENAU {config.menulinien} Menü-Einträge, einen für jede Men
                         })
         
         # Limitiere Anzahl wenn nötig
-        if len(gerichte) > max_recipes:
-            gerichte = gerichte[:max_recipes]
+        return gerichte[:max_recipes]
+    
+    @staticmethod
+    def create_recipe_prompt(speiseplan: Dict[str, Any], max_recipes: int = 10) -> str:
+        """Erstellt Prompt für Rezepte basierend auf Speiseplan"""
+        
+        gerichte = PromptGenerator.collect_dishes(speiseplan, max_recipes)
         
         gerichte_text = "\n".join([
             f"- Woche {g['woche']}, {g['tag']}, {g['menu']}: {g['gericht']}"
@@ -726,11 +1073,31 @@ ANTWORT-SCHEMA:
 class SpeiseplanGenerator:
     """Hauptklasse für die Speiseplan-Generierung"""
     
-    def __init__(self, api_client: AnthropicClient):
+    def __init__(
+        self,
+        api_client: AnthropicClient,
+        async_client: Optional[AsyncAnthropicClient] = None,
+        batch_client: Optional[MessageBatchClient] = None,
+        bibliothek: Optional[RezeptDatenbank] = None,
+        checkpoint_scope: Optional[str] = None
+    ):
+        """
+        Initialisiert den Generator
+        
+        Args:
+            checkpoint_scope: Optional - z.B. Sitzungs-ID; trennt die Checkpoints
+                gleich konfigurierter Läufe verschiedener Sitzungen
+        """
         self.api_client = api_client
+        self.async_client = async_client
+        self.batch_client = batch_client
+        self.bibliothek = bibliothek
         self.prompt_generator = PromptGenerator()
         self.validator = PlanValidator()
         self.json_processor = JSONProcessor()
+        self.day_errors: Dict[Tuple[int, str], str] = {}
+        self.checkpoints: Optional[CheckpointStore] = None
+        self.checkpoint_scope = checkpoint_scope
     
     @measure_time
     def generate_complete_plan(
@@ -741,18 +1108,78 @@ class SpeiseplanGenerator:
         """
         Generiert kompletten Speiseplan mit Rezepten und Prüfung
         
+        Mit config.checkpoint werden fertige Tage, Wochen und Rezepte unter
+        einer aus Konfiguration und checkpoint_scope abgeleiteten Run-ID
+        gespeichert. Ein erneuter Start mit gleicher Konfiguration (in
+        derselben Sitzung) setzt dort fort; nach
+        erfolgreichem Abschluss werden die Checkpoints gelöscht.
+        
         Returns:
             Tuple von (speiseplan, rezepte, pruefung, error_message)
         """
         
         logger.info(f"Starte Generierung: {config.wochen} Wochen, {config.menulinien} Linien")
         
+        self.checkpoints = self._open_checkpoints(config) if config.checkpoint else None
+        if self.checkpoints and self.checkpoints.anzahl() and progress_callback:
+            progress_callback(
+                f"Setze Lauf {self.checkpoints.run_id} fort: "
+                f"{self.checkpoints.anzahl('tag')} Tage, "
+                f"{self.checkpoints.anzahl('rezepte')} Rezept-Wochen aus Checkpoint"
+            )
+        
         # Entscheide Generierungsstrategie
         total_days = config.wochen * 7
-        if total_days > 7 or config.menulinien > 3:
-            return self._generate_incremental(config, progress_callback)
-        else:
-            return self._generate_direct(config, progress_callback)
+        with hole_reparatur_statistik().miss("plan"):
+            if total_days > 7 or config.menulinien > 3:
+                result = self._generate_incremental(config, progress_callback)
+            else:
+                result = self._generate_direct(config, progress_callback)
+        
+        if self.checkpoints:
+            if result[3] is None:
+                self.checkpoints.loesche()
+            elif self.checkpoints.anzahl():
+                logger.info(f"Checkpoints für Lauf {self.checkpoints.run_id} bleiben für Fortsetzung erhalten")
+                result = result[:3] + (f"{result[3]} (Fortschritt gespeichert - ein erneuter Start setzt fort)",)
+        
+        return result
+    
+    def _open_checkpoints(self, config: PlanConfig) -> CheckpointStore:
+        """Öffnet den Checkpoint-Speicher zur Run-ID von Konfiguration und Sitzung"""
+        run_id = erstelle_run_id(
+            self.checkpoint_scope,
+            config.wochen,
+            config.menulinien,
+            config.menu_namen,
+            self.api_client.config.model,
+            # Geänderte Prompts ergeben einen neuen Lauf
+            self.prompt_generator.create_day_prompt(WOCHENTAGE[0], config)
+        )
+        return CheckpointStore(run_id)
+    
+    def _load_checkpoint(self, kind: str, key: str) -> Optional[Any]:
+        """Lädt einen Checkpoint (None ohne aktiven Speicher)"""
+        return self.checkpoints.lade(kind, key) if self.checkpoints else None
+    
+    def _save_checkpoint(self, kind: str, key: str, data: Any) -> None:
+        """Speichert einen Checkpoint; Schreibfehler brechen die Generierung nicht ab"""
+        if self.checkpoints is None or data is None:
+            return
+        try:
+            self.checkpoints.speichere(kind, key, data)
+        except OSError as e:
+            logger.warning(f"Checkpoint {kind}/{key} nicht speicherbar: {e}")
+    
+    def _checkpoint_day(
+        self,
+        key: Tuple[int, str],
+        result: Tuple[Optional[Dict], Optional[str]]
+    ) -> Tuple[Optional[Dict], Optional[str]]:
+        """Speichert einen erfolgreich generierten Tag und gibt das Ergebnis unverändert zurück"""
+        if not result[1]:
+            self._save_checkpoint("tag", f"w{key[0]}-{key[1]}", result[0])
+        return result
     
     def _generate_incremental(
         self,
@@ -761,30 +1188,45 @@ class SpeiseplanGenerator:
     ) -> Tuple[Optional[Dict], Optional[Dict], Optional[Dict], Optional[str]]:
         """Generiert Plan inkrementell (Woche für Woche, Tag für Tag)"""
         
-        all_weeks = []
         all_recipes = []
+        week_nums = list(range(1, config.wochen + 1))
         
-        for week_num in range(1, config.wochen + 1):
+        if config.execution_mode in (ExecutionMode.PARALLEL, ExecutionMode.ASYNC, ExecutionMode.BATCH):
+            # Alle Tage aller Wochen gleichzeitig anfragen
             if progress_callback:
-                progress_callback(f"Generiere Woche {week_num} von {config.wochen}")
+                progress_callback(f"Generiere {len(week_nums) * 7} Tage {'als Batch' if config.execution_mode == ExecutionMode.BATCH else 'parallel'}")
             
-            # Generiere Woche
-            week_data, error = self._generate_week(config, week_num)
+            all_weeks, error = self._generate_weeks(config, week_nums, progress_callback)
             if error:
                 return None, None, None, error
-            
-            all_weeks.append(week_data)
-            
-            # Generiere Rezepte für diese Woche
-            week_plan = {
+        else:
+            all_weeks = []
+            for week_num in week_nums:
+                if progress_callback:
+                    progress_callback(f"Generiere Woche {week_num} von {config.wochen}")
+                
+                # Generiere Woche
+                week_data, error = self._generate_week(config, week_num)
+                if error:
+                    return None, None, None, error
+                
+                all_weeks.append(week_data)
+        
+        # Generiere Rezepte pro Woche
+        week_plans = [
+            {
                 "speiseplan": {
                     "wochen": [week_data],
                     "menuLinien": config.menulinien,
                     "menuNamen": config.menu_namen
                 }
             }
-            
-            recipes, recipe_error = self._generate_recipes(week_plan)
+            for week_data in all_weeks
+        ]
+        
+        recipe_results = self._generate_week_recipes(config, week_plans, progress_callback)
+        
+        for recipes, recipe_error in recipe_results:
             if not recipe_error and recipes:
                 all_recipes.extend(recipes.get("rezepte", []))
         
@@ -804,6 +1246,161 @@ class SpeiseplanGenerator:
         
         return complete_plan, complete_recipes, validation, None
     
+    def _generate_week_recipes(
+        self,
+        config: PlanConfig,
+        week_plans: List[Dict],
+        progress_callback=None
+    ) -> List[Tuple[Optional[Dict], Optional[str]]]:
+        """
+        Generiert die Rezepte je Wochenplan
+        
+        Wochen mit Rezept-Checkpoint werden übersprungen, neu generierte
+        Rezepte sofort gespeichert. Gerichte, für die die Bibliothek bereits
+        ein gut bewertetes Rezept hat, werden nicht an die API geschickt;
+        Wochen ohne fehlende Rezepte kommen ganz ohne Anfrage aus.
+        """
+        
+        week_nums = [plan["speiseplan"]["wochen"][0].get("woche", idx + 1) for idx, plan in enumerate(week_plans)]
+        results: Dict[int, Tuple[Optional[Dict], Optional[str]]] = {}
+        for idx, week_num in enumerate(week_nums):
+            cached = self._load_checkpoint("rezepte", f"w{week_num}")
+            if cached is not None:
+                results[idx] = (cached, None)
+        
+        open_idx = [idx for idx in range(len(week_plans)) if idx not in results]
+        resolved = {
+            idx: self._resolve_library_recipes(week_plans[idx], config)
+            for idx in open_idx
+        }
+        self._report_library_hits(list(resolved.values()), progress_callback)
+        
+        def checkpointed(idx: int, result: Tuple[Optional[Dict], Optional[str]]):
+            result = self._merge_library_recipes(resolved[idx], result)
+            if not result[1]:
+                self._save_checkpoint("rezepte", f"w{week_nums[idx]}", result[0])
+            return result
+        
+        for idx in open_idx:
+            if resolved[idx].plan is None:
+                results[idx] = checkpointed(idx, ({"rezepte": []}, None))
+        api_idx = [idx for idx in open_idx if idx not in results]
+        
+        if config.execution_mode == ExecutionMode.BATCH:
+            batch_results = self._generate_recipes_batch([resolved[idx].plan for idx in api_idx], progress_callback)
+            for idx, result in zip(api_idx, batch_results):
+                results[idx] = checkpointed(idx, result)
+        elif config.execution_mode in (ExecutionMode.PARALLEL, ExecutionMode.ASYNC):
+            results.update(self._run_parallel(
+                [(idx, lambda idx=idx: checkpointed(idx, self._generate_recipes(resolved[idx].plan)))
+                 for idx in api_idx],
+                self._max_parallel(config)
+            ))
+        else:
+            for idx in api_idx:
+                results[idx] = checkpointed(idx, self._generate_recipes(resolved[idx].plan))
+        
+        return [results[idx] for idx in range(len(week_plans))]
+    
+    def _resolve_library_recipes(self, speiseplan: Dict, config: PlanConfig) -> RecipeResolution:
+        """
+        Sucht die Gerichte eines Plans (Hauptgericht plus Beilagen) zuerst in
+        der Rezept-Bibliothek
+        
+        Treffer werden auf Woche, Tag und Menülinie des Plans gesetzt; der
+        zurückgegebene Plan enthält nur noch die Menüs ohne Treffer.
+        """
+        
+        resolution = RecipeResolution()
+        slots = []
+        for woche in speiseplan.get("speiseplan", {}).get("wochen", []):
+            for tag in woche.get("tage", []):
+                for menu in tag.get("menues", []):
+                    mittag = menu.get("mittagessen", {})
+                    if not mittag.get("hauptgericht"):
+                        continue
+                    key = erstelle_gericht_schluessel(mittag["hauptgericht"], mittag.get("beilagen"))
+                    slot = (str(woche.get("woche", 1)), tag.get("tag", ""), menu.get("menuName", ""))
+                    resolution.keys[slot] = key
+                    slots.append((woche, tag, menu, key))
+        resolution.total = len(slots)
+        
+        found = {}
+        if self.bibliothek is not None and config.rezepte_aus_bibliothek and slots:
+            try:
+                found = self.bibliothek.hole_bibliotheks_rezepte(list(resolution.keys.values()), BIBLIOTHEK_MIN_BEWERTUNG)
+            except Exception as e:
+                logger.warning(f"Rezept-Bibliothek nicht lesbar, generiere alle Rezepte: {e}")
+        
+        missing_weeks = {}
+        for woche, tag, menu, key in slots:
+            if key in found:
+                recipe = copy.deepcopy(found[key])
+                recipe.update(woche=woche.get("woche", 1), tag=tag.get("tag", ""), menu=menu.get("menuName", ""))
+                resolution.hits.append(recipe)
+                continue
+            missing_week = missing_weeks.setdefault(id(woche), {"woche": woche.get("woche", 1), "tage": {}})
+            missing_day = missing_week["tage"].setdefault(id(tag), {"tag": tag.get("tag", ""), "menues": []})
+            missing_day["menues"].append(menu)
+        
+        if missing_weeks:
+            resolution.plan = {
+                "speiseplan": {
+                    "wochen": [
+                        {"woche": week["woche"], "tage": list(week["tage"].values())}
+                        for week in missing_weeks.values()
+                    ]
+                }
+            }
+        return resolution
+    
+    def _merge_library_recipes(
+        self,
+        resolution: RecipeResolution,
+        result: Tuple[Optional[Dict], Optional[str]]
+    ) -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        Ergänzt generierte Rezepte um die Bibliotheks-Treffer
+        
+        Generierte Rezepte erhalten den Gericht-Schlüssel ihres Menüs, damit
+        sie beim nächsten Plan gefunden werden; übernommene Rezepte werden in
+        der Bibliothek als verwendet markiert.
+        """
+        
+        recipes, error = result
+        if error:
+            return None, error
+        
+        generated = list((recipes or {}).get("rezepte", []))
+        for recipe in generated:
+            slot = (str(recipe.get("woche", "")), recipe.get("tag", ""), recipe.get("menu", ""))
+            if slot in resolution.keys:
+                recipe.setdefault("gericht_schluessel", resolution.keys[slot])
+        
+        for recipe in resolution.hits:
+            try:
+                self.bibliothek.markiere_als_verwendet(
+                    recipe["bibliothek_id"],
+                    f"Woche {recipe['woche']}, {recipe['tag']}, {recipe['menu']}"
+                )
+            except Exception as e:
+                logger.warning(f"Verwendung von Rezept {recipe['bibliothek_id']} nicht gespeichert: {e}")
+        
+        return {**(recipes or {}), "rezepte": resolution.hits + generated}, None
+    
+    @staticmethod
+    def _report_library_hits(resolutions: List[RecipeResolution], progress_callback=None) -> None:
+        """Meldet die Trefferquote der Bibliothek"""
+        
+        total = sum(resolution.total for resolution in resolutions)
+        hits = sum(len(resolution.hits) for resolution in resolutions)
+        if not total:
+            return
+        message = f"Rezept-Bibliothek: {hits} von {total} Rezepten übernommen ({hits / total:.0%}), {total - hits} werden generiert"
+        logger.info(message)
+        if progress_callback and hits:
+            progress_callback(message)
+    
     def _generate_week(
         self,
         config: PlanConfig,
@@ -811,38 +1408,537 @@ class SpeiseplanGenerator:
     ) -> Tuple[Optional[Dict], Optional[str]]:
         """Generiert eine einzelne Woche"""
         
-        week_days = []
+        weeks, error = self._generate_weeks(config, [week_num])
+        if error:
+            return None, error
         
-        for day in WOCHENTAGE:
-            # Generiere Tag
-            prompt = self.prompt_generator.create_day_prompt(day, config)
-            result, error, _ = self.api_client.call_api(prompt, MAX_TOKENS_TAG)
-            
-            if error:
-                logger.error(f"Fehler bei Tag {day}: {error}")
-                # Retry einmal
-                result, error, _ = self.api_client.call_api(prompt, MAX_TOKENS_TAG)
-                if error:
-                    return None, f"Fehler bei {day}: {error}"
-            
-            # Validiere Tag
-            if result and "tag" in result and "menues" in result:
-                errors = self.validator.validate_day_structure(result, config.menulinien)
-                if errors:
-                    logger.warning(f"Validierungsfehler für {day}: {errors}")
-                    # Versuche zu korrigieren
-                    result = self._fix_day_structure(result, config)
-                
-                week_days.append(result)
+        return weeks[0], None
+    
+    def _generate_weeks(
+        self,
+        config: PlanConfig,
+        week_nums: List[int],
+        progress_callback=None
+    ) -> Tuple[Optional[List[Dict]], Optional[str]]:
+        """
+        Generiert alle Tage der angegebenen Wochen
+        
+        Im Modus PARALLEL werden sämtliche Tages-Prompts gleichzeitig über
+        einen begrenzten Worker-Pool gesendet, im Modus ASYNC über eine
+        Event-Loop mit Semaphore, im Modus BATCH als ein Message Batch. Die Ergebnisse werden wieder in
+        Wochentags-Reihenfolge gebracht, Fehler pro Tag gesammelt.
+        
+        Returns:
+            Tuple von (wochen_liste, error_message)
+        """
+        
+        tasks = [(week_num, day) for week_num in week_nums for day in WOCHENTAGE]
+        self.day_errors = {}
+        
+        # Bereits fertige Wochen/Tage aus den Checkpoints übernehmen
+        results = {}
+        for week_num in week_nums:
+            week = self._load_checkpoint("woche", f"w{week_num}")
+            if week and len(week.get("tage", [])) == len(WOCHENTAGE):
+                for day, day_data in zip(WOCHENTAGE, week["tage"]):
+                    results[(week_num, day)] = (day_data, None)
+        for key in tasks:
+            if key not in results:
+                day_data = self._load_checkpoint("tag", f"w{key[0]}-{key[1]}")
+                if day_data is not None:
+                    results[key] = (day_data, None)
+        
+        open_tasks = [key for key in tasks if key not in results]
+        if results and progress_callback:
+            progress_callback(f"{len(results)} von {len(tasks)} Tagen aus Checkpoint übernommen")
+        
+        def on_done(key, done, total):
+            if progress_callback:
+                progress_callback(f"Tag {done}/{total} fertig: Woche {key[0]}, {key[1]}")
+        
+        if config.execution_mode == ExecutionMode.ASYNC:
+            results.update(asyncio.run(self._generate_days_async(config, open_tasks, on_done)))
+        elif config.execution_mode == ExecutionMode.BATCH:
+            results.update(self._generate_days_batch(config, open_tasks, progress_callback))
+        elif config.execution_mode == ExecutionMode.PARALLEL:
+            results.update(self._run_parallel(
+                [(key, lambda key=key: self._checkpoint_day(key, self._generate_day(config, key[1])))
+                 for key in open_tasks],
+                self._max_parallel(config),
+                on_done
+            ))
+        else:
+            for key in open_tasks:
+                results[key] = self._checkpoint_day(key, self._generate_day(config, key[1]))
+                if results[key][1]:
+                    break
+        
+        # Vollständige Wochen zusätzlich als Ganzes sichern
+        for week_num in week_nums:
+            keys = [(week_num, day) for day in WOCHENTAGE]
+            if all(key in results and not results[key][1] for key in keys):
+                self._save_checkpoint("woche", f"w{week_num}", {
+                    "woche": week_num,
+                    "tage": [results[key][0] for key in keys]
+                })
+        
+        # Fehler pro Tag sammeln (in Wochentags-Reihenfolge)
+        for key in tasks:
+            if key in results and results[key][1]:
+                self.day_errors[key] = results[key][1]
+        
+        if self.day_errors:
+            if self.checkpoints:
+                saved = sum(1 for _, error in results.values() if not error)
+                logger.info(f"{saved} Tage sind gesichert, ein Neustart setzt fort")
+            if len(week_nums) > 1:
+                messages = [f"Woche {w}: {msg}" for (w, _), msg in self.day_errors.items()]
             else:
-                return None, f"Ungültige Struktur für {day}"
+                messages = list(self.day_errors.values())
+            return None, "; ".join(messages)
+        
+        weeks = [
+            {
+                "woche": week_num,
+                "tage": [results[(week_num, day)][0] for day in WOCHENTAGE]
+            }
+            for week_num in week_nums
+        ]
+        
+        return weeks, None
+    
+    def _generate_day(
+        self,
+        config: PlanConfig,
+        day: str
+    ) -> Tuple[Optional[Dict], Optional[str]]:
+        """Generiert einen einzelnen Tag"""
+        
+        prompt = self.prompt_generator.create_day_prompt(day, config)
+        tool = erstelle_tool(TOOL_TAG, tag_schema(config.menulinien))
+        result, error, usage = self.api_client.call_api(prompt, MAX_TOKENS_TAG, tool=tool)
+        
+        if error:
+            logger.error(f"Fehler bei Tag {day}: {error}")
+            # Retry einmal
+            hole_reparatur_statistik().zaehle(EREIGNIS_WIEDERHOLUNG)
+            result, error, usage = self.api_client.call_api(prompt, MAX_TOKENS_TAG, tool=tool)
+        
+        truncated = bool(usage and usage.get("abgeschnitten"))
+        result, error = self._process_day_result(result, error, day, config, truncated)
+        if truncated and not error:
+            result = self._complete_day(config, day, result)
+        return result, error
+    
+    async def _generate_day_async(
+        self,
+        client: AsyncAnthropicClient,
+        config: PlanConfig,
+        day: str
+    ) -> Tuple[Optional[Dict], Optional[str]]:
+        """Generiert einen einzelnen Tag über den async Client"""
+        
+        prompt = self.prompt_generator.create_day_prompt(day, config)
+        tool = erstelle_tool(TOOL_TAG, tag_schema(config.menulinien))
+        result, error, usage = await client.call_api(prompt, MAX_TOKENS_TAG, tool=tool)
+        
+        if error:
+            logger.error(f"Fehler bei Tag {day}: {error}")
+            # Retry einmal
+            hole_reparatur_statistik().zaehle(EREIGNIS_WIEDERHOLUNG)
+            result, error, usage = await client.call_api(prompt, MAX_TOKENS_TAG, tool=tool)
+        
+        truncated = bool(usage and usage.get("abgeschnitten"))
+        result, error = self._process_day_result(result, error, day, config, truncated)
+        if truncated and not error:
+            for _ in range(MAX_NACHFORDERUNGEN):
+                request = self._day_follow_up(config, day, result)
+                if request is None:
+                    break
+                missing, follow_up_prompt, follow_up_tool = request
+                answer = await client.call_api(follow_up_prompt, MAX_TOKENS_TAG, tool=follow_up_tool)
+                if not self._merge_follow_up(result, answer, missing, config):
+                    break
+            result = self._finish_day(result, config)
+        return result, error
+    
+    async def _generate_days_async(
+        self,
+        config: PlanConfig,
+        tasks: List[Tuple[int, str]],
+        on_done: Optional[Callable[[Any, int, int], None]] = None
+    ) -> Dict[Tuple[int, str], Tuple[Optional[Dict], Optional[str]]]:
+        """Generiert alle Tage gleichzeitig aus einer Event-Loop"""
+        
+        client = self.async_client or AsyncAnthropicClient(
+            self.api_client.config,
+            cache=self.api_client.cache,
+            cost_tracker=self.api_client.cost_tracker,
+            rate_limiter=self.api_client.rate_limiter
+        )
+        semaphore = asyncio.Semaphore(self._max_parallel(config))
+        results = {}
+        
+        async def run(key):
+            async with semaphore:
+                try:
+                    return key, self._checkpoint_day(key, await self._generate_day_async(client, config, key[1]))
+                except Exception as e:
+                    logger.error(f"Fehler in async Job {key}: {e}")
+                    return key, (None, f"Unerwarteter Fehler: {str(e)}")
+        
+        async with client:
+            for next_done in asyncio.as_completed([run(key) for key in tasks]):
+                key, result = await next_done
+                results[key] = result
+                if on_done:
+                    on_done(key, len(results), len(tasks))
+        
+        return results
+    
+    def _get_batch_client(self) -> MessageBatchClient:
+        """Gibt den Batch-Client zurück (wird bei Bedarf aus der APIConfig erstellt)"""
+        if self.batch_client is None:
+            self.batch_client = MessageBatchClient(
+                self.api_client.config.api_key,
+                base_url=self.api_client.config.batch_url
+            )
+        return self.batch_client
+    
+    @staticmethod
+    def _batch_status_callback(progress_callback, label: str) -> Optional[Callable[[Dict], None]]:
+        """Erstellt einen Callback, der den Batch-Fortschritt meldet"""
+        if not progress_callback:
+            return None
+        
+        def on_status(batch: Dict) -> None:
+            counts = batch.get("request_counts", {})
+            done = sum(counts.get(k, 0) for k in ("succeeded", "errored", "canceled", "expired"))
+            total = done + counts.get("processing", 0)
+            progress_callback(f"{label}: {done}/{total} fertig ({batch.get('processing_status', '?')})")
+        
+        return on_status
+    
+    def _generate_days_batch(
+        self,
+        config: PlanConfig,
+        tasks: List[Tuple[int, str]],
+        progress_callback=None
+    ) -> Dict[Tuple[int, str], Tuple[Optional[Dict], Optional[str]]]:
+        """Generiert alle Tage über einen Message Batch (custom_id z.B. 'w1-Montag')"""
+        
+        custom_ids = {f"w{week_num}-{day}": (week_num, day) for week_num, day in tasks}
+        prompts = {
+            custom_id: (self.prompt_generator.create_day_prompt(day, config), MAX_TOKENS_TAG)
+            for custom_id, (_, day) in custom_ids.items()
+        }
+        answers = self.api_client.call_batch(
+            prompts,
+            self._get_batch_client(),
+            self._batch_status_callback(progress_callback, "Tages-Batch"),
+            tool=erstelle_tool(TOOL_TAG, tag_schema(config.menulinien))
+        )
+        
+        results = {}
+        for custom_id, key in custom_ids.items():
+            result, error, usage = answers[custom_id]
+            truncated = bool(usage and usage.get("abgeschnitten"))
+            result, error = self._process_day_result(result, error, key[1], config, truncated)
+            if truncated and not error:
+                # Fehlende Menülinien direkt (nicht per Batch) nachfordern
+                result = self._complete_day(config, key[1], result)
+            results[key] = self._checkpoint_day(key, (result, error))
+        return results
+    
+    def _generate_recipes_batch(
+        self,
+        plans: List[Dict],
+        progress_callback=None
+    ) -> List[Tuple[Optional[Dict], Optional[str]]]:
+        """Generiert die Rezepte mehrerer (Wochen-)Pläne über einen Message Batch"""
+        
+        prompts = {
+            f"rezepte-{idx}": (self.prompt_generator.create_recipe_prompt(plan), MAX_TOKENS_REZEPTE)
+            for idx, plan in enumerate(plans)
+        }
+        answers = self.api_client.call_batch(
+            prompts,
+            self._get_batch_client(),
+            self._batch_status_callback(progress_callback, "Rezept-Batch"),
+            tool=erstelle_tool(TOOL_REZEPTE, REZEPTE_SCHEMA)
+        )
+        
+        results = []
+        for idx, plan in enumerate(plans):
+            result, error, usage = answers[f"rezepte-{idx}"]
+            if not error and not (result and "rezepte" in result):
+                error = "Ungültige Rezeptstruktur"
+            if not error:
+                result = self._complete_recipes(plan, result, usage)
+            results.append((result if not error else None, error))
+        return results
+    
+    def _process_day_result(
+        self,
+        result: Optional[Dict],
+        error: Optional[str],
+        day: str,
+        config: PlanConfig,
+        truncated: bool = False
+    ) -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        Prüft und korrigiert das Ergebnis eines Tages
+        
+        Bei einer abgeschnittenen Antwort werden unvollständige Menüs
+        verworfen statt aufgefüllt; die fehlenden Linien fordert
+        _complete_day nach.
+        """
+        
+        if error:
+            return None, f"Fehler bei {day}: {error}"
+        
+        # Validiere Tag
+        if result and "tag" in result and "menues" in result and truncated and isinstance(result["menues"], list):
+            result["menues"] = [
+                menu for idx, menu in enumerate(result["menues"], 1)
+                if not self.validator._validate_menu_structure(menu, idx)
+            ]
+            return result, None
+        
+        if result and "tag" in result and "menues" in result:
+            errors = self.validator.validate_day_structure(result, config.menulinien)
+            if errors:
+                logger.warning(f"Validierungsfehler für {day}: {errors}")
+                hole_reparatur_statistik().zaehle(EREIGNIS_SCHEMA_VERSTOSS)
+                # Versuche zu korrigieren
+                result = self._fix_day_structure(result, config)
+            
+            return result, None
+        
+        return None, f"Ungültige Struktur für {day}"
+    
+    def _complete_day(self, config: PlanConfig, day: str, result: Dict) -> Dict:
+        """Fordert die Menülinien nach, die in einer abgeschnittenen Tages-Antwort fehlen"""
+        
+        for _ in range(MAX_NACHFORDERUNGEN):
+            request = self._day_follow_up(config, day, result)
+            if request is None:
+                break
+            missing, prompt, tool = request
+            answer = self.api_client.call_api(prompt, MAX_TOKENS_TAG, tool=tool)
+            if not self._merge_follow_up(result, answer, missing, config):
+                break
+        return self._finish_day(result, config)
+    
+    def _day_follow_up(
+        self,
+        config: PlanConfig,
+        day: str,
+        result: Dict
+    ) -> Optional[Tuple[List[str], str, Dict[str, Any]]]:
+        """
+        Bereitet die Nachforderung fehlender Menülinien vor (sync und async)
+        
+        Returns:
+            (fehlende Linien, Prompt, Tool) oder None, wenn nichts fehlt
+        """
+        
+        missing = self._missing_menu_lines(result, config)
+        if not missing:
+            return None
+        logger.info(f"Tag {day} abgeschnitten, fordere {len(missing)} Menülinie(n) nach")
+        hole_reparatur_statistik().zaehle(EREIGNIS_NACHFORDERUNG)
+        return (
+            missing,
+            self.prompt_generator.create_day_prompt(day, config, missing),
+            erstelle_tool(TOOL_TAG, tag_schema(len(missing)))
+        )
+    
+    def _merge_follow_up(
+        self,
+        day: Dict,
+        answer: Tuple[Optional[Dict], Optional[str], Optional[Dict]],
+        missing: List[str],
+        config: PlanConfig
+    ) -> bool:
+        """
+        Übernimmt das Ergebnis einer Nachforderung in den Tag
+        
+        Returns:
+            bool: True, wenn eine weitere Nachforderung sinnvoll ist (Menüs
+            hinzugekommen, Antwort aber wieder abgeschnitten)
+        """
+        
+        extra, error, usage = answer
+        if error or not self._merge_menus(day, extra, missing, config):
+            return False
+        return bool(usage and usage.get("abgeschnitten"))
+    
+    @staticmethod
+    def _missing_menu_lines(day: Dict, config: PlanConfig) -> List[str]:
+        """Menülinien, für die ein Tag noch kein vollständiges Menü hat"""
+        
+        menus = day.get("menues", [])
+        need = config.menulinien - len(menus)
+        if need <= 0:
+            return []
+        present = {menu.get("menuName") for menu in menus}
+        missing = [name for name in config.menu_namen if name not in present]
+        # Umbenannte Linien: die Menüs kommen in Reihenfolge, es fehlen die letzten
+        return missing if len(missing) == need else config.menu_namen[-need:]
+    
+    def _merge_menus(self, day: Dict, extra: Optional[Dict], missing: List[str], config: PlanConfig) -> bool:
+        """
+        Übernimmt nachgeforderte Menüs (nur vollständige) in den Tag
+        
+        Returns:
+            bool: True, wenn mindestens ein Menü hinzugekommen ist
+        """
+        
+        menus = [
+            menu for idx, menu in enumerate((extra or {}).get("menues", []), 1)
+            if not self.validator._validate_menu_structure(menu, idx)
+        ][:len(missing)]
+        for name, menu in zip(missing, menus):
+            if menu.get("menuName") not in missing:
+                menu["menuName"] = name
+        day["menues"].extend(menus)
+        order = {name: idx for idx, name in enumerate(config.menu_namen)}
+        day["menues"].sort(key=lambda menu: order.get(menu.get("menuName"), len(order)))
+        return bool(menus)
+    
+    def _finish_day(self, day: Dict, config: PlanConfig) -> Dict:
+        """Füllt nach allen Nachforderungen noch fehlende Linien wie bisher auf"""
+        
+        if self.validator.validate_day_structure(day, config.menulinien):
+            return self._fix_day_structure(day, config)
+        return day
+    
+    def _complete_recipes(
+        self,
+        speiseplan: Dict,
+        result: Dict,
+        usage: Optional[Dict]
+    ) -> Dict:
+        """
+        Fordert fehlende und unvollständige Rezepte gezielt nach (statt den
+        ganzen Prompt zu wiederholen)
         
-        week_data = {
-            "woche": week_num,
-            "tage": week_days
+        Fehlend sind Rezepte nach einer abgeschnittenen Antwort, unvollständig
+        solche, die das Rezept-Schema verletzen (z.B. ohne Zutaten). Ein
+        unvollständiges Rezept bleibt erhalten, bis ein gültiger Ersatz kommt.
+        """
+        
+        recipes = list(result.get("rezepte", []))
+        invalid_count = sum(1 for r in recipes if self.validator.validate_recipe(r))
+        if invalid_count:
+            hole_reparatur_statistik().zaehle(EREIGNIS_SCHEMA_VERSTOSS, invalid_count)
+        for _ in range(MAX_NACHFORDERUNGEN):
+            invalid = {id(r) for r in recipes if self.validator.validate_recipe(r)}
+            if not invalid and not (usage and (usage.get("abgeschnitten") or usage.get("stream_abgebrochen"))):
+                break
+            missing = self._missing_dishes(speiseplan, [r for r in recipes if id(r) not in invalid])
+            if not missing:
+                break
+            logger.info(f"{len(missing)} Rezepte fehlen oder sind unvollständig, fordere nach")
+            hole_reparatur_statistik().zaehle(EREIGNIS_NACHFORDERUNG)
+            extra, error, usage = self.api_client.call_api_stream(
+                self.prompt_generator.create_recipe_prompt(self._plan_from_dishes(missing)),
+                MAX_TOKENS_REZEPTE,
+                tool=erstelle_tool(TOOL_REZEPTE, REZEPTE_SCHEMA)
+            )
+            if error or not extra or not extra.get("rezepte"):
+                logger.warning(f"Nachforderung fehlender Rezepte fehlgeschlagen: {error or 'keine Rezepte'}")
+                break
+            # Unvollständige Rezepte weichen ihrem Ersatz (gleiches Woche/Tag/Menü oder gleicher Name)
+            slots = {self._recipe_slot(r) for r in extra["rezepte"]}
+            names = {normalisiere_name(r.get("name", "")) for r in extra["rezepte"]}
+            recipes = [
+                r for r in recipes
+                if id(r) not in invalid
+                or (self._recipe_slot(r) not in slots and normalisiere_name(r.get("name", "")) not in names)
+            ] + extra["rezepte"]
+        
+        for recipe in recipes:
+            errors = self.validator.validate_recipe(recipe)
+            if errors:
+                logger.warning(f"Rezept '{recipe.get('name', '?')}' unvollständig: {errors}")
+        result["rezepte"] = recipes
+        return result
+    
+    @staticmethod
+    def _missing_dishes(speiseplan: Dict, recipes: List[Dict]) -> List[Dict]:
+        """Angefragte Gerichte ohne Rezept (Zuordnung über Woche/Tag/Menü, sonst Name)"""
+        
+        slots = {SpeiseplanGenerator._recipe_slot(r) for r in recipes}
+        names = {normalisiere_name(r.get("name", "")) for r in recipes}
+        return [
+            dish for dish in PromptGenerator.collect_dishes(speiseplan)
+            if (str(dish["woche"]), dish["tag"], dish["menu"]) not in slots
+            and normalisiere_name(dish["gericht"]) not in names
+        ]
+    
+    @staticmethod
+    def _recipe_slot(recipe: Dict) -> Tuple[str, str, str]:
+        """(Woche, Tag, Menü) eines Rezepts für die Zuordnung zum Speiseplan"""
+        return str(recipe.get("woche", "")), recipe.get("tag", ""), recipe.get("menu", "")
+    
+    @staticmethod
+    def _plan_from_dishes(dishes: List[Dict]) -> Dict:
+        """Rumpf-Speiseplan mit genau diesen Gerichten (für create_recipe_prompt)"""
+        
+        weeks: Dict[Any, Dict[str, List[Dict]]] = {}
+        for dish in dishes:
+            days = weeks.setdefault(dish["woche"], {})
+            days.setdefault(dish["tag"], []).append({
+                "menuName": dish["menu"],
+                "mittagessen": {"hauptgericht": dish["gericht"]}
+            })
+        return {
+            "speiseplan": {
+                "wochen": [
+                    {"woche": week, "tage": [{"tag": day, "menues": menus} for day, menus in days.items()]}
+                    for week, days in weeks.items()
+                ]
+            }
         }
+    
+    def _max_parallel(self, config: PlanConfig) -> int:
+        """Ermittelt das Parallelitäts-Limit (PlanConfig vor APIConfig)"""
+        return config.max_parallel or self.api_client.config.max_parallel
+    
+    def _run_parallel(
+        self,
+        jobs: List[Tuple[Any, Callable[[], Tuple[Any, Optional[str]]]]],
+        max_workers: int,
+        on_done: Optional[Callable[[Any, int, int], None]] = None
+    ) -> Dict[Any, Tuple[Any, Optional[str]]]:
+        """
+        Führt Jobs in einem begrenzten Thread-Pool aus
+        
+        Jeder Job liefert ein Tuple (ergebnis, fehler). Die Ergebnisse werden
+        nach Job-Schlüssel zurückgegeben, unabhängig von der Fertigstellungs-
+        Reihenfolge. on_done wird im aufrufenden Thread ausgeführt.
+        """
+        
+        results = {}
+        if not jobs:
+            return results
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs))) as pool:
+            futures = {pool.submit(func): key for key, func in jobs}
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    results[key] = future.result()
+                except Exception as e:
+                    logger.error(f"Fehler in parallelem Job {key}: {e}")
+                    results[key] = (None, f"Unerwarteter Fehler: {str(e)}")
+                
+                if on_done:
+                    on_done(key, len(results), len(jobs))
         
-        return week_data, None
+        return results
     
     def _fix_day_structure(self, day: Dict, config: PlanConfig) -> Dict:
         """Versucht, Strukturfehler in Tagesplan zu beheben"""
@@ -850,6 +1946,8 @@ class SpeiseplanGenerator:
         # Stelle sicher, dass richtige Anzahl Menüs vorhanden
         if "menues" in day:
             menus = day["menues"]
+            if menus and len(menus) != config.menulinien:
+                hole_reparatur_statistik().zaehle(EREIGNIS_TAG_AUFGEFUELLT)
             
             # Zu viele Menüs: Kürzen
             if len(menus) > config.menulinien:
@@ -874,14 +1972,18 @@ class SpeiseplanGenerator:
         """Generiert Rezepte für Speiseplan"""
         
         prompt = self.prompt_generator.create_recipe_prompt(speiseplan)
-        result, error, _ = self.api_client.call_api(prompt, MAX_TOKENS_REZEPTE)
+        # Gestreamt: bei Timeout bleiben die bereits vollständigen Rezepte erhalten,
+        # die fehlenden werden gezielt nachgefordert
+        result, error, usage = self.api_client.call_api_stream(
+            prompt, MAX_TOKENS_REZEPTE, tool=erstelle_tool(TOOL_REZEPTE, REZEPTE_SCHEMA)
+        )
         
         if error:
             logger.error(f"Fehler bei Rezeptgenerierung: {error}")
             return None, error
         
         if result and "rezepte" in result:
-            return result, None
+            return self._complete_recipes(speiseplan, result, usage), None
         
         return None, "Ungültige Rezeptstruktur"
     
@@ -890,9 +1992,15 @@ class SpeiseplanGenerator:
         
         try:
             prompt = self.prompt_generator.create_validation_prompt(speiseplan)
-            result, error, _ = self.api_client.call_api(prompt, 8000)
+            result, error, _ = self.api_client.call_api(
+                prompt, 8000, tool=erstelle_tool(TOOL_PRUEFUNG, PLAN_PRUEFUNG_SCHEMA)
+            )
             
             if not error and result:
+                errors = pruefe_plan_pruefung(result)
+                if errors:
+                    logger.warning(f"Prüfung unvollständig: {[str(f) for f in errors]}")
+                    hole_reparatur_statistik().zaehle(EREIGNIS_SCHEMA_VERSTOSS)
                 return result.get("pruefung")
         except Exception as e:
             logger.error(f"Fehler bei Validierung: {e}")
@@ -920,7 +2028,7 @@ class SpeiseplanGenerator:
         }
         
         # Generiere Rezepte
-        recipes, recipe_error = self._generate_recipes(complete_plan)
+        recipes, recipe_error = self._generate_week_recipes(config, [complete_plan], progress_callback)[0]
         
         # Qualitätsprüfung
         validation = self._validate_plan(complete_plan)
@@ -931,7 +2039,6 @@ class SpeiseplanGenerator:
 
 from prompts import get_speiseplan_prompt, get_rezepte_prompt, get_pruefung_prompt
 from pdf_generator import erstelle_speiseplan_pdf, erstelle_rezept_pdf, erstelle_alle_rezepte_pdf
-from rezept_datenbank import RezeptDatenbank
 from cost_tracker import (
     CostTracker,
     zeige_kosten_anzeige,
@@ -1029,11 +2136,47 @@ class StreamlitUI:
                 st.checkbox("Automatische Qualitätsprüfung", value=True, key="auto_validation")
                 st.checkbox("Rezepte in Datenbank speichern", value=True, key="save_to_db")
                 st.checkbox("HACCP-Hinweise generieren", value=True, key="haccp_mode")
+                checkpoint = st.checkbox(
+                    "Abgebrochene Läufe fortsetzen",
+                    value=True,
+                    key="checkpoint",
+                    help="Speichert fertige Tage und Rezepte; ein erneuter Start mit gleicher Konfiguration setzt dort fort"
+                )
+                rezepte_aus_bibliothek = st.checkbox(
+                    "Rezepte aus der Bibliothek übernehmen",
+                    value=True,
+                    key="rezepte_aus_bibliothek",
+                    help=f"Gerichte (Hauptgericht und Beilagen), für die schon ein Rezept mit mindestens {BIBLIOTHEK_MIN_BEWERTUNG} Sternen gespeichert ist, werden nicht neu generiert"
+                )
+                modi = [ExecutionMode.PARALLEL, ExecutionMode.SEQUENTIELL]
+                if httpx is not None:
+                    modi.append(ExecutionMode.ASYNC)
+                modi.append(ExecutionMode.BATCH)
+                execution_mode = st.selectbox(
+                    "Ausführungsmodus",
+                    options=modi,
+                    format_func=lambda modus: modus.value.capitalize(),
+                    key="execution_mode",
+                    help=(
+                        "Parallel/Async senden alle Tages-Anfragen gleichzeitig (deutlich schneller). "
+                        "Batch sendet alle Anfragen als Message Batch: halber Preis, "
+                        "Ergebnis kann aber bis zu 24 Stunden dauern"
+                    )
+                )
+                max_parallel = st.slider(
+                    "Max. gleichzeitige Anfragen",
+                    min_value=1,
+                    max_value=10,
+                    value=MAX_PARALLELE_ANFRAGEN,
+                    key="max_parallel",
+                    disabled=execution_mode in (ExecutionMode.SEQUENTIELL, ExecutionMode.BATCH)
+                )
             
             # Kosten-Tracking
             if KOSTEN_TRACKING_AKTIVIERT():
                 st.divider()
-                zeige_kosten_in_sidebar()
+                zeige_kosten_in_sidebar(st.session_state["cost_tracker"])
+            self.show_repair_stats()
             
             # Start-Button
             st.divider()
@@ -1055,7 +2198,15 @@ class StreamlitUI:
                 )
             
             try:
-                config = PlanConfig(wochen, menulinien, menu_namen) if start else None
+                config = PlanConfig(
+                    wochen,
+                    menulinien,
+                    menu_namen,
+                    execution_mode=execution_mode,
+                    max_parallel=max_parallel,
+                    checkpoint=checkpoint,
+                    rezepte_aus_bibliothek=rezepte_aus_bibliothek
+                ) if start else None
                 return api_key, config, start
             except ValueError as e:
                 st.error(str(e))
@@ -1065,6 +2216,102 @@ class StreamlitUI:
         """Zeigt Fortschrittsanzeige"""
         return st.spinner(message)
     
+    def show_job_status(self, runner: JobRunner, job_id: Optional[str]) -> bool:
+        """
+        Zeigt den Zustand des Generierungs-Jobs dieser Sitzung
+        
+        Ein laufender Job wird über show_job_progress() angezeigt, ein
+        beendeter einmalig in den Session State übernommen.
+        
+        Returns:
+            True, solange der Job noch wartet oder läuft
+        """
+        job = runner.hole(job_id) if job_id else None
+        if job is None:
+            return False
+        
+        if job.aktiv:
+            self.show_job_progress(runner, job.id)
+            return True
+        
+        st.session_state.pop("job_id", None)
+        if job.status == JobStatus.FAILED:
+            st.error(f"❌ Fehler: {job.fehler}")
+            return False
+        
+        st.session_state["speiseplan"] = job.ergebnis["speiseplan"]
+        st.session_state["rezepte"] = job.ergebnis["rezepte"]
+        st.session_state["pruefung"] = job.ergebnis["pruefung"]
+        
+        if job.ergebnis.get("db_fehler"):
+            st.warning(f"⚠️ Datenbank-Speicherung fehlgeschlagen: {job.ergebnis['db_fehler']}")
+        elif job.ergebnis["rezepte"] and job.ergebnis.get("db_gespeichert"):
+            st.success("✅ Rezepte in Datenbank gespeichert")
+        
+        st.success(f"✅ Speiseplan erfolgreich generiert! ({job.dauer:.0f}s)")
+        st.balloons()
+        
+        if KOSTEN_TRACKING_AKTIVIERT():
+            zeige_kosten_anzeige(st.session_state["cost_tracker"])
+        return False
+    
+    @st.fragment(run_every=JOB_POLL_SEKUNDEN)
+    def show_job_progress(self, runner: JobRunner, job_id: str):
+        """
+        Zeigt den Fortschritt eines laufenden Jobs
+        
+        Als Fragment baut Streamlit nur diesen Bereich alle JOB_POLL_SEKUNDEN
+        neu auf; sobald der Job beendet ist, läuft die ganze App einmal neu
+        und show_job_status() übernimmt das Ergebnis.
+        """
+        job = runner.hole(job_id)
+        if job is None or not job.aktiv:
+            st.rerun(scope="app")
+        
+        position = runner.position(job.id)
+        if position:
+            st.info(f"⏳ {job.titel}: wartet in der Warteschlange (Position {position})")
+        else:
+            laufzeit = f" – {job.dauer:.0f}s" if job.dauer else ""
+            st.info(f"🔄 {job.titel}: {job.letzte_meldung or 'läuft...'}{laufzeit}")
+        if job.fortschritt:
+            with st.expander("Fortschritt"):
+                for zeitpunkt, meldung in job.fortschritt[-15:]:
+                    st.text(f"{datetime.fromtimestamp(zeitpunkt):%H:%M:%S}  {meldung}")
+        st.caption("Die Generierung läuft im Hintergrund weiter - Sie können die Seite weiter bedienen.")
+    
+    def show_job_list(self, jobs: List[Job]):
+        """Zeigt die Jobs dieser Sitzung in der Sidebar"""
+        if not jobs:
+            return
+        
+        symbole = {
+            JobStatus.QUEUED: "⏳",
+            JobStatus.RUNNING: "🔄",
+            JobStatus.DONE: "✅",
+            JobStatus.FAILED: "❌"
+        }
+        with st.sidebar.expander(f"🗂️ Hintergrund-Jobs ({len(jobs)})"):
+            for job in jobs[:10]:
+                st.write(
+                    f"{symbole[job.status]} {job.titel} – "
+                    f"{datetime.fromtimestamp(job.erstellt_am):%H:%M:%S}"
+                )
+    
+    def show_repair_stats(self):
+        """Zeigt Reparatur- und Wiederholungsquote sowie Laufzeiten (prozessweit)"""
+        stats = hole_reparatur_statistik().hole_statistiken()
+        if not stats["zaehler"]:
+            return
+        
+        with st.expander("🩹 Reparaturen & Laufzeiten"):
+            col1, col2 = st.columns(2)
+            col1.metric("Reparaturquote", f"{stats['reparaturquote']:.0%}")
+            col2.metric("Wiederholungsquote", f"{stats['wiederholungsquote']:.0%}")
+            if "plan" in stats["dauern"]:
+                st.caption(f"Ø Gesamtlauf: {stats['dauern']['plan']['mittel_s']:.1f}s")
+            st.json(stats)
+    
     def show_speiseplan_tab(self, speiseplan: Dict, pruefung: Optional[Dict] = None):
         """Zeigt Speiseplan-Tab"""
         st.header("📋 Ihr Speiseplan")
@@ -1345,38 +2592,48 @@ class StreamlitUI:
         with col3:
             sortierung = st.selectbox(
                 "📊 Sortierung:",
-                ["Neueste", "Name A-Z", "Beste Bewertung", "Meistverwendet"]
+                list(BIBLIOTHEK_SORTIERUNGEN)
             )
         with col4:
             nur_favoriten = st.checkbox("⭐ Nur Favoriten", value=False)
         
-        # Rezepte laden und filtern
-        rezepte = self.db.suche_rezepte(suchbegriff=suche, tags=tags)
-        
-        if nur_favoriten:
-            rezepte = [r for r in rezepte if r.get("bewertung", 0) >= 4]
+        ohne_allergene = st.multiselect(
+            "🚫 Ohne Allergene:",
+            options=list(stats.get("allergene", {}).keys()),
+            help="Blendet Rezepte aus, die eines der gewählten Allergene enthalten"
+        )
         
-        # Sortierung anwenden
-        if sortierung == "Name A-Z":
-            rezepte = sorted(rezepte, key=lambda x: x["name"])
-        elif sortierung == "Neueste":
-            rezepte = sorted(rezepte, key=lambda x: x["erstellt_am"], reverse=True)
-        elif sortierung == "Beste Bewertung":
-            rezepte = sorted(rezepte, key=lambda x: x.get("bewertung", 0), reverse=True)
-        elif sortierung == "Meistverwendet":
-            rezepte = sorted(rezepte, key=lambda x: x.get("verwendet_count", 0), reverse=True)
+        # Seite laden: Filter und Sortierung laufen in SQL, geblättert wird
+        # per Keyset-Cursor (Stapel der Cursor für "Zurück")
+        filter_args = dict(
+            suchbegriff=suche,
+            tags=tags,
+            ohne_allergene=ohne_allergene,
+            min_bewertung=4 if nur_favoriten else 0
+        )
+        filter_schluessel = repr((filter_args, sortierung))
+        if st.session_state.get("bibliothek_filter") != filter_schluessel:
+            st.session_state.bibliothek_filter = filter_schluessel
+            st.session_state.bibliothek_cursor = [None]
+        cursor_stapel = st.session_state.bibliothek_cursor
+        
+        rezepte, naechste_seite = self.db.hole_rezept_seite(
+            sortierung=BIBLIOTHEK_SORTIERUNGEN[sortierung],
+            nach=cursor_stapel[-1],
+            **filter_args
+        )
         
         st.divider()
-        st.write(f"**{len(rezepte)}** Rezepte gefunden")
+        st.write(f"**{self.db.zaehle_rezepte(**filter_args)}** Rezepte gefunden")
         
         if not rezepte:
             st.info("Keine Rezepte in der Bibliothek vorhanden.")
             return
         
-        # Rezepte anzeigen
+        # Rezepte anzeigen (Details werden erst beim Aufklappen geladen)
         for rezept in rezepte:
             with st.expander(
-                f"{rezept['name']} {'⭐' * rezept.get('bewertung', 0)}"
+                f"{rezept['name']} {'⭐' * (rezept.get('bewertung') or 0)}"
             ):
                 col1, col2, col3 = st.columns([3, 1, 1])
                 
@@ -1392,16 +2649,23 @@ class StreamlitUI:
                         f"📅 Erstellt: {rezept['erstellt_am'][:10]} | "
                         f"🔄 {rezept.get('verwendet_count', 0)}x verwendet"
                     )
+                    st.caption(
+                        f"🥕 {rezept['anzahl_zutaten']} Zutaten | "
+                        f"👨‍🍳 {rezept['anzahl_schritte']} Schritte | "
+                        f"⚠️ {rezept['anzahl_allergene']} Allergene"
+                    )
+                    if rezept.get("aehnlich_zu"):
+                        st.caption(f"👯 Ähnlich zu: {rezept['aehnlich_zu']}")
                 
                 with col2:
                     # Bewertung
                     neue_bewertung = st.select_slider(
                         "Bewertung:",
                         options=[0, 1, 2, 3, 4, 5],
-                        value=rezept.get("bewertung", 0),
+                        value=rezept.get("bewertung") or 0,
                         key=f"rating_{rezept['id']}"
                     )
-                    if neue_bewertung != rezept.get("bewertung", 0):
+                    if neue_bewertung != (rezept.get("bewertung") or 0):
                         self.db.bewerte_rezept(rezept["id"], neue_bewertung)
                         st.rerun()
                 
@@ -1409,6 +2673,7 @@ class StreamlitUI:
                     # Aktionen
                     if st.button("📄 PDF", key=f"pdf_{rezept['id']}"):
                         try:
+                            details = self.db.hole_rezept(rezept["id"]) or {}
                             # Konvertiere für PDF-Export
                             export_rezept = {
                                 "name": rezept["name"],
@@ -1418,12 +2683,12 @@ class StreamlitUI:
                                     "garzeit": rezept.get("garzeit", ""),
                                     "gesamt": rezept.get("gesamtzeit", "")
                                 },
-                                "zutaten": rezept.get("zutaten", []),
-                                "zubereitung": rezept.get("zubereitung", []),
-                                "naehrwerte": rezept.get("naehrwerte", {}),
-                                "allergene": rezept.get("allergene", []),
-                                "tipps": rezept.get("tipps", ""),
-                                "variationen": rezept.get("variationen", "")
+                                "zutaten": details.get("zutaten", []),
+                                "zubereitung": details.get("zubereitung", []),
+                                "naehrwerte": details.get("naehrwerte", {}),
+                                "allergene": details.get("allergene", []),
+                                "tipps": details.get("tipps", ""),
+                                "variationen": details.get("variationen", "")
                             }
                             pdf = erstelle_rezept_pdf(export_rezept)
                             st.download_button(
@@ -1440,14 +2705,43 @@ class StreamlitUI:
                         self.db.loesche_rezept(rezept["id"])
                         st.success("Rezept gelöscht")
                         st.rerun()
+                
+                if st.toggle("📖 Zutaten & Zubereitung", key=f"details_{rezept['id']}"):
+                    details = self.db.hole_rezept(rezept["id"])
+                    if details:
+                        for zutat in details.get("zutaten", []):
+                            st.write(f"- **{zutat.get('menge', '')}** {zutat.get('name', '')}")
+                        for i, schritt in enumerate(details.get("zubereitung", []), 1):
+                            st.write(f"**Schritt {i}:** {schritt}")
+        
+        # Blättern
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            if len(cursor_stapel) > 1 and st.button("◀ Zurück", key="bibliothek_zurueck"):
+                cursor_stapel.pop()
+                st.rerun()
+        with col2:
+            st.caption(f"Seite {len(cursor_stapel)}")
+        with col3:
+            if naechste_seite and st.button("Weiter ▶", key="bibliothek_weiter"):
+                cursor_stapel.append(naechste_seite)
+                st.rerun()
 
 # ===================== HAUPTPROGRAMM =====================
 
+@st.cache_resource
+def hole_job_runner() -> JobRunner:
+    """Prozessweiter Job-Runner: überlebt Script-Reruns und wird von allen Sitzungen geteilt"""
+    return JobRunner()
+
+
 def main():
     """Hauptfunktion der Anwendung"""
     
     # Initialisiere UI
     ui = StreamlitUI()
+    if "cost_tracker" not in st.session_state:
+        st.session_state["cost_tracker"] = CostTracker()
     ui.show_header()
     
     # Hole Konfiguration aus Sidebar
@@ -1457,55 +2751,80 @@ def main():
         st.warning("⚠️ Bitte geben Sie Ihren Anthropic API-Key in der Sidebar ein.")
         return
     
-    # Generierung starten
+    runner = hole_job_runner()
+    if "session_id" not in st.session_state:
+        st.session_state["session_id"] = uuid.uuid4().hex
+    
+    # Generierung als Hintergrund-Job starten (überlebt Reruns durch Widget-Interaktion)
     if start and config:
-        try:
-            # Initialisiere API-Client und Generator
-            api_config = APIConfig(api_key=api_key)
-            api_client = AnthropicClient(api_config)
-            generator = SpeiseplanGenerator(api_client)
-            
-            # Kosten-Warnung bei großen Plänen
-            if KOSTEN_TRACKING_AKTIVIERT():
-                zeige_kosten_warnung_bei_grossen_plaenen(
-                    config.wochen,
-                    config.menulinien
+        running = runner.hole(st.session_state.get("job_id", ""))
+        if running and running.aktiv:
+            st.warning("⚠️ Es läuft bereits eine Generierung für diese Sitzung.")
+        else:
+            try:
+                # Initialisiere API-Client und Generator
+                api_config = APIConfig(
+                    api_key=api_key,
+                    max_parallel=config.max_parallel or MAX_PARALLELE_ANFRAGEN,
+                    batch_url=lese_batch_url(st.secrets)
                 )
-            
-            # Progress-Container
-            progress_container = st.container()
-            with progress_container:
-                with st.spinner("🔄 Generiere Speiseplan..."):
-                    # Generiere Plan
+                cost_tracker = st.session_state["cost_tracker"]
+                api_client = AnthropicClient(api_config, cost_tracker=cost_tracker)
+                generator = SpeiseplanGenerator(
+                    api_client, bibliothek=ui.db, checkpoint_scope=st.session_state["session_id"]
+                )
+                
+                # Kosten-Warnung bei großen Plänen
+                if KOSTEN_TRACKING_AKTIVIERT():
+                    zeige_kosten_warnung_bei_grossen_plaenen(
+                        config.wochen,
+                        config.menulinien
+                    )
+                
+                # Session State ist im Worker-Thread nicht verfügbar: Werte vorher lesen
+                save_to_db = st.session_state.get("save_to_db", True)
+                db = ui.db
+                
+                def run_generation(progress):
                     speiseplan, rezepte, pruefung, error = generator.generate_complete_plan(
                         config,
-                        progress_callback=lambda msg: st.info(msg)
+                        progress_callback=progress
                     )
-                    
                     if error:
-                        st.error(f"❌ Fehler: {error}")
-                        return
-                    
-                    # Speichere in Session State
-                    st.session_state["speiseplan"] = speiseplan
-                    st.session_state["rezepte"] = rezepte
-                    st.session_state["pruefung"] = pruefung
+                        raise RuntimeError(error)
                     
                     # Speichere Rezepte in Datenbank
-                    if rezepte and st.session_state.get("save_to_db", True):
+                    db_error = None
+                    if rezepte and save_to_db:
+                        progress("Speichere Rezepte in Datenbank")
                         try:
-                            ui.db.speichere_alle_rezepte(rezepte)
-                            st.success("✅ Rezepte in Datenbank gespeichert")
+                            db.speichere_alle_rezepte(rezepte)
                         except Exception as e:
-                            st.warning(f"⚠️ Datenbank-Speicherung fehlgeschlagen: {e}")
+                            db_error = str(e)
                     
-                    st.success("✅ Speiseplan erfolgreich generiert!")
-                    st.balloons()
-        
-        except Exception as e:
-            st.error(f"❌ Unerwarteter Fehler: {str(e)}")
-            logger.exception("Fehler bei Generierung")
-            return
+                    return {
+                        "speiseplan": speiseplan,
+                        "rezepte": rezepte,
+                        "pruefung": pruefung,
+                        "db_gespeichert": save_to_db and not db_error,
+                        "db_fehler": db_error
+                    }
+                
+                st.session_state["job_id"] = runner.starte(
+                    f"{config.wochen} Woche(n), {config.menulinien} Menülinie(n)",
+                    run_generation,
+                    besitzer=st.session_state["session_id"]
+                )
+            
+            except Exception as e:
+                st.error(f"❌ Unerwarteter Fehler: {str(e)}")
+                logger.exception("Fehler bei Generierung")
+                return
+    
+    # Status des laufenden Jobs anzeigen bzw. fertiges Ergebnis übernehmen
+    # (ein laufender Job aktualisiert sich selbst, ohne die ganze Seite neu aufzubauen)
+    ui.show_job_status(runner, st.session_state.get("job_id"))
+    ui.show_job_list(runner.liste(besitzer=st.session_state["session_id"]))
     
     # Zeige Ergebnisse in Tabs
     if st.session_state.get("speiseplan"):
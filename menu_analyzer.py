@@ -8,6 +8,8 @@ from bs4 import BeautifulSoup
 from io import BytesIO
 import re
 
+from schemata import ANALYSE_SCHEMA, TOOL_ANALYSE, erstelle_tool
+
 
 def extrahiere_text_aus_pdf(pdf_file):
     """
@@ -117,7 +119,10 @@ def analysiere_speiseplan_text(text, api_key, rufe_claude_api_func):
     prompt = get_analyse_prompt(text)
 
     # Rufe Claude API auf mit erhöhtem max_tokens für detaillierte Analyse
-    result, error = rufe_claude_api_func(prompt, api_key, max_tokens=6000)
+    # (return_analyse-Tool mit dem Schema aus get_analyse_prompt)
+    result, error = rufe_claude_api_func(
+        prompt, api_key, max_tokens=6000, tool=erstelle_tool(TOOL_ANALYSE, ANALYSE_SCHEMA)
+    )
 
     if error:
         return None, error
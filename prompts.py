@@ -5,10 +5,11 @@ Prompts für den Speiseplan-Generator
 Alle Prompt-Templates zentral verwaltet - OPTIMIERTE VERSION
 """
 
-# Einheitliche, klare Tool-Direktive – passt zu rufe_claude_api (tool_choice=return_json)
+# Einheitliche, klare Tool-Direktive – passt zu rufe_claude_api (tool_choice auf das Tool der Aufgabe)
 TOOL_DIRECTIVE = (
-    "ANTWORTFORMAT: Antworte ausschließlich als Tool-Aufruf 'return_json'. "
-    "Gib das komplette Ergebnis als EIN JSON-Objekt im Feld 'input' zurück. "
+    "ANTWORTFORMAT: Antworte ausschließlich mit dem bereitgestellten Tool-Aufruf. "
+    "Der Tool-Input IST das komplette Ergebnis nach dem Schema des Tools - "
+    "ohne umschließendes Feld wie 'input' oder 'data'. "
     "\n\nWICHTIGE JSON-REGELN:\n"
     "- Alle Strings in doppelten Anführungszeichen (\")\n"
     "- Kommata zwischen allen Feldern, KEINE trailing commas vor } oder ]\n"
@@ -20,6 +21,41 @@ TOOL_DIRECTIVE = (
     "Kein Text vor oder nach dem JSON-Objekt."
 )
 
+# Trennmarke zwischen statischem Prompt-Anfang (für Prompt-Caching markiert) und
+# variablem Teil. Die Payload-Builder entfernen die Marke, sie geht nie an die API.
+CACHE_TRENNER = "\n<<<CACHE_GRENZE>>>\n"
+
+
+def teile_prompt(prompt):
+    """
+    Teilt einen Prompt an der Cache-Marke
+
+    Returns:
+        tuple: (statischer_prefix, variabler_suffix) - ohne Marke ist der Prefix leer
+    """
+    if CACHE_TRENNER not in prompt:
+        return "", prompt
+    prefix, suffix = prompt.split(CACHE_TRENNER, 1)
+    return prefix, suffix
+
+
+def erstelle_nachrichten_inhalt(prompt):
+    """
+    Erstellt den Content einer User-Nachricht für die Messages-API
+
+    Der statische Prefix wird mit cache_control markiert, damit die API ihn
+    serverseitig cachen kann (Prompt-Caching). Prompts ohne Marke bleiben
+    ein einfacher String.
+    """
+    prefix, suffix = teile_prompt(prompt)
+    if not prefix:
+        return suffix
+    return [
+        {"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": suffix}
+    ]
+
+
 def get_speiseplan_prompt(wochen, menulinien, menu_namen, produktliste=None, produktlisten_prozent=0):
     """
     Erstellt den OPTIMIERTEN Prompt für die Speiseplan-Generierung
@@ -149,33 +185,10 @@ Empfehlung: Nutze diese Produkte wo sinnvoll, aber freie Rezeptgestaltung hat Pr
 
     return f"""Du bist ein diätisch ausgebildeter Küchenmeister mit 25+ Jahren Erfahrung in der Gemeinschaftsverpflegung (Krankenhaus/Senioren). {TOOL_DIRECTIVE}
 
-╔═══════════════════════════════════════════════════════════════════════════╗
-║  🚫 ABSOLUTE REGEL #1 - KEINE WIEDERHOLUNGEN VON HAUPTGERICHTEN 🚫       ║
-║                                                                             ║
-║  Du musst {anzahl_gerichte_gesamt} KOMPLETT UNTERSCHIEDLICHE Hauptgerichte erstellen!        ║
-║                                                                             ║
-║  ❌ VERBOTEN: "Seelachsfilet" an Montag UND Dienstag                      ║
-║  ❌ VERBOTEN: "Hühnerfrikassee" mehr als 1x im gesamten Plan              ║
-║  ✅ RICHTIG: Jeden Tag ein völlig anderes Hauptgericht                    ║
-║                                                                             ║
-║  BEVOR DU ANTWORTEST - PRÜFE:                                              ║
-║  □ Kommt irgendein Hauptgericht 2x vor? → FEHLER! → NEUSTART!            ║
-║  □ Sind alle {anzahl_gerichte_gesamt} Hauptgerichte unterschiedlich? → OK!              ║
-╚═══════════════════════════════════════════════════════════════════════════╝
-
-{produktlisten_text}
-
-AUFGABE: Erstelle einen professionellen Speiseplan für {wochen} Woche(n) mit {menulinien} Menülinie(n).
-
-MENÜLINIEN:
-{menu_liste}
-
 ═══════════════════════════════════════════════════════════════════════════
-SCHRITT-FÜR-SCHRITT VORGEHEN:
+GERICHTE-POOL:
 ═══════════════════════════════════════════════════════════════════════════
 
-SCHRITT 1: ERSTELLE ZUNÄCHST EINE LISTE MIT {anzahl_gerichte_gesamt} VERSCHIEDENEN HAUPTGERICHTEN
-
 Beispiel-Gerichte zur Inspiration (nutze diese und viele weitere!):
 - Rinderroulade mit Rotkohl
 - Schweinebraten mit Knödeln
@@ -230,20 +243,9 @@ Beispiel-Gerichte zur Inspiration (nutze diese und viele weitere!):
 WICHTIG: Jedes dieser Gerichte darf NUR EINMAL im gesamten Plan vorkommen!
 
 ═══════════════════════════════════════════════════════════════════════════
-
-SCHRITT 2: WEISE JEDEM TAG EIN EINZIGARTIGES GERICHT ZU
-
-Woche 1:
-- Montag, Menü 1: [Gericht 1]
-- Montag, Menü 2: [Gericht 2] ← MUSS komplett anders sein als Gericht 1!
-- Dienstag, Menü 1: [Gericht 3] ← MUSS komplett anders sein als Gericht 1+2!
-- Dienstag, Menü 2: [Gericht 4] ← MUSS komplett anders sein als Gericht 1+2+3!
-... und so weiter für alle {anzahl_gerichte_gesamt} Gerichte!
-
+BEILAGEN-VARIATION:
 ═══════════════════════════════════════════════════════════════════════════
 
-SCHRITT 3: VARIIERE AUCH DIE BEILAGEN
-
 Kartoffelvariationen (abwechseln!):
 - Salzkartoffeln, Petersilienkartoffeln, Kartoffelpüree, Bratkartoffeln, 
   Kroketten, Kartoffelgratin, Rosmarinkartoffeln, Herzoginkartoffeln
@@ -289,6 +291,53 @@ BEI MEHREREN MENÜLINIEN AM SELBEN TAG:
 - Wenn Menü 1 Fisch hat → Menü 2 Fleisch oder vegetarisch
 - Nicht beide Schnitzel, nicht beide Fisch, nicht beide ähnlich
 
+{CACHE_TRENNER}
+╔═══════════════════════════════════════════════════════════════════════════╗
+║  🚫 ABSOLUTE REGEL #1 - KEINE WIEDERHOLUNGEN VON HAUPTGERICHTEN 🚫       ║
+║                                                                             ║
+║  Du musst {anzahl_gerichte_gesamt} KOMPLETT UNTERSCHIEDLICHE Hauptgerichte erstellen!        ║
+║                                                                             ║
+║  ❌ VERBOTEN: "Seelachsfilet" an Montag UND Dienstag                      ║
+║  ❌ VERBOTEN: "Hühnerfrikassee" mehr als 1x im gesamten Plan              ║
+║  ✅ RICHTIG: Jeden Tag ein völlig anderes Hauptgericht                    ║
+║                                                                             ║
+║  BEVOR DU ANTWORTEST - PRÜFE:                                              ║
+║  □ Kommt irgendein Hauptgericht 2x vor? → FEHLER! → NEUSTART!            ║
+║  □ Sind alle {anzahl_gerichte_gesamt} Hauptgerichte unterschiedlich? → OK!              ║
+╚═══════════════════════════════════════════════════════════════════════════╝
+
+{produktlisten_text}
+
+AUFGABE: Erstelle einen professionellen Speiseplan für {wochen} Woche(n) mit {menulinien} Menülinie(n).
+
+MENÜLINIEN:
+{menu_liste}
+
+═══════════════════════════════════════════════════════════════════════════
+SCHRITT-FÜR-SCHRITT VORGEHEN:
+═══════════════════════════════════════════════════════════════════════════
+
+SCHRITT 1: ERSTELLE ZUNÄCHST EINE LISTE MIT {anzahl_gerichte_gesamt} VERSCHIEDENEN HAUPTGERICHTEN
+
+Nutze den GERICHTE-POOL oben als Inspiration.
+
+═══════════════════════════════════════════════════════════════════════════
+
+SCHRITT 2: WEISE JEDEM TAG EIN EINZIGARTIGES GERICHT ZU
+
+Woche 1:
+- Montag, Menü 1: [Gericht 1]
+- Montag, Menü 2: [Gericht 2] ← MUSS komplett anders sein als Gericht 1!
+- Dienstag, Menü 1: [Gericht 3] ← MUSS komplett anders sein als Gericht 1+2!
+- Dienstag, Menü 2: [Gericht 4] ← MUSS komplett anders sein als Gericht 1+2+3!
+... und so weiter für alle {anzahl_gerichte_gesamt} Gerichte!
+
+═══════════════════════════════════════════════════════════════════════════
+
+SCHRITT 3: VARIIERE AUCH DIE BEILAGEN
+
+Nutze die BEILAGEN-VARIATION oben: Kartoffeln, Gemüse und Salate täglich wechseln!
+
 ═══════════════════════════════════════════════════════════════════════════
 FINALE KONTROLLE VOR DEM ABSENDEN:
 ═══════════════════════════════════════════════════════════════════════════
@@ -439,9 +488,6 @@ Nutze diese Produkte bevorzugt, aber ergänze nach Bedarf mit Standard-Zutaten.
 
     return (
         f"Du bist ein Küchenmeister für Gemeinschaftsverpflegung. {TOOL_DIRECTIVE}\n\n"
-        f"{produktlisten_text}\n\n"
-        f"AUFGABE: Erstelle {anzahl_gerichte} detaillierte Rezepte für folgende Gerichte:\n\n"
-        f"{gerichte_liste}\n\n"
         "ANFORDERUNGEN:\n"
         "- Jedes Rezept umfasst Hauptgericht UND alle Beilagen\n"
         "- Portionsangaben für 10 Personen; Mengen in g/ml\n"
@@ -449,7 +495,11 @@ Nutze diese Produkte bevorzugt, aber ergänze nach Bedarf mit Standard-Zutaten.
         "- Nährwerte pro Portion; Allergenkennzeichnung\n\n"
         "ANTWORT-SCHEMA (JSON-OBJEKT):\n"
         f"{schema}\n"
-        "HINWEIS: Gib die realen Inhalte vollständig zurück; das Schema ist nur die Struktur."
+        "HINWEIS: Gib die realen Inhalte vollständig zurück; das Schema ist nur die Struktur.\n\n"
+        f"{produktlisten_text}"
+        f"{CACHE_TRENNER}"
+        f"AUFGABE: Erstelle {anzahl_gerichte} detaillierte Rezepte für folgende Gerichte:\n\n"
+        f"{gerichte_liste}"
     )
 
 
@@ -513,12 +563,13 @@ def get_pruefung_prompt(speiseplan):
         "7) Verträglichkeit/Konsistenz\n"
         "8) DGE-Konformität\n"
         "9) Ausreichende Beilagen\n\n"
-        "SPEISEPLAN (JSON):\n"
-        f"{plan_json}\n\n"
         "ANTWORT-SCHEMA (JSON-OBJEKT):\n"
         f"{schema}\n"
         "HINWEIS: Nur strukturierte Bewertung nach Schema zurückgeben. "
         "Sei besonders kritisch bei Wiederholungen von Hauptgerichten!"
+        f"{CACHE_TRENNER}"
+        "SPEISEPLAN (JSON):\n"
+        f"{plan_json}"
     )
 
 
@@ -607,14 +658,9 @@ Du verfügst über:
 DEINE AUFGABE: PROFESSIONELLE SPEISEPLAN-ANALYSE
 ═══════════════════════════════════════════════════════════════════════════
 
-Analysiere den folgenden Text mit deinem Fachwissen und extrahiere alle
-relevanten Informationen. Erstelle danach klare, präzise Anweisungen für
-deine Kollegen in der Küche.
-
-TEXT DES SPEISEPLANS:
-───────────────────────────────────────────────────────────────────────────
-{text}
-───────────────────────────────────────────────────────────────────────────
+Analysiere den Text des Speiseplans (am Ende dieser Nachricht) mit deinem
+Fachwissen und extrahiere alle relevanten Informationen. Erstelle danach
+klare, präzise Anweisungen für deine Kollegen in der Küche.
 
 ═══════════════════════════════════════════════════════════════════════════
 SCHRITT 1: INFORMATIONEN EXTRAHIEREN
@@ -722,5 +768,10 @@ ANTWORT-SCHEMA (JSON-OBJEKT):
 {schema}
 
 WICHTIG: Antworte NUR mit dem JSON-Objekt. Keine zusätzlichen Erklärungen!
+{CACHE_TRENNER}
+TEXT DES SPEISEPLANS:
+───────────────────────────────────────────────────────────────────────────
+{text}
+───────────────────────────────────────────────────────────────────────────
 """
     
@@ -0,0 +1,282 @@
+"""
+Rate-Limiter für Claude API-Aufrufe
+Prozessweiter Token-Bucket für Anfragen, Input- und Output-Tokens pro Minute
+"""
+
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Mapping, Optional
+
+
+# Standard-Limits (werden durch die anthropic-ratelimit-*-Header der API angepasst)
+STANDARD_ANFRAGEN_PRO_MINUTE = 50
+STANDARD_INPUT_TOKENS_PRO_MINUTE = 30_000
+STANDARD_OUTPUT_TOKENS_PRO_MINUTE = 8_000
+
+# Pause nach 429/529 ohne retry-after-Header (verdoppelt sich bis zum Maximum)
+PAUSE_BASIS_SEKUNDEN = 2.0
+PAUSE_MAXIMUM_SEKUNDEN = 60.0
+
+# Grobe Schätzung: ca. 4 Zeichen pro Token
+ZEICHEN_PRO_TOKEN = 4
+
+
+def schaetze_tokens(text: Any) -> int:
+    """
+    Schätzt die Token-Anzahl eines Prompts
+
+    Args:
+        text: Prompt als String oder Liste von Content-Blöcken
+
+    Returns:
+        int: Geschätzte Anzahl Tokens
+    """
+    if isinstance(text, list):
+        text = "".join(block.get("text", "") for block in text if isinstance(block, dict))
+    return max(1, len(str(text)) // ZEICHEN_PRO_TOKEN)
+
+
+class TokenBucket:
+    """
+    Token-Bucket mit kontinuierlicher Auffüllung
+
+    Der Füllstand darf negativ werden (Schulden), z.B. wenn die tatsächlich
+    verbrauchten Output-Tokens erst nach der Antwort bekannt sind. Neue
+    Anfragen warten dann, bis die Schulden abgebaut sind.
+    """
+
+    def __init__(self, pro_minute: float):
+        self.kapazitaet = float(pro_minute)
+        self.stand = float(pro_minute)
+        self._zuletzt = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        """Auffüllrate in Einheiten pro Sekunde"""
+        return self.kapazitaet / 60.0
+
+    def auffuellen(self, jetzt: float):
+        """Füllt den Bucket entsprechend der vergangenen Zeit auf"""
+        self.stand = min(self.kapazitaet, self.stand + (jetzt - self._zuletzt) * self.rate)
+        self._zuletzt = jetzt
+
+    def wartezeit(self, menge: float) -> float:
+        """Sekunden, bis 'menge' entnommen werden kann (0 = sofort)"""
+        # Einzelne Anfragen größer als die Kapazität dürfen nicht ewig warten
+        menge = min(menge, self.kapazitaet)
+        if self.stand >= menge:
+            return 0.0
+        return (menge - self.stand) / self.rate
+
+    def setze_limit(self, limit: Optional[float], verbleibend: Optional[float]):
+        """Übernimmt Limit und Restkontingent aus den Response-Headern"""
+        if limit:
+            self.kapazitaet = float(limit)
+        if verbleibend is not None:
+            self.stand = min(self.stand, float(verbleibend))
+
+
+class RateLimiter:
+    """
+    Prozessweiter Rate-Limiter für alle API-Aufrufe
+
+    Vor jedem Aufruf wird mit erwerbe() (bzw. erwerbe_async()) proaktiv
+    gewartet, bis Anfrage- und Token-Budget reichen. Nach dem Aufruf
+    gleicht melde_antwort() den Stand mit den anthropic-ratelimit-*-Headern
+    ab und setzt bei 429/529 eine gemeinsame Pause (retry-after oder
+    exponentiell wachsend) für alle Threads und Event-Loops.
+    """
+
+    def __init__(
+        self,
+        anfragen_pro_minute: float = STANDARD_ANFRAGEN_PRO_MINUTE,
+        input_tokens_pro_minute: float = STANDARD_INPUT_TOKENS_PRO_MINUTE,
+        output_tokens_pro_minute: float = STANDARD_OUTPUT_TOKENS_PRO_MINUTE
+    ):
+        self.anfragen = TokenBucket(anfragen_pro_minute)
+        self.input_tokens = TokenBucket(input_tokens_pro_minute)
+        self.output_tokens = TokenBucket(output_tokens_pro_minute)
+        self._pause_bis = 0.0
+        self._pause = 0.0
+        self._lock = threading.Lock()
+        self.gewartet_sekunden = 0.0
+        self.ueberlastungen = 0
+
+    def _versuche_erwerb(self, input_tokens: int) -> float:
+        """
+        Reserviert Budget für eine Anfrage, falls verfügbar
+
+        Returns:
+            float: 0 bei Erfolg, sonst die Wartezeit bis zum nächsten Versuch
+        """
+        with self._lock:
+            jetzt = time.monotonic()
+            pause = self._pause_bis - jetzt
+            if pause > 0:
+                return pause
+
+            for bucket in (self.anfragen, self.input_tokens, self.output_tokens):
+                bucket.auffuellen(jetzt)
+
+            warten = max(
+                self.anfragen.wartezeit(1),
+                self.input_tokens.wartezeit(input_tokens),
+                # Output-Tokens werden erst nachträglich verbucht: nur Schulden abwarten
+                self.output_tokens.wartezeit(0)
+            )
+            if warten > 0:
+                return warten
+
+            self.anfragen.stand -= 1
+            self.input_tokens.stand -= min(input_tokens, self.input_tokens.kapazitaet)
+            return 0.0
+
+    def erwerbe(self, input_tokens: int) -> int:
+        """
+        Wartet (blockierend), bis die Anfrage gesendet werden darf
+
+        Args:
+            input_tokens (int): Geschätzte Input-Tokens der Anfrage
+
+        Returns:
+            int: Reservierte Input-Tokens (für verbuche())
+        """
+        while True:
+            warten = self._versuche_erwerb(input_tokens)
+            if warten <= 0:
+                return input_tokens
+            self.gewartet_sekunden += warten
+            time.sleep(warten)
+
+    async def erwerbe_async(self, input_tokens: int) -> int:
+        """Wie erwerbe(), wartet aber ohne die Event-Loop zu blockieren"""
+        while True:
+            warten = self._versuche_erwerb(input_tokens)
+            if warten <= 0:
+                return input_tokens
+            self.gewartet_sekunden += warten
+            await asyncio.sleep(warten)
+
+    def verbuche(self, reserviert: int, usage: Optional[Dict]):
+        """
+        Gleicht die Reservierung mit dem tatsächlichen Verbrauch ab
+
+        Jede Reservierung muss genau einmal verbucht werden, auch bei
+        abgelehnten oder abgebrochenen Versuchen: Ohne Usage-Daten (429/529,
+        andere Fehlerstatus, Exceptions) wird sie vollständig zurückgegeben.
+
+        Args:
+            reserviert (int): Rückgabewert von erwerbe()
+            usage (dict): Usage-Daten der API-Response oder None
+        """
+        with self._lock:
+            reserviert = min(reserviert, self.input_tokens.kapazitaet)
+            if not usage:
+                self.input_tokens.stand = min(self.input_tokens.kapazitaet, self.input_tokens.stand + reserviert)
+                return
+            # Gecachte Prompt-Teile (cache_read) zählen nicht zum Input-Limit
+            input_tatsaechlich = (usage.get("input_tokens") or 0) + (usage.get("cache_creation_input_tokens") or 0)
+            self.input_tokens.stand -= input_tatsaechlich - reserviert
+            self.output_tokens.stand -= usage.get("output_tokens") or 0
+
+    def melde_antwort(self, status_code: int, headers: Optional[Mapping[str, str]] = None) -> float:
+        """
+        Verarbeitet Status und Rate-Limit-Header einer Response
+
+        Args:
+            status_code (int): HTTP-Status
+            headers: Response-Header (requests oder httpx)
+
+        Returns:
+            float: Gemeinsame Pause in Sekunden (0 wenn keine Überlastung)
+        """
+        headers = headers or {}
+        with self._lock:
+            self._uebernehme_header(headers)
+
+            if status_code not in (429, 529):
+                self._pause = 0.0
+                return 0.0
+
+            self.ueberlastungen += 1
+            self._pause = min(max(self._pause * 2, PAUSE_BASIS_SEKUNDEN), PAUSE_MAXIMUM_SEKUNDEN)
+            retry_after = _lese_zahl(headers.get("retry-after"))
+            pause = max(self._pause, retry_after) if retry_after else self._pause
+            self._pause_bis = max(self._pause_bis, time.monotonic() + pause)
+            return pause
+
+    def _uebernehme_header(self, headers: Mapping[str, str]):
+        """Übernimmt Limits und Restkontingente aus anthropic-ratelimit-*-Headern"""
+        for name, bucket in (
+            ("requests", self.anfragen),
+            ("input-tokens", self.input_tokens),
+            ("output-tokens", self.output_tokens)
+        ):
+            bucket.setze_limit(
+                _lese_zahl(headers.get(f"anthropic-ratelimit-{name}-limit")),
+                _lese_zahl(headers.get(f"anthropic-ratelimit-{name}-remaining"))
+            )
+
+            # Bei aufgebrauchtem Kontingent bis zum Reset pausieren
+            if bucket.stand <= 0:
+                reset = _sekunden_bis(headers.get(f"anthropic-ratelimit-{name}-reset"))
+                if reset:
+                    self._pause_bis = max(self._pause_bis, time.monotonic() + reset)
+
+    def hole_statistiken(self) -> Dict:
+        """
+        Holt den aktuellen Zustand des Limiters
+
+        Returns:
+            dict: Limits, Restkontingente, Wartezeit und Anzahl Überlastungen
+        """
+        with self._lock:
+            return {
+                'anfragen_limit': self.anfragen.kapazitaet,
+                'anfragen_verbleibend': self.anfragen.stand,
+                'input_limit': self.input_tokens.kapazitaet,
+                'input_verbleibend': self.input_tokens.stand,
+                'output_limit': self.output_tokens.kapazitaet,
+                'output_verbleibend': self.output_tokens.stand,
+                'gewartet_sekunden': self.gewartet_sekunden,
+                'ueberlastungen': self.ueberlastungen
+            }
+
+
+def _lese_zahl(wert: Optional[str]) -> Optional[float]:
+    """Wandelt einen Header-Wert in eine Zahl um oder gibt None zurück"""
+    try:
+        return float(wert)
+    except (TypeError, ValueError):
+        return None
+
+
+def _sekunden_bis(zeitpunkt: Optional[str]) -> Optional[float]:
+    """Sekunden bis zu einem RFC-3339-Zeitpunkt (z.B. anthropic-ratelimit-*-reset)"""
+    if not zeitpunkt:
+        return None
+    try:
+        ziel = datetime.fromisoformat(zeitpunkt.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return max(0.0, (ziel - datetime.now(timezone.utc)).total_seconds())
+
+
+_standard_limiter: Optional[RateLimiter] = None
+_standard_limiter_lock = threading.Lock()
+
+
+def hole_rate_limiter() -> RateLimiter:
+    """
+    Gibt den prozessweit geteilten Rate-Limiter zurück (wird bei Bedarf erstellt)
+
+    Returns:
+        RateLimiter: Der gemeinsame Limiter
+    """
+    global _standard_limiter
+    with _standard_limiter_lock:
+        if _standard_limiter is None:
+            _standard_limiter = RateLimiter()
+        return _standard_limiter
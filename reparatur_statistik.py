@@ -0,0 +1,149 @@
+"""
+Statistik der Reparatur- und Wiederholungspfade
+Zählt prozessweit, wie oft Antworten repariert, nachgefordert oder erneut
+angefragt werden müssen, und misst die Dauer der API-Aufrufe und Läufe
+"""
+
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+
+# Dekodierung (antwort_dekoder)
+EREIGNIS_DEKODIERT = "dekodiert"                  # jede dekodierte Antwort
+EREIGNIS_TOOL_OBJEKT = "tool_objekt"              # Schnellpfad: Tool-Input ohne Parsen übernommen
+EREIGNIS_TEXT_GUELTIG = "text_gueltig"            # Text ohne Reparatur lesbar
+EREIGNIS_REPARIERT = "repariert"                  # toleranter Parser hat etwas repariert
+EREIGNIS_HUELLE = "huelle_entfernt"               # {"input": ...} o.ä. ausgepackt
+EREIGNIS_ABGESCHNITTEN = "abgeschnitten"          # stop_reason max_tokens
+EREIGNIS_NICHT_LESBAR = "nicht_lesbar"
+EREIGNIS_NACHBEARBEITET = "nachbearbeitet"        # eines der vier vorigen, je Antwort einmal
+# Generierung (main_app/streamlit_app)
+EREIGNIS_API_AUFRUF = "api_aufruf"
+EREIGNIS_WIEDERHOLUNG = "wiederholung"            # gleicher Prompt erneut (Überlastung, Fehler)
+EREIGNIS_NACHFORDERUNG = "nachforderung"          # nur fehlende Menüs/Rezepte erneut angefragt
+EREIGNIS_SCHEMA_VERSTOSS = "schema_verstoss"      # Ergebnis verletzt das Schema
+EREIGNIS_TAG_AUFGEFUELLT = "tag_aufgefuellt"      # fehlende Menülinien dupliziert/gekürzt
+
+# Präfix der Zähler je Reparaturart (z.B. "reparatur:komma_fehlt")
+REPARATUR_PRAEFIX = "reparatur:"
+
+
+class ReparaturStatistik:
+    """
+    Thread-sichere Zähler und Laufzeiten
+
+    Die Quoten zeigen, ob typisierte Tools und Schemata wirken: Die
+    Reparaturquote ist der Anteil der Dekodierungen, deren Antwort nicht
+    unverändert verwendbar war, die Wiederholungsquote bezieht
+    Wiederholungen und Nachforderungen auf alle API-Aufrufe.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Setzt alle Zähler und Laufzeiten zurück"""
+        with self._lock:
+            self.zaehler: Counter = Counter()
+            self.dauern: Dict[str, List[float]] = {}  # art -> [anzahl, summe, maximum]
+
+    def zaehle(self, ereignis: str, anzahl: int = 1):
+        """Erhöht einen Zähler"""
+        with self._lock:
+            self.zaehler[ereignis] += anzahl
+
+    def erfasse_dekodierung(
+        self,
+        quelle: str,
+        reparaturen: List[str],
+        huelle: bool,
+        abgeschnitten: bool,
+        lesbar: bool
+    ):
+        """Zählt den Pfad einer Dekodierung (siehe antwort_dekoder.Dekodierung)"""
+        with self._lock:
+            self.zaehler[EREIGNIS_DEKODIERT] += 1
+            if not lesbar:
+                self.zaehler[EREIGNIS_NICHT_LESBAR] += 1
+            elif quelle == "tool":
+                self.zaehler[EREIGNIS_TOOL_OBJEKT] += 1
+            elif not reparaturen:
+                self.zaehler[EREIGNIS_TEXT_GUELTIG] += 1
+            if reparaturen:
+                self.zaehler[EREIGNIS_REPARIERT] += 1
+                for reparatur in reparaturen:
+                    self.zaehler[REPARATUR_PRAEFIX + reparatur] += 1
+            if huelle:
+                self.zaehler[EREIGNIS_HUELLE] += 1
+            if abgeschnitten:
+                self.zaehler[EREIGNIS_ABGESCHNITTEN] += 1
+            if reparaturen or huelle or abgeschnitten or not lesbar:
+                self.zaehler[EREIGNIS_NACHBEARBEITET] += 1
+
+    def erfasse_dauer(self, art: str, sekunden: float):
+        """Erfasst eine Laufzeit (z.B. "api:return_tag" oder "plan")"""
+        with self._lock:
+            werte = self.dauern.setdefault(art, [0, 0.0, 0.0])
+            werte[0] += 1
+            werte[1] += sekunden
+            werte[2] = max(werte[2], sekunden)
+
+    def erfasse_aufruf(self, tool_name: Optional[str], sekunden: float):
+        """Zählt einen API-Aufruf und seine Dauer je Tool"""
+        self.zaehle(EREIGNIS_API_AUFRUF)
+        self.erfasse_dauer(f"api:{tool_name or 'text'}", sekunden)
+
+    @contextmanager
+    def miss(self, art: str) -> Iterator[None]:
+        """Misst die Dauer des with-Blocks"""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.erfasse_dauer(art, time.monotonic() - start)
+
+    def hole_statistiken(self) -> Dict:
+        """
+        Holt Zähler, Quoten und Laufzeiten
+
+        Returns:
+            dict: zaehler, reparaturquote, wiederholungsquote und dauern
+            (je Art: anzahl, mittel_s, max_s)
+        """
+        with self._lock:
+            zaehler = dict(self.zaehler)
+            dauern = {
+                art: {'anzahl': anzahl, 'mittel_s': round(summe / anzahl, 3), 'max_s': round(maximum, 3)}
+                for art, (anzahl, summe, maximum) in sorted(self.dauern.items())
+            }
+        dekodiert = zaehler.get(EREIGNIS_DEKODIERT, 0)
+        aufrufe = zaehler.get(EREIGNIS_API_AUFRUF, 0)
+        erneut = zaehler.get(EREIGNIS_WIEDERHOLUNG, 0) + zaehler.get(EREIGNIS_NACHFORDERUNG, 0)
+        return {
+            'zaehler': dict(sorted(zaehler.items())),
+            'reparaturquote': zaehler.get(EREIGNIS_NACHBEARBEITET, 0) / dekodiert if dekodiert else 0.0,
+            'wiederholungsquote': erneut / aufrufe if aufrufe else 0.0,
+            'dauern': dauern
+        }
+
+
+_standard_statistik: Optional[ReparaturStatistik] = None
+_standard_statistik_lock = threading.Lock()
+
+
+def hole_reparatur_statistik() -> ReparaturStatistik:
+    """
+    Gibt die prozessweit geteilte Statistik zurück (wird bei Bedarf erstellt)
+
+    Returns:
+        ReparaturStatistik: Die gemeinsame Statistik
+    """
+    global _standard_statistik
+    with _standard_statistik_lock:
+        if _standard_statistik is None:
+            _standard_statistik = ReparaturStatistik()
+        return _standard_statistik
@@ -0,0 +1,209 @@
+"""
+Antwort-Cache für Claude API-Aufrufe
+Speichert geparste Antworten inhaltsadressiert in SQLite (TTL + LRU)
+"""
+
+import sqlite3
+import json
+import hashlib
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Standardwerte - können beim Erstellen des Caches überschrieben werden
+CACHE_DATEI = "api_cache.db"
+CACHE_TTL_SEKUNDEN = 7 * 24 * 3600       # 7 Tage
+CACHE_MAX_BYTES = 100 * 1024 * 1024      # 100 MB
+
+
+class ResponseCache:
+    """
+    Persistenter, inhaltsadressierter Cache für API-Antworten
+
+    Der Schlüssel ist ein SHA-256-Hash über (model, prompt, max_tokens,
+    temperature, tools). Abgelaufene Einträge (TTL) werden beim Lesen
+    verworfen; überschreitet der Cache seine Maximalgröße, werden die am
+    längsten nicht genutzten Einträge gelöscht (LRU).
+    """
+
+    def __init__(self, db_path: str = CACHE_DATEI, ttl: float = CACHE_TTL_SEKUNDEN,
+                 max_bytes: int = CACHE_MAX_BYTES):
+        """
+        Initialisiert den Cache
+
+        Args:
+            db_path (str): Pfad zur Cache-Datenbank
+            ttl (float): Lebensdauer eines Eintrags in Sekunden
+            max_bytes (int): Maximale Gesamtgröße der gespeicherten Antworten
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._erstelle_tabellen()
+
+    def _erstelle_tabellen(self):
+        """Erstellt die Cache-Tabelle wenn sie nicht existiert"""
+        with self._lock:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS antworten (
+                    schluessel TEXT PRIMARY KEY,
+                    antwort TEXT NOT NULL,
+                    usage TEXT,
+                    groesse INTEGER NOT NULL,
+                    erstellt_am REAL NOT NULL,
+                    zuletzt_genutzt REAL NOT NULL
+                )
+            """)
+            self._conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_zuletzt_genutzt ON antworten(zuletzt_genutzt)
+            """)
+            self._conn.commit()
+
+    @staticmethod
+    def erstelle_schluessel(model: str, prompt: Any, max_tokens: int,
+                            temperature: Optional[float] = None,
+                            tools: Optional[List[Dict]] = None) -> str:
+        """
+        Berechnet den Cache-Schlüssel einer Anfrage
+
+        Returns:
+            str: SHA-256-Hexdigest
+        """
+        material = json.dumps(
+            [model, prompt, max_tokens, temperature, tools],
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def hole(self, schluessel: str) -> Optional[Tuple[Any, Dict]]:
+        """
+        Liest eine Antwort aus dem Cache
+
+        Returns:
+            tuple: (antwort, usage) oder None bei Cache-Miss
+        """
+        jetzt = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT antwort, usage, erstellt_am FROM antworten WHERE schluessel = ?",
+                (schluessel,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            if jetzt - row[2] > self.ttl:
+                self._conn.execute("DELETE FROM antworten WHERE schluessel = ?", (schluessel,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE antworten SET zuletzt_genutzt = ? WHERE schluessel = ?",
+                (jetzt, schluessel)
+            )
+            self._conn.commit()
+            self.hits += 1
+
+        usage = json.loads(row[1]) if row[1] else {}
+        return json.loads(row[0]), usage
+
+    def speichere(self, schluessel: str, antwort: Any, usage: Optional[Dict] = None):
+        """
+        Speichert eine Antwort im Cache
+
+        Args:
+            schluessel (str): Cache-Schlüssel
+            antwort: Geparste Antwort (JSON-serialisierbar)
+            usage (dict): Usage-Daten der ursprünglichen API-Response
+        """
+        antwort_json = json.dumps(antwort, ensure_ascii=False)
+        usage_json = json.dumps(usage or {}, ensure_ascii=False)
+        groesse = len(antwort_json.encode('utf-8'))
+        jetzt = time.time()
+
+        with self._lock:
+            self._conn.execute("""
+                INSERT OR REPLACE INTO antworten
+                    (schluessel, antwort, usage, groesse, erstellt_am, zuletzt_genutzt)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (schluessel, antwort_json, usage_json, groesse, jetzt, jetzt))
+            self._raeume_auf(jetzt)
+            self._conn.commit()
+
+    def _raeume_auf(self, jetzt: float):
+        """Entfernt abgelaufene Einträge und verdrängt LRU-Einträge über dem Limit"""
+        self._conn.execute(
+            "DELETE FROM antworten WHERE erstellt_am < ?",
+            (jetzt - self.ttl,)
+        )
+
+        gesamt = self._conn.execute(
+            "SELECT COALESCE(SUM(groesse), 0) FROM antworten"
+        ).fetchone()[0]
+        if gesamt <= self.max_bytes:
+            return
+
+        zu_loeschen = []
+        for schluessel, groesse in self._conn.execute(
+            "SELECT schluessel, groesse FROM antworten ORDER BY zuletzt_genutzt ASC"
+        ):
+            if gesamt <= self.max_bytes:
+                break
+            zu_loeschen.append((schluessel,))
+            gesamt -= groesse
+
+        self._conn.executemany("DELETE FROM antworten WHERE schluessel = ?", zu_loeschen)
+
+    def leeren(self):
+        """Löscht alle Einträge und setzt die Zähler zurück"""
+        with self._lock:
+            self._conn.execute("DELETE FROM antworten")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def hole_statistiken(self) -> Dict:
+        """
+        Holt Statistiken über den Cache
+
+        Returns:
+            dict: Treffer, Fehlschläge, Trefferquote, Einträge und Größe
+        """
+        with self._lock:
+            eintraege, groesse = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(groesse), 0) FROM antworten"
+            ).fetchone()
+            anfragen = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'trefferquote': self.hits / anfragen if anfragen else 0.0,
+                'eintraege': eintraege,
+                'groesse_bytes': groesse
+            }
+
+
+_standard_cache: Optional[ResponseCache] = None
+_standard_cache_lock = threading.Lock()
+
+
+def hole_standard_cache() -> ResponseCache:
+    """
+    Gibt den prozessweit geteilten Cache zurück (wird bei Bedarf erstellt)
+
+    Returns:
+        ResponseCache: Der gemeinsame Cache
+    """
+    global _standard_cache
+    with _standard_cache_lock:
+        if _standard_cache is None:
+            _standard_cache = ResponseCache()
+        return _standard_cache
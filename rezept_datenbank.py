@@ -4,32 +4,250 @@ Verwendet SQLite für lokale Speicherung
 """
 
 import sqlite3
+import copy
+import gzip
 import json
 import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from typing import IO, Iterator, List, Dict, Optional, Tuple
+
+from duplikat_index import (
+    AEHNLICHKEIT_SCHWELLE,
+    MERKMAL_VERSION,
+    ZUSAMMENFUEHREN_SCHWELLE,
+    bewerte_kandidaten,
+    index_schluessel,
+    normalisiere_name
+)
+
+
+# SQLite-Tuning für jede Verbindung
+SQLITE_TIMEOUT_SEKUNDEN = 30           # Wartezeit bei gesperrter Datenbank statt sofortigem Fehler
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",         # Leser blockieren nie hinter einem Schreiber
+    "PRAGMA synchronous=NORMAL",       # Im WAL-Modus sicher, spart fsyncs pro Commit
+    "PRAGMA cache_size=-16000",        # 16 MB Page-Cache pro Verbindung
+    "PRAGMA mmap_size=268435456",      # 256 MB Memory-Mapped I/O
+    "PRAGMA temp_store=MEMORY",
+)
+
+# Anzahl dekodierter Rezepte im LRU-Cache von hole_rezept/hole_rezepte (0 = aus)
+REZEPT_CACHE_GROESSE = 256
+
+# SQLite erlaubt höchstens 999 Parameter pro Abfrage (ältere Versionen)
+MAX_IDS_PRO_ABFRAGE = 500
+
+# Sortierungen der Bibliotheks-Seiten: Schlüssel -> (SQL-Ausdruck, Richtung).
+# Die ID dient als Tie-Breaker in derselben Richtung, so dass (wert, id) ein
+# eindeutiger Keyset-Cursor ist
+SEITEN_SORTIERUNGEN = {
+    "neueste": ("r.erstellt_am", "DESC"),
+    "name": ("r.name COLLATE NOCASE", "ASC"),
+    "bewertung": ("COALESCE(r.bewertung, 0)", "DESC"),
+    "verwendet": ("COALESCE(r.verwendet_count, 0)", "DESC"),
+}
+SEITENGROESSE = 20
+
+# Leichte Zusammenfassung einer Rezept-Zeile (ohne JSON-Dekodierung)
+_ZUSAMMENFASSUNG_SPALTEN = """
+    r.id, r.name, r.menu_linie, r.portionen, r.vorbereitung, r.garzeit,
+    r.gesamtzeit, r.erstellt_am, r.verwendet_count, r.bewertung,
+    (SELECT COUNT(*) FROM rezept_zutaten z WHERE z.rezept_id = r.id) AS anzahl_zutaten,
+    (SELECT COUNT(*) FROM rezept_allergene a WHERE a.rezept_id = r.id) AS anzahl_allergene,
+    CASE WHEN json_valid(r.zubereitung) THEN json_array_length(r.zubereitung) ELSE 0 END AS anzahl_schritte,
+    (SELECT x.name FROM rezept_duplikate d JOIN rezepte x ON x.id = d.aehnlich_zu
+     WHERE d.rezept_id = r.id ORDER BY d.aehnlichkeit DESC LIMIT 1) AS aehnlich_zu
+"""
+
+# Export/Import: Rezepte pro Transaktion beim Import, Lesepuffer in Zeichen
+IMPORT_BATCH_GROESSE = 500
+IMPORT_PUFFER_ZEICHEN = 64 * 1024
+NDJSON_ENDUNGEN = (".ndjson", ".jsonl")
+
+REZEPT_SPALTEN = (
+    "name", "menu_linie", "portionen", "vorbereitung", "garzeit", "gesamtzeit",
+    "zutaten", "zubereitung", "naehrwerte", "allergene", "tipps",
+    "variationen", "tags", "gericht_schluessel"
+)
+
+# Rezepte aus der Bibliothek werden für einen Speiseplan nur übernommen, wenn
+# sie mindestens so gut bewertet sind (0 = auch unbewertete)
+BIBLIOTHEK_MIN_BEWERTUNG = 4
+
+# Volltextsuche (FTS5): unicode61 mit remove_diacritics faltet Umlaute und
+# Akzente ("püree" findet auch "Puree"); Präfix-Indizes beschleunigen die
+# Präfix-Suche, die den Anfang eines Kompositums findet ("kartoffel" ->
+# "Kartoffelpüree"). Wortteile in der Mitte ("püree", "gulasch" in
+# "Rindergulasch") ergänzt immer eine Teilstring-Suche per LIKE
+FTS_TOKENIZER = "unicode61 remove_diacritics 2"
+FTS_PRAEFIXE = "2 3 4"
+# BM25-Gewichte für name, zutaten, zubereitung, tags
+FTS_GEWICHTE = (10.0, 4.0, 1.0, 6.0)
+
+# Durchsuchbarer Text einer Rezept-Zeile (für Trigger und Migration)
+_JSON_TEXT = "(SELECT group_concat({wert}, ' ') FROM json_each(CASE WHEN json_valid({spalte}) THEN {spalte} ELSE '[]' END))"
+_FTS_WERTE = ", ".join((
+    "{z}.name",
+    _JSON_TEXT.format(wert="CASE WHEN type = 'object' THEN json_extract(value, '$.name') ELSE value END", spalte="{z}.zutaten"),
+    _JSON_TEXT.format(wert="value", spalte="{z}.zubereitung"),
+    _JSON_TEXT.format(wert="value", spalte="{z}.tags"),
+))
+
+# Normalisierte Tabellen, die aus den JSON-Spalten per Trigger gepflegt werden.
+# {z} ist der Zeilen-Alias ("new" im Trigger, "r" bei der Migration), {quelle}
+# die zusätzliche FROM-Quelle ("" im Trigger, "rezepte r," bei der Migration)
+_JSON_ELEMENTE = "json_each(CASE WHEN json_valid({z}.{spalte}) THEN {z}.{spalte} ELSE '[]' END) j"
+_NORMALISIERUNG = {
+    "rezept_tags": (
+        "INSERT OR IGNORE INTO rezept_tags (rezept_id, tag) "
+        "SELECT {z}.id, lower(trim(j.value)) FROM {quelle} " + _JSON_ELEMENTE.replace("{spalte}", "tags") + " "
+        "WHERE j.type = 'text' AND trim(j.value) <> ''"
+    ),
+    "rezept_zutaten": (
+        "INSERT OR IGNORE INTO rezept_zutaten (rezept_id, position, name, menge) "
+        "SELECT {z}.id, j.key, trim(json_extract(j.value, '$.name')), json_extract(j.value, '$.menge') "
+        "FROM {quelle} " + _JSON_ELEMENTE.replace("{spalte}", "zutaten") + " "
+        "WHERE j.type = 'object' AND trim(json_extract(j.value, '$.name')) <> ''"
+    ),
+    "rezept_allergene": (
+        "INSERT OR IGNORE INTO rezept_allergene (rezept_id, allergen) "
+        "SELECT {z}.id, lower(trim(j.value)) FROM {quelle} " + _JSON_ELEMENTE.replace("{spalte}", "allergene") + " "
+        "WHERE j.type = 'text' AND trim(j.value) <> ''"
+    ),
+}
+
+# Einfügen oder - bei gleichem Namen - aktualisieren (benötigt idx_name_unique)
+_UPSERT_SQL = f"""
+    INSERT INTO rezepte ({", ".join(REZEPT_SPALTEN)})
+    VALUES ({", ".join("?" for _ in REZEPT_SPALTEN)})
+    ON CONFLICT(name) DO UPDATE SET
+        {", ".join(f"{s} = excluded.{s}" for s in REZEPT_SPALTEN[1:])}
+"""
+
+
+def erstelle_fts_abfrage(suchbegriff: str) -> Optional[str]:
+    """
+    Wandelt eine Benutzereingabe in eine FTS5-Abfrage um
+    
+    Jedes Wort wird als Präfix gesucht ("kartoffelp" findet "Kartoffelpüree"),
+    alle Wörter müssen vorkommen. Sonderzeichen der FTS5-Syntax werden entfernt.
+    
+    Args:
+        suchbegriff (str): Eingabe aus dem Suchfeld
+        
+    Returns:
+        str: MATCH-Ausdruck oder None, wenn kein Wort übrig bleibt
+    """
+    woerter = re.findall(r"\w+", suchbegriff or "")
+    if not woerter:
+        return None
+    return " ".join(f'"{wort}"*' for wort in woerter)
+
+
+def erstelle_gericht_schluessel(hauptgericht: str, beilagen: List[str] = None) -> str:
+    """
+    Schlüssel eines Gerichts aus Hauptgericht und Beilagen
+
+    Hauptgericht und Beilagen werden normalisiert, die Beilagen sortiert, so
+    dass Schreibweise und Reihenfolge keine Rolle spielen:
+    "Rindergulasch", ["Spätzle", "Rotkohl"] -> "rindergulasch|rotkohl,spaetzle"
+    """
+    teile = sorted(filter(None, (normalisiere_name(b) for b in beilagen or [])))
+    return f"{normalisiere_name(hauptgericht)}|{','.join(teile)}"
+
+
+def _gericht_schluessel_aus_name(name: str) -> str:
+    """
+    Leitet den Gericht-Schlüssel aus einem Rezeptnamen der Form
+    "<Hauptgericht> mit <Beilage>, <Beilage>" ab (Rezepte ohne gespeicherten
+    Schlüssel)
+    """
+    hauptgericht, _, beilagen_text = (name or "").rpartition(" mit ")
+    if not hauptgericht:
+        return erstelle_gericht_schluessel(name)
+    beilagen = [] if beilagen_text.strip() == "ohne Beilagen" else beilagen_text.split(", ")
+    return erstelle_gericht_schluessel(hauptgericht, beilagen)
 
 
 class RezeptDatenbank:
     """
     Verwaltet eine lokale Datenbank mit allen generierten Rezepten
+    
+    Jeder Thread erhält eine eigene, dauerhaft offene Verbindung (WAL-Modus),
+    so dass parallele Streamlit-Sitzungen lesen können, während geschrieben wird.
     """
     
-    def __init__(self, db_path: str = "rezepte_bibliothek.db"):
+    def __init__(self, db_path: str = "rezepte_bibliothek.db",
+                 cache_groesse: int = REZEPT_CACHE_GROESSE):
         """
         Initialisiert die Datenbank
         
         Args:
             db_path (str): Pfad zur Datenbank-Datei
+            cache_groesse (int): Größe des Rezept-Caches (0 = kein Cache)
         """
         self.db_path = db_path
+        self._lokal = threading.local()
+        self.cache_groesse = cache_groesse
+        self._cache: "OrderedDict[int, Dict]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # (Schreib-Version, Statistiken) der letzten Berechnung
+        self._statistiken: Optional[Tuple[int, Dict]] = None
+        self.volltext = False
         self._erstelle_tabellen()
     
+    def _verbindung(self) -> sqlite3.Connection:
+        """
+        Gibt die Verbindung des aktuellen Threads zurück (wird bei Bedarf geöffnet)
+        
+        Returns:
+            sqlite3.Connection: Thread-lokale Verbindung
+        """
+        conn = getattr(self._lokal, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=SQLITE_TIMEOUT_SEKUNDEN)
+            for pragma in SQLITE_PRAGMAS:
+                conn.execute(pragma)
+            self._lokal.conn = conn
+        return conn
+    
+    @contextmanager
+    def _transaktion(self):
+        """
+        Führt einen Block als Transaktion aus (Commit bei Erfolg, sonst Rollback)
+        
+        Yields:
+            sqlite3.Cursor: Cursor der Thread-Verbindung
+        """
+        conn = self._verbindung()
+        cursor = conn.cursor()
+        try:
+            yield cursor
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+    
+    def schliesse(self):
+        """Schließt die Verbindung des aktuellen Threads"""
+        conn = getattr(self._lokal, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._lokal.conn = None
+    
     def _erstelle_tabellen(self):
         """Erstellt die notwendigen Tabellen wenn sie nicht existieren"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
+        with self._transaktion() as cursor:
+            self._erstelle_schema(cursor)
+    
+    def _erstelle_schema(self, cursor: sqlite3.Cursor):
+        """Legt Tabellen und Indizes an"""
         # Rezepte-Tabelle
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS rezepte (
@@ -51,19 +269,21 @@ class RezeptDatenbank:
                 verwendet_count INTEGER DEFAULT 0,
                 zuletzt_verwendet TIMESTAMP,
                 bewertung INTEGER DEFAULT 0,
-                notizen TEXT
+                notizen TEXT,
+                gericht_schluessel TEXT
             )
         """)
         
-        # Index für schnellere Suche
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_name ON rezepte(name)
-        """)
-        
         cursor.execute("""
             CREATE INDEX IF NOT EXISTS idx_tags ON rezepte(tags)
         """)
         
+        # Indizes für die sortierten Bibliotheks-Seiten
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_erstellt_am ON rezepte(erstellt_am)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_name_nocase ON rezepte(name COLLATE NOCASE)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_bewertung ON rezepte(COALESCE(bewertung, 0))")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_verwendet ON rezepte(COALESCE(verwendet_count, 0))")
+        
         # Verwendungs-Historie
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS verwendungen (
@@ -75,23 +295,337 @@ class RezeptDatenbank:
             )
         """)
         
-        conn.commit()
-        conn.close()
+        # Eindeutiger Name (Voraussetzung für ON CONFLICT(name))
+        self._entferne_doppelte_namen(cursor)
+        cursor.execute("DROP INDEX IF EXISTS idx_name")
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_name_unique ON rezepte(name)
+        """)
+        
+        self._erstelle_gericht_schluessel(cursor)
+        self._erstelle_normalisierte_tabellen(cursor)
+        self._erstelle_schreib_version(cursor)
+        self._erstelle_aehnlichkeits_index(cursor)
+        self.volltext = self._erstelle_volltext_index(cursor)
     
-    def speichere_rezept(self, rezept: Dict, tags: List[str] = None) -> int:
+    def _erstelle_gericht_schluessel(self, cursor: sqlite3.Cursor):
         """
-        Speichert ein Rezept in der Datenbank
+        Migration: Ergänzt die Spalte gericht_schluessel (Hauptgericht plus
+        Beilagen, siehe erstelle_gericht_schluessel) samt Index
+
+        Bei älteren Datenbanken wird der Schlüssel aus dem Rezeptnamen abgeleitet.
+        """
+        cursor.execute("PRAGMA table_info(rezepte)")
+        if "gericht_schluessel" not in {zeile[1] for zeile in cursor.fetchall()}:
+            cursor.execute("ALTER TABLE rezepte ADD COLUMN gericht_schluessel TEXT")
+            cursor.execute("SELECT id, name FROM rezepte")
+            cursor.executemany(
+                "UPDATE rezepte SET gericht_schluessel = ? WHERE id = ?",
+                [(_gericht_schluessel_aus_name(name), rezept_id) for rezept_id, name in cursor.fetchall()]
+            )
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_gericht_schluessel ON rezepte(gericht_schluessel)")
+    
+    def _erstelle_normalisierte_tabellen(self, cursor: sqlite3.Cursor):
+        """
+        Legt rezept_tags, rezept_zutaten und rezept_allergene an
+        
+        Die JSON-Spalten in rezepte bleiben das gespeicherte Dokument; die
+        Tabellen sind ein per Trigger synchron gehaltener Index für Filter und
+        Statistiken. Fehlt eine Tabelle (ältere Datenbank), wird sie aus den
+        vorhandenen Rezepten befüllt.
+        """
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        vorhanden = {row[0] for row in cursor.fetchall()}
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS rezept_tags (
+                rezept_id INTEGER NOT NULL REFERENCES rezepte(id),
+                tag TEXT NOT NULL,
+                PRIMARY KEY (rezept_id, tag)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_rezept_tags_tag ON rezept_tags(tag, rezept_id)")
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS rezept_zutaten (
+                rezept_id INTEGER NOT NULL REFERENCES rezepte(id),
+                position INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                menge TEXT,
+                PRIMARY KEY (rezept_id, position)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_rezept_zutaten_name ON rezept_zutaten(name COLLATE NOCASE)")
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS rezept_allergene (
+                rezept_id INTEGER NOT NULL REFERENCES rezepte(id),
+                allergen TEXT NOT NULL,
+                PRIMARY KEY (rezept_id, allergen)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_rezept_allergene_allergen ON rezept_allergene(allergen, rezept_id)")
+        
+        einfuegen = "\n".join(f"{sql.format(z='new', quelle='')};" for sql in _NORMALISIERUNG.values())
+        loeschen = "\n".join(f"DELETE FROM {tabelle} WHERE rezept_id = old.id;" for tabelle in _NORMALISIERUNG)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS rezepte_normalisiert_insert AFTER INSERT ON rezepte BEGIN
+                {einfuegen}
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS rezepte_normalisiert_update
+            AFTER UPDATE OF tags, zutaten, allergene ON rezepte BEGIN
+                {loeschen}
+                {einfuegen}
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS rezepte_normalisiert_delete AFTER DELETE ON rezepte BEGIN
+                {loeschen}
+            END
+        """)
+        
+        # Migration bestehender Datenbanken
+        for tabelle, sql in _NORMALISIERUNG.items():
+            if tabelle not in vorhanden:
+                cursor.execute(sql.format(z='r', quelle='rezepte r,'))
+    
+    def _erstelle_schreib_version(self, cursor: sqlite3.Cursor):
+        """
+        Legt einen Zähler an, den Trigger bei jeder Änderung an rezepte erhöhen
+        
+        Damit erkennen zwischengespeicherte Auswertungen (hole_statistiken)
+        mit einer einzigen Abfrage, ob sich die Daten geändert haben - auch
+        bei Schreibzugriffen anderer Verbindungen oder Prozesse.
+        """
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS db_meta (
+                schluessel TEXT PRIMARY KEY,
+                wert INTEGER NOT NULL
+            )
+        """)
+        cursor.execute("INSERT OR IGNORE INTO db_meta (schluessel, wert) VALUES ('schreib_version', 0)")
+        for ereignis in ("INSERT", "UPDATE", "DELETE"):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS rezepte_version_{ereignis.lower()}
+                AFTER {ereignis} ON rezepte BEGIN
+                    UPDATE db_meta SET wert = wert + 1 WHERE schluessel = 'schreib_version';
+                END
+            """)
+    
+    def _erstelle_aehnlichkeits_index(self, cursor: sqlite3.Cursor):
+        """
+        Legt den LSH-Index für ähnliche Rezepte und die Duplikat-Hinweise an
+        
+        Die Signaturen werden in Python berechnet (siehe duplikat_index) und
+        beim Speichern gepflegt; beim ersten Anlegen und nach einer Änderung
+        der Merkmale (MERKMAL_VERSION) werden alle vorhandenen Rezepte neu
+        indiziert.
+        """
+        cursor.execute("SELECT wert FROM db_meta WHERE schluessel = 'merkmal_version'")
+        zeile = cursor.fetchone()
+        aktuell = zeile is not None and zeile[0] == MERKMAL_VERSION
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS rezept_lsh (
+                band INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                rezept_id INTEGER NOT NULL REFERENCES rezepte(id),
+                PRIMARY KEY (band, bucket, rezept_id)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_rezept_lsh_rezept ON rezept_lsh(rezept_id)")
+        
+        # Markierte Beinahe-Duplikate (rezept_id ähnelt aehnlich_zu)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS rezept_duplikate (
+                rezept_id INTEGER NOT NULL REFERENCES rezepte(id),
+                aehnlich_zu INTEGER NOT NULL REFERENCES rezepte(id),
+                aehnlichkeit REAL NOT NULL,
+                PRIMARY KEY (rezept_id, aehnlich_zu)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_rezept_duplikate_zu ON rezept_duplikate(aehnlich_zu)")
+        
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS rezepte_aehnlichkeit_delete AFTER DELETE ON rezepte BEGIN
+                DELETE FROM rezept_lsh WHERE rezept_id = old.id;
+                DELETE FROM rezept_duplikate WHERE rezept_id = old.id OR aehnlich_zu = old.id;
+            END
+        """)
+        
+        if not aktuell:
+            cursor.execute("SELECT id, name, zutaten FROM rezepte")
+            for rezept_id, name, zutaten in cursor.fetchall():
+                self._indexiere(cursor, rezept_id, index_schluessel(name, _lade_json(zutaten, [])))
+            cursor.execute(
+                "INSERT OR REPLACE INTO db_meta (schluessel, wert) VALUES ('merkmal_version', ?)",
+                (MERKMAL_VERSION,)
+            )
+    
+    def _indexiere(self, cursor: sqlite3.Cursor, rezept_id: int, schluessel: List[Tuple[int, int]]):
+        """Ersetzt die LSH-Einträge eines Rezepts"""
+        cursor.execute("DELETE FROM rezept_lsh WHERE rezept_id = ?", (rezept_id,))
+        cursor.executemany(
+            "INSERT OR IGNORE INTO rezept_lsh (band, bucket, rezept_id) VALUES (?, ?, ?)",
+            [(band, bucket, rezept_id) for band, bucket in schluessel]
+        )
+    
+    def _bewerte_aehnliche(self, cursor: sqlite3.Cursor, name: str, zutaten: List,
+                           schwelle: float = AEHNLICHKEIT_SCHWELLE,
+                           schluessel: List[Tuple[int, int]] = None) -> List[Tuple[int, str, float]]:
+        """
+        Sucht LSH-Kandidaten und vergleicht sie genau
+        
+        Args:
+            schluessel (list): Optional - bereits berechnete index_schluessel()
+        
+        Returns:
+            list: (ID, Name, Ähnlichkeit), absteigend sortiert
+        """
+        if schluessel is None:
+            schluessel = index_schluessel(name, zutaten)
+        if not schluessel:
+            return []
+        werte = ", ".join("(?, ?)" for _ in schluessel)
+        # Join über eine VALUES-Tabelle, damit jeder Bucket per Primärschlüssel gesucht wird
+        cursor.execute(f"""
+            WITH gesucht(band, bucket) AS (VALUES {werte})
+            SELECT r.id, r.name, r.zutaten FROM rezepte r
+            WHERE r.id IN (
+                SELECT l.rezept_id FROM gesucht g
+                JOIN rezept_lsh l ON l.band = g.band AND l.bucket = g.bucket
+            )
+        """, [wert for paar in schluessel for wert in paar])
+        kandidaten = {
+            rezept_id: (kandidat_name, _lade_json(kandidat_zutaten, []))
+            for rezept_id, kandidat_name, kandidat_zutaten in cursor.fetchall()
+        }
+        return bewerte_kandidaten(name, zutaten, kandidaten, schwelle)
+    
+    def finde_aehnliche(self, name: str, zutaten: List = None,
+                        schwelle: float = AEHNLICHKEIT_SCHWELLE, limit: int = 5) -> List[Tuple[int, str, float]]:
+        """
+        Findet vorhandene Rezepte, die einem Gericht ähneln
+        
+        Args:
+            name (str): Name des Gerichts
+            zutaten (list): Optional - Zutaten für einen genaueren Vergleich
+            schwelle (float): Mindestähnlichkeit (Jaccard, 0 bis 1)
+            limit (int): Maximum Anzahl Treffer
+            
+        Returns:
+            list: (ID, Name, Ähnlichkeit), ähnlichstes zuerst
+        """
+        cursor = self._verbindung().cursor()
+        treffer = self._bewerte_aehnliche(cursor, name, zutaten or [], schwelle)
+        cursor.close()
+        return treffer[:limit]
+    
+    def _loese_duplikate_auf(self, cursor: sqlite3.Cursor, zeile: Tuple, zutaten: List,
+                             schluessel: List[Tuple[int, int]]) -> Tuple[Tuple, List[Tuple[int, str, float]]]:
+        """
+        Prüft eine Rezept-Zeile vor dem Speichern auf Beinahe-Duplikate
+        
+        Gibt es kein Rezept mit genau diesem Namen, aber eines mit mindestens
+        ZUSAMMENFUEHREN_SCHWELLE Ähnlichkeit (z.B. gleicher normalisierter
+        Name), wird die Zeile auf dessen Namen umgeschrieben. Der Aufrufer
+        speichert eine so umbenannte Zeile nicht: Das vorhandene Rezept
+        bleibt mit Zutaten, Zubereitung und Allergenen unverändert.
+        
+        Returns:
+            tuple: (ggf. umbenannte Zeile, übrige ähnliche Rezepte zum Markieren)
+        """
+        name = zeile[0]
+        treffer = self._bewerte_aehnliche(cursor, name, zutaten, schluessel=schluessel)
+        if treffer and all(t[1] != name for t in treffer) and treffer[0][2] >= ZUSAMMENFUEHREN_SCHWELLE:
+            zeile = (treffer[0][1],) + tuple(zeile[1:])
+        return zeile, [t for t in treffer if t[1] != zeile[0]]
+    
+    def _markiere_duplikate(self, cursor: sqlite3.Cursor, rezept_id: int,
+                            treffer: List[Tuple[int, str, float]]):
+        """Ersetzt die Duplikat-Hinweise eines Rezepts"""
+        cursor.execute("DELETE FROM rezept_duplikate WHERE rezept_id = ?", (rezept_id,))
+        cursor.executemany(
+            "INSERT OR REPLACE INTO rezept_duplikate (rezept_id, aehnlich_zu, aehnlichkeit) VALUES (?, ?, ?)",
+            [(rezept_id, andere_id, wert) for andere_id, _, wert in treffer if andere_id != rezept_id]
+        )
+    
+    def schreib_version(self) -> int:
+        """
+        Gibt den aktuellen Stand des Änderungszählers zurück
+        
+        Returns:
+            int: Wird bei jeder Änderung an einem Rezept erhöht
+        """
+        cursor = self._verbindung().execute(
+            "SELECT wert FROM db_meta WHERE schluessel = 'schreib_version'"
+        )
+        version = cursor.fetchone()[0]
+        cursor.close()
+        return version
+    
+    def _erstelle_volltext_index(self, cursor: sqlite3.Cursor) -> bool:
+        """
+        Legt den FTS5-Index samt Synchronisations-Triggern an
+        
+        Beim ersten Anlegen werden alle vorhandenen Rezepte indiziert.
+        
+        Returns:
+            bool: False, wenn SQLite ohne FTS5 gebaut ist (Suche per LIKE)
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'rezepte_fts'")
+        vorhanden = cursor.fetchone() is not None
+        try:
+            cursor.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS rezepte_fts USING fts5(
+                    name, zutaten, zubereitung, tags,
+                    tokenize = '{FTS_TOKENIZER}',
+                    prefix = '{FTS_PRAEFIXE}'
+                )
+            """)
+        except sqlite3.OperationalError:
+            return False
+        
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS rezepte_fts_insert AFTER INSERT ON rezepte BEGIN
+                INSERT INTO rezepte_fts (rowid, name, zutaten, zubereitung, tags)
+                VALUES (new.id, {_FTS_WERTE.format(z="new")});
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS rezepte_fts_update
+            AFTER UPDATE OF name, zutaten, zubereitung, tags ON rezepte BEGIN
+                DELETE FROM rezepte_fts WHERE rowid = old.id;
+                INSERT INTO rezepte_fts (rowid, name, zutaten, zubereitung, tags)
+                VALUES (new.id, {_FTS_WERTE.format(z="new")});
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS rezepte_fts_delete AFTER DELETE ON rezepte BEGIN
+                DELETE FROM rezepte_fts WHERE rowid = old.id;
+            END
+        """)
+        
+        if not vorhanden:
+            cursor.execute(f"""
+                INSERT INTO rezepte_fts (rowid, name, zutaten, zubereitung, tags)
+                SELECT r.id, {_FTS_WERTE.format(z="r")} FROM rezepte r
+            """)
+        return True
+    
+    def _rezept_zeile(self, rezept: Dict, tags: List[str] = None) -> Tuple:
+        """
+        Wandelt ein Rezept in die Spaltenwerte für _UPSERT_SQL um
         
         Args:
             rezept (dict): Rezept-Daten
             tags (list): Optional, zusätzliche Tags
             
         Returns:
-            int: ID des gespeicherten Rezepts
+            tuple: Werte in Spaltenreihenfolge von REZEPT_SPALTEN
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         # Extrahiere Felder
         name = rezept.get('name', 'Unbekannt')
         menu_linie = rezept.get('menu', '')
@@ -125,53 +659,165 @@ class RezeptDatenbank:
         
         tags_str = json.dumps(list(set(auto_tags)), ensure_ascii=False)
         
-        # Prüfe ob Rezept bereits existiert
-        cursor.execute("SELECT id FROM rezepte WHERE name = ?", (name,))
-        existing = cursor.fetchone()
-        
-        if existing:
-            # Update bestehendes Rezept
-            rezept_id = existing[0]
-            cursor.execute("""
-                UPDATE rezepte SET
-                    menu_linie = ?,
-                    portionen = ?,
-                    vorbereitung = ?,
-                    garzeit = ?,
-                    gesamtzeit = ?,
-                    zutaten = ?,
-                    zubereitung = ?,
-                    naehrwerte = ?,
-                    allergene = ?,
-                    tipps = ?,
-                    variationen = ?,
-                    tags = ?
-                WHERE id = ?
-            """, (menu_linie, portionen, vorbereitung, garzeit, gesamtzeit,
-                  zutaten, zubereitung, naehrwerte, allergene, tipps, 
-                  variationen, tags_str, rezept_id))
+        # Gericht-Schlüssel: vom Generator gesetzt, sonst aus dem Namen
+        if rezept.get('gericht_schluessel'):
+            gericht_schluessel = rezept['gericht_schluessel']
+        elif rezept.get('hauptgericht'):
+            gericht_schluessel = erstelle_gericht_schluessel(rezept['hauptgericht'], rezept.get('beilagen'))
         else:
-            # Neues Rezept
-            cursor.execute("""
-                INSERT INTO rezepte (
-                    name, menu_linie, portionen, vorbereitung, garzeit, gesamtzeit,
-                    zutaten, zubereitung, naehrwerte, allergene, tipps, 
-                    variationen, tags
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (name, menu_linie, portionen, vorbereitung, garzeit, gesamtzeit,
-                  zutaten, zubereitung, naehrwerte, allergene, tipps, 
-                  variationen, tags_str))
-            rezept_id = cursor.lastrowid
-        
-        conn.commit()
-        conn.close()
+            gericht_schluessel = _gericht_schluessel_aus_name(name)
+        
+        return (name, menu_linie, portionen, vorbereitung, garzeit, gesamtzeit,
+                zutaten, zubereitung, naehrwerte, allergene, tipps,
+                variationen, tags_str, gericht_schluessel)
+    
+    def _entferne_doppelte_namen(self, cursor: sqlite3.Cursor):
+        """
+        Migration: Führt Rezepte mit gleichem Namen zusammen (ältere
+        Datenbanken hatten keinen eindeutigen Index auf name)
+        
+        Das älteste Rezept bleibt erhalten und übernimmt Verwendungen und
+        Nutzerdaten der Duplikate: die beste Bewertung, die Summe der
+        Verwendungen, die letzte Verwendung und alle Notizen.
+        """
+        cursor.execute("""
+            SELECT r.id, (SELECT MIN(d.id) FROM rezepte d WHERE d.name = r.name)
+            FROM rezepte r
+            WHERE r.id > (SELECT MIN(d.id) FROM rezepte d WHERE d.name = r.name)
+        """)
+        duplikate = cursor.fetchall()
+        if not duplikate:
+            return
+        cursor.executemany("""
+            UPDATE rezepte SET
+                bewertung = (SELECT MAX(d.bewertung) FROM rezepte d WHERE d.name = rezepte.name),
+                verwendet_count = (SELECT SUM(d.verwendet_count) FROM rezepte d WHERE d.name = rezepte.name),
+                zuletzt_verwendet = (SELECT MAX(d.zuletzt_verwendet) FROM rezepte d WHERE d.name = rezepte.name),
+                notizen = (
+                    SELECT group_concat(n.notizen, char(10)) FROM (
+                        SELECT d.notizen FROM rezepte d
+                        WHERE d.name = rezepte.name AND trim(COALESCE(d.notizen, '')) <> ''
+                        ORDER BY d.id
+                    ) n
+                )
+            WHERE id = ?
+        """, [(behalten,) for behalten in sorted({behalten for _, behalten in duplikate})])
+        cursor.executemany(
+            "UPDATE verwendungen SET rezept_id = ? WHERE rezept_id = ?",
+            [(behalten, doppelt) for doppelt, behalten in duplikate]
+        )
+        cursor.executemany(
+            "DELETE FROM rezepte WHERE id = ?",
+            [(doppelt,) for doppelt, _ in duplikate]
+        )
+    
+    def speichere_rezept(self, rezept: Dict, tags: List[str] = None) -> int:
+        """
+        Speichert ein Rezept in der Datenbank
+        
+        Ein Beinahe-Duplikat eines vorhandenen Rezepts (siehe
+        _loese_duplikate_auf) wird nicht gespeichert; zurück kommt die ID des
+        vorhandenen Rezepts, dessen Inhalt unverändert bleibt.
+        
+        Args:
+            rezept (dict): Rezept-Daten
+            tags (list): Optional, zusätzliche Tags
+            
+        Returns:
+            int: ID des gespeicherten bzw. vorhandenen Rezepts
+        """
+        zeile = self._rezept_zeile(rezept, tags)
+        zutaten = rezept.get('zutaten', [])
+        schluessel = index_schluessel(zeile[0], zutaten)
+        
+        with self._transaktion() as cursor:
+            name = zeile[0]
+            zeile, aehnliche = self._loese_duplikate_auf(cursor, zeile, zutaten, schluessel)
+            if zeile[0] != name:
+                cursor.execute("SELECT id FROM rezepte WHERE name = ?", (zeile[0],))
+                return cursor.fetchone()[0]
+            cursor.execute(_UPSERT_SQL, zeile)
+            cursor.execute("SELECT id FROM rezepte WHERE name = ?", (zeile[0],))
+            rezept_id = cursor.fetchone()[0]
+            self._indexiere(cursor, rezept_id, schluessel)
+            self._markiere_duplikate(cursor, rezept_id, aehnliche)
         
+        self._vergiss(rezept_id)
         return rezept_id
     
+    def speichere_rezepte_bulk(self, rezepte: List[Dict],
+                               tags: List[str] = None) -> Tuple[int, int]:
+        """
+        Speichert viele Rezepte in einer einzigen Transaktion
+        
+        Bestehende Rezepte (gleicher Name) werden aktualisiert. Statt eines
+        Commits pro Rezept gibt es nur einen - ein Import mit tausenden
+        Rezepten dauert so Sekunden statt Minuten. Beinahe-Duplikate werden
+        wie in speichere_rezept zusammengeführt (nicht gespeichert) bzw.
+        markiert.
+        
+        Args:
+            rezepte (list): Liste von Rezept-Dictionaries
+            tags (list): Optional, zusätzliche Tags für alle Rezepte
+            
+        Returns:
+            tuple: (eingefuegt, aktualisiert oder zusammengeführt)
+        """
+        if not rezepte:
+            return 0, 0
+        
+        with self._transaktion() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM rezepte")
+            vorher = cursor.fetchone()[0]
+            
+            # Duplikate gegen den Bestand auflösen; innerhalb des Stapels
+            # werden gleich normalisierte Namen auf den ersten abgebildet.
+            # Umbenannte (zusammengeführte) Zeilen werden nicht geschrieben
+            zeilen = []
+            aehnliche = {}
+            schluessel_je_name = {}
+            erster_name = {}
+            for rezept in rezepte:
+                zeile = self._rezept_zeile(rezept, tags)
+                zutaten = rezept.get('zutaten', [])
+                name = zeile[0]
+                schluessel = index_schluessel(name, zutaten)
+                normalisiert = normalisiere_name(name)
+                if normalisiert in erster_name:
+                    zeile = (erster_name[normalisiert],) + zeile[1:]
+                else:
+                    zeile, treffer = self._loese_duplikate_auf(cursor, zeile, zutaten, schluessel)
+                    aehnliche[zeile[0]] = treffer
+                    erster_name[normalisiert] = zeile[0]
+                if zeile[0] != name:
+                    continue
+                zeilen.append(zeile)
+                schluessel_je_name[zeile[0]] = schluessel
+            
+            cursor.executemany(_UPSERT_SQL, zeilen)
+            cursor.execute("SELECT COUNT(*) FROM rezepte")
+            eingefuegt = cursor.fetchone()[0] - vorher
+            
+            namen = list(schluessel_je_name)
+            for start in range(0, len(namen), MAX_IDS_PRO_ABFRAGE):
+                teil = namen[start:start + MAX_IDS_PRO_ABFRAGE]
+                cursor.execute(
+                    f"SELECT id, name FROM rezepte WHERE name IN ({', '.join('?' for _ in teil)})", teil
+                )
+                for rezept_id, name in cursor.fetchall():
+                    self._indexiere(cursor, rezept_id, schluessel_je_name[name])
+                    self._markiere_duplikate(cursor, rezept_id, aehnliche.get(name, []))
+        
+        self._vergiss()
+        return eingefuegt, len(rezepte) - eingefuegt
+    
     def speichere_alle_rezepte(self, rezepte_data: Dict) -> int:
         """
         Speichert alle Rezepte aus einer Generierung
         
+        Rezepte, die aus der Bibliothek übernommen wurden ('aus_bibliothek'),
+        sind bereits gespeichert und werden übersprungen.
+        
         Args:
             rezepte_data (dict): Dictionary mit 'rezepte'-Liste
             
@@ -181,63 +827,216 @@ class RezeptDatenbank:
         if not rezepte_data or 'rezepte' not in rezepte_data:
             return 0
         
-        count = 0
-        for rezept in rezepte_data['rezepte']:
-            self.speichere_rezept(rezept)
-            count += 1
-        
-        return count
+        neue = [r for r in rezepte_data['rezepte'] if not r.get('aus_bibliothek')]
+        eingefuegt, aktualisiert = self.speichere_rezepte_bulk(neue)
+        return eingefuegt + aktualisiert
     
     def suche_rezepte(self, suchbegriff: str = "", tags: List[str] = None,
-                      limit: int = 50) -> List[Dict]:
+                      limit: int = 50, ohne_allergene: List[str] = None) -> List[Dict]:
         """
         Sucht Rezepte nach Namen, Zutaten oder Tags
         
+        Zuerst kommen die Volltext-Treffer nach Relevanz, danach weitere
+        Rezepte, die den Suchbegriff als Teilstring in Name oder Zutaten
+        enthalten.
+        
         Args:
             suchbegriff (str): Suchbegriff für Name
-            tags (list): Tags zum Filtern
+            tags (list): Tags zum Filtern (alle müssen vorhanden sein)
             limit (int): Maximum Anzahl Ergebnisse
+            ohne_allergene (list): Rezepte mit einem dieser Allergene ausschließen
             
         Returns:
             list: Liste von Rezept-Dictionaries
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        cursor = self._verbindung().cursor()
+        cursor.row_factory = sqlite3.Row
         
-        query = "SELECT * FROM rezepte WHERE 1=1"
-        params = []
+        filter_sql, filter_params = self._filter_bedingungen(tags, ohne_allergene)
         
-        if suchbegriff:
-            query += " AND (name LIKE ? OR zutaten LIKE ?)"
-            params.extend([f"%{suchbegriff}%", f"%{suchbegriff}%"])
+        rows = []
+        fts_abfrage = erstelle_fts_abfrage(suchbegriff) if self.volltext else None
+        if fts_abfrage:
+            # Volltextsuche, nach BM25-Relevanz sortiert
+            query = """
+                SELECT r.* FROM rezepte_fts
+                JOIN rezepte r ON r.id = rezepte_fts.rowid
+                WHERE rezepte_fts MATCH ?
+            """
+            query += filter_sql
+            params = [fts_abfrage] + filter_params
+            query += f" ORDER BY bm25(rezepte_fts, {', '.join(map(str, FTS_GEWICHTE))}), r.verwendet_count DESC LIMIT ?"
+            params.append(limit)
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
         
-        if tags:
-            for tag in tags:
-                query += " AND tags LIKE ?"
-                params.append(f"%{tag.lower()}%")
+        if len(rows) < limit:
+            # Teilstring-Suche ergänzt die Volltext-Treffer um Wortteile mitten
+            # im Kompositum ("gulasch" -> "Rindergulasch"); ohne Suchbegriff
+            # oder ohne FTS5 ist sie die einzige Suche
+            query = "SELECT * FROM rezepte r WHERE 1=1"
+            params = []
+            
+            if suchbegriff:
+                teil_sql, teil_params = self._teilstring_bedingung(suchbegriff)
+                query += f" AND {teil_sql}"
+                params.extend(teil_params)
+            if rows:
+                query += f" AND r.id NOT IN ({', '.join('?' for _ in rows)})"
+                params.extend(row['id'] for row in rows)
+            
+            query += filter_sql
+            params.extend(filter_params)
+            
+            query += " ORDER BY r.verwendet_count DESC, r.erstellt_am DESC LIMIT ?"
+            params.append(limit - len(rows))
+            
+            cursor.execute(query, params)
+            rows += cursor.fetchall()
+        
+        rezepte = [self._dekodiere(row) for row in rows]
+        
+        cursor.close()
+        return rezepte
+    
+    @staticmethod
+    def _dekodiere(row: sqlite3.Row) -> Dict:
+        """Wandelt eine Zeile der Tabelle rezepte in ein Rezept-Dictionary um"""
+        rezept = dict(row)
+        # Parse JSON-Felder
+        rezept['zutaten'] = json.loads(rezept['zutaten'])
+        rezept['zubereitung'] = json.loads(rezept['zubereitung'])
+        rezept['naehrwerte'] = json.loads(rezept['naehrwerte'])
+        rezept['allergene'] = json.loads(rezept['allergene'])
+        rezept['tipps'] = json.loads(rezept['tipps']) if rezept['tipps'] else []
+        rezept['variationen'] = json.loads(rezept['variationen']) if rezept['variationen'] else {}
+        rezept['tags'] = json.loads(rezept['tags']) if rezept['tags'] else []
+        return rezept
+    
+    def hole_rezept_seite(self, suchbegriff: str = "", tags: List[str] = None,
+                          ohne_allergene: List[str] = None, min_bewertung: int = 0,
+                          sortierung: str = "neueste", nach: Optional[Tuple] = None,
+                          seitengroesse: int = SEITENGROESSE) -> Tuple[List[Dict], Optional[Tuple]]:
+        """
+        Holt eine Seite von Rezept-Zusammenfassungen (Keyset-Pagination)
+        
+        Sortiert und begrenzt wird in SQL; die JSON-Felder werden nicht
+        dekodiert (Details über hole_rezept).
+        
+        Args:
+            suchbegriff (str): Suchbegriff (Volltext, sonst Teilstring)
+            tags (list): Tags zum Filtern
+            ohne_allergene (list): Auszuschließende Allergene
+            min_bewertung (int): Mindestbewertung (z.B. 4 für Favoriten)
+            sortierung (str): Schlüssel aus SEITEN_SORTIERUNGEN
+            nach (tuple): Cursor der vorherigen Seite oder None für die erste
+            seitengroesse (int): Rezepte pro Seite
+            
+        Returns:
+            tuple: (Zusammenfassungen, Cursor der nächsten Seite oder None)
+        """
+        ausdruck, richtung = SEITEN_SORTIERUNGEN.get(sortierung, SEITEN_SORTIERUNGEN["neueste"])
+        cursor = self._verbindung().cursor()
+        cursor.row_factory = sqlite3.Row
         
-        query += " ORDER BY verwendet_count DESC, erstellt_am DESC LIMIT ?"
-        params.append(limit)
+        filter_sql, params = self._seiten_filter(cursor, suchbegriff, tags, ohne_allergene, min_bewertung)
+        query = f"SELECT {_ZUSAMMENFASSUNG_SPALTEN}, {ausdruck} AS sortwert FROM rezepte r WHERE 1=1{filter_sql}"
+        if nach is not None:
+            query += f" AND ({ausdruck}, r.id) {'<' if richtung == 'DESC' else '>'} (?, ?)"
+            params.extend(nach)
+        query += f" ORDER BY {ausdruck} {richtung}, r.id {richtung} LIMIT ?"
+        params.append(seitengroesse + 1)
         
         cursor.execute(query, params)
-        rows = cursor.fetchall()
+        rows = [dict(row) for row in cursor.fetchall()]
+        cursor.close()
         
-        rezepte = []
+        naechste = None
+        if len(rows) > seitengroesse:
+            rows = rows[:seitengroesse]
+            naechste = (rows[-1]['sortwert'], rows[-1]['id'])
         for row in rows:
-            rezept = dict(row)
-            # Parse JSON-Felder
-            rezept['zutaten'] = json.loads(rezept['zutaten'])
-            rezept['zubereitung'] = json.loads(rezept['zubereitung'])
-            rezept['naehrwerte'] = json.loads(rezept['naehrwerte'])
-            rezept['allergene'] = json.loads(rezept['allergene'])
-            rezept['tipps'] = json.loads(rezept['tipps']) if rezept['tipps'] else []
-            rezept['variationen'] = json.loads(rezept['variationen']) if rezept['variationen'] else {}
-            rezept['tags'] = json.loads(rezept['tags']) if rezept['tags'] else []
-            rezepte.append(rezept)
-        
-        conn.close()
-        return rezepte
+            del row['sortwert']
+        return rows, naechste
+    
+    def zaehle_rezepte(self, suchbegriff: str = "", tags: List[str] = None,
+                       ohne_allergene: List[str] = None, min_bewertung: int = 0) -> int:
+        """
+        Zählt die Rezepte, die den Filtern von hole_rezept_seite entsprechen
+        
+        Returns:
+            int: Anzahl Treffer
+        """
+        cursor = self._verbindung().cursor()
+        filter_sql, params = self._seiten_filter(cursor, suchbegriff, tags, ohne_allergene, min_bewertung)
+        cursor.execute(f"SELECT COUNT(*) FROM rezepte r WHERE 1=1{filter_sql}", params)
+        anzahl = cursor.fetchone()[0]
+        cursor.close()
+        return anzahl
+    
+    def _seiten_filter(self, cursor: sqlite3.Cursor, suchbegriff: str, tags: List[str],
+                       ohne_allergene: List[str], min_bewertung: int) -> Tuple[str, List]:
+        """
+        Baut die Filter für hole_rezept_seite/zaehle_rezepte (Alias r = rezepte)
+        
+        Der Suchbegriff filtert über den FTS5-Index oder - für Wortteile im
+        Kompositum - per Teilstring in Name und Zutaten.
+        
+        Returns:
+            tuple: (SQL-Fragment mit führendem AND, Parameter)
+        """
+        sql, params = self._filter_bedingungen(tags, ohne_allergene)
+        if min_bewertung:
+            sql += " AND COALESCE(r.bewertung, 0) >= ?"
+            params.append(min_bewertung)
+        
+        if suchbegriff:
+            teil_sql, teil_params = self._teilstring_bedingung(suchbegriff)
+            fts_abfrage = erstelle_fts_abfrage(suchbegriff) if self.volltext else None
+            if fts_abfrage:
+                sql += f" AND (r.id IN (SELECT rowid FROM rezepte_fts WHERE rezepte_fts MATCH ?) OR {teil_sql})"
+                params.append(fts_abfrage)
+            else:
+                sql += f" AND {teil_sql}"
+            params.extend(teil_params)
+        return sql, params
+    
+    @staticmethod
+    def _teilstring_bedingung(suchbegriff: str) -> Tuple[str, List]:
+        """
+        Teilstring-Suche in Name und Zutaten (Alias r = rezepte)
+        
+        Jedes Wort des Suchbegriffs muss vorkommen, auch mitten in einem
+        Kompositum, das der FTS5-Index nur als ganzes Wort kennt.
+        
+        Returns:
+            tuple: (SQL-Bedingung, Parameter)
+        """
+        woerter = re.findall(r"\w+", suchbegriff) or [suchbegriff]
+        bedingung = " AND ".join("(r.name LIKE ? OR r.zutaten LIKE ?)" for _ in woerter)
+        return f"({bedingung})", [f"%{wort}%" for wort in woerter for _ in range(2)]
+    
+    def _filter_bedingungen(self, tags: List[str] = None,
+                            ohne_allergene: List[str] = None) -> Tuple[str, List]:
+        """
+        Baut die Tag- und Allergen-Filter als SQL-Bedingungen (Alias r = rezepte)
+        
+        Returns:
+            tuple: (SQL-Fragment mit führendem AND, Parameter)
+        """
+        sql = ""
+        params = []
+        for tag in tags or []:
+            sql += " AND EXISTS (SELECT 1 FROM rezept_tags t WHERE t.rezept_id = r.id AND t.tag = ?)"
+            params.append(tag.strip().lower())
+        if ohne_allergene:
+            platzhalter = ", ".join("?" for _ in ohne_allergene)
+            sql += (
+                " AND NOT EXISTS (SELECT 1 FROM rezept_allergene a"
+                f" WHERE a.rezept_id = r.id AND a.allergen IN ({platzhalter}))"
+            )
+            params.extend(a.strip().lower() for a in ohne_allergene)
+        return sql, params
     
     def hole_rezept(self, rezept_id: int) -> Optional[Dict]:
         """
@@ -249,11 +1048,116 @@ class RezeptDatenbank:
         Returns:
             dict: Rezept-Daten oder None
         """
-        rezepte = self.suche_rezepte()
-        for rezept in rezepte:
-            if rezept['id'] == rezept_id:
-                return rezept
-        return None
+        return self.hole_rezepte([rezept_id]).get(rezept_id)
+    
+    def hole_rezepte(self, rezept_ids: List[int]) -> Dict[int, Dict]:
+        """
+        Holt mehrere Rezepte über ihre IDs
+        
+        Bereits dekodierte Rezepte kommen aus dem LRU-Cache, die übrigen
+        werden mit einer Abfrage (WHERE id IN ...) gelesen.
+        
+        Args:
+            rezept_ids (list): IDs der Rezepte
+            
+        Returns:
+            dict: ID -> Rezept-Daten (unbekannte IDs fehlen)
+        """
+        gefunden: Dict[int, Dict] = {}
+        fehlend = []
+        with self._cache_lock:
+            for rezept_id in dict.fromkeys(rezept_ids):
+                if rezept_id in self._cache:
+                    self._cache.move_to_end(rezept_id)
+                    gefunden[rezept_id] = self._cache[rezept_id]
+                else:
+                    fehlend.append(rezept_id)
+        
+        if fehlend:
+            cursor = self._verbindung().cursor()
+            cursor.row_factory = sqlite3.Row
+            geladen = {}
+            for start in range(0, len(fehlend), MAX_IDS_PRO_ABFRAGE):
+                teil = fehlend[start:start + MAX_IDS_PRO_ABFRAGE]
+                cursor.execute(
+                    f"SELECT * FROM rezepte WHERE id IN ({', '.join('?' for _ in teil)})", teil
+                )
+                for row in cursor.fetchall():
+                    geladen[row['id']] = self._dekodiere(row)
+            cursor.close()
+            gefunden.update(geladen)
+            self._merke(geladen)
+        
+        # Kopien, damit Änderungen des Aufrufers den Cache nicht verfälschen
+        return {
+            rezept_id: copy.deepcopy(gefunden[rezept_id])
+            for rezept_id in rezept_ids if rezept_id in gefunden
+        }
+    
+    def _merke(self, rezepte: Dict[int, Dict]):
+        """Legt dekodierte Rezepte im LRU-Cache ab"""
+        if self.cache_groesse <= 0:
+            return
+        with self._cache_lock:
+            for rezept_id, rezept in rezepte.items():
+                self._cache[rezept_id] = rezept
+                self._cache.move_to_end(rezept_id)
+            while len(self._cache) > self.cache_groesse:
+                self._cache.popitem(last=False)
+    
+    def _vergiss(self, rezept_id: Optional[int] = None):
+        """Entfernt ein Rezept (oder ohne ID alle) aus dem LRU-Cache"""
+        with self._cache_lock:
+            if rezept_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(rezept_id, None)
+    
+    def hole_bibliotheks_rezepte(self, schluessel: List[str],
+                                 min_bewertung: int = BIBLIOTHEK_MIN_BEWERTUNG) -> Dict[str, Dict]:
+        """
+        Sucht für Gerichte eines Speiseplans bereits gespeicherte Rezepte
+        
+        Pro Gericht-Schlüssel wird das am besten bewertete (bei Gleichstand
+        das meistverwendete) Rezept gewählt. Die Rezepte haben die Form der
+        Generator-Ausgabe (menu, zeiten) und sind mit 'aus_bibliothek' und
+        'bibliothek_id' gekennzeichnet.
+        
+        Args:
+            schluessel (list): Gericht-Schlüssel (siehe erstelle_gericht_schluessel)
+            min_bewertung (int): Mindestbewertung (0 = auch unbewertete)
+            
+        Returns:
+            dict: Gericht-Schlüssel -> Rezept (nur Treffer)
+        """
+        schluessel = list(dict.fromkeys(schluessel))
+        cursor = self._verbindung().cursor()
+        cursor.row_factory = sqlite3.Row
+        
+        treffer = {}
+        for start in range(0, len(schluessel), MAX_IDS_PRO_ABFRAGE):
+            teil = schluessel[start:start + MAX_IDS_PRO_ABFRAGE]
+            cursor.execute(f"""
+                SELECT * FROM rezepte
+                WHERE gericht_schluessel IN ({', '.join('?' for _ in teil)})
+                  AND COALESCE(bewertung, 0) >= ?
+                ORDER BY COALESCE(bewertung, 0) DESC, COALESCE(verwendet_count, 0) DESC, id DESC
+            """, teil + [min_bewertung])
+            for row in cursor.fetchall():
+                if row['gericht_schluessel'] in treffer:
+                    continue
+                rezept = self._dekodiere(row)
+                rezept['menu'] = rezept['menu_linie'] or ''
+                rezept['zeiten'] = {
+                    'vorbereitung': rezept['vorbereitung'] or '',
+                    'garzeit': rezept['garzeit'] or '',
+                    'gesamt': rezept['gesamtzeit'] or ''
+                }
+                rezept['aus_bibliothek'] = True
+                rezept['bibliothek_id'] = rezept['id']
+                treffer[row['gericht_schluessel']] = rezept
+        cursor.close()
+        return treffer
     
     def markiere_als_verwendet(self, rezept_id: int, speiseplan_info: str = ""):
         """
@@ -263,25 +1167,22 @@ class RezeptDatenbank:
             rezept_id (int): ID des Rezepts
             speiseplan_info (str): Optional, Info zum Speiseplan
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Inkrementiere Counter
-        cursor.execute("""
-            UPDATE rezepte SET
-                verwendet_count = verwendet_count + 1,
-                zuletzt_verwendet = CURRENT_TIMESTAMP
-            WHERE id = ?
-        """, (rezept_id,))
-        
-        # Füge Verwendungs-Eintrag hinzu
-        cursor.execute("""
-            INSERT INTO verwendungen (rezept_id, speiseplan_info)
-            VALUES (?, ?)
-        """, (rezept_id, speiseplan_info))
+        with self._transaktion() as cursor:
+            # Inkrementiere Counter
+            cursor.execute("""
+                UPDATE rezepte SET
+                    verwendet_count = verwendet_count + 1,
+                    zuletzt_verwendet = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, (rezept_id,))
+            
+            # Füge Verwendungs-Eintrag hinzu
+            cursor.execute("""
+                INSERT INTO verwendungen (rezept_id, speiseplan_info)
+                VALUES (?, ?)
+            """, (rezept_id, speiseplan_info))
         
-        conn.commit()
-        conn.close()
+        self._vergiss(rezept_id)
     
     def bewerte_rezept(self, rezept_id: int, bewertung: int):
         """
@@ -294,15 +1195,12 @@ class RezeptDatenbank:
         if bewertung < 1 or bewertung > 5:
             return
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            UPDATE rezepte SET bewertung = ? WHERE id = ?
-        """, (bewertung, rezept_id))
+        with self._transaktion() as cursor:
+            cursor.execute("""
+                UPDATE rezepte SET bewertung = ? WHERE id = ?
+            """, (bewertung, rezept_id))
         
-        conn.commit()
-        conn.close()
+        self._vergiss(rezept_id)
     
     def loesche_rezept(self, rezept_id: int):
         """
@@ -311,24 +1209,35 @@ class RezeptDatenbank:
         Args:
             rezept_id (int): ID des Rezepts
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("DELETE FROM verwendungen WHERE rezept_id = ?", (rezept_id,))
-        cursor.execute("DELETE FROM rezepte WHERE id = ?", (rezept_id,))
+        with self._transaktion() as cursor:
+            cursor.execute("DELETE FROM verwendungen WHERE rezept_id = ?", (rezept_id,))
+            cursor.execute("DELETE FROM rezepte WHERE id = ?", (rezept_id,))
         
-        conn.commit()
-        conn.close()
+        self._vergiss(rezept_id)
     
     def hole_statistiken(self) -> Dict:
         """
         Holt Statistiken über die Datenbank
         
+        Die Statistiken werden nur nach einer Änderung (neue Schreib-Version)
+        neu berechnet; sonst kostet der Aufruf eine einzige Abfrage.
+        
         Returns:
             dict: Statistiken
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        version = self.schreib_version()
+        with self._cache_lock:
+            if self._statistiken and self._statistiken[0] == version:
+                return copy.deepcopy(self._statistiken[1])
+        
+        statistiken = self._berechne_statistiken()
+        with self._cache_lock:
+            self._statistiken = (version, statistiken)
+        return copy.deepcopy(statistiken)
+    
+    def _berechne_statistiken(self) -> Dict:
+        """Berechnet die Statistiken für hole_statistiken"""
+        cursor = self._verbindung().cursor()
         
         # Anzahl Rezepte
         cursor.execute("SELECT COUNT(*) FROM rezepte")
@@ -362,63 +1271,184 @@ class RezeptDatenbank:
         """)
         bestbewertet = cursor.fetchall()
         
-        # Alle Tags
-        cursor.execute("SELECT tags FROM rezepte WHERE tags IS NOT NULL")
-        alle_tags = []
-        for row in cursor.fetchall():
-            if row[0]:
-                tags = json.loads(row[0])
-                alle_tags.extend(tags)
+        # Häufigste Tags
+        cursor.execute("""
+            SELECT tag, COUNT(*) AS anzahl
+            FROM rezept_tags
+            GROUP BY tag
+            ORDER BY anzahl DESC, tag
+            LIMIT 10
+        """)
+        tag_counts = cursor.fetchall()
         
-        from collections import Counter
-        tag_counts = Counter(alle_tags)
+        # Alle Allergene (für den Ausschluss-Filter)
+        cursor.execute("""
+            SELECT allergen, COUNT(*) AS anzahl
+            FROM rezept_allergene
+            GROUP BY allergen
+            ORDER BY anzahl DESC, allergen
+        """)
+        allergen_counts = cursor.fetchall()
         
-        conn.close()
+        cursor.close()
         
         return {
             'anzahl_rezepte': anzahl_rezepte,
             'meistverwendet': meistverwendet,
             'neueste': neueste,
             'bestbewertet': bestbewertet,
-            'tags': dict(tag_counts.most_common(10))
+            'tags': dict(tag_counts),
+            'allergene': dict(allergen_counts)
         }
     
-    def exportiere_als_json(self, dateiname: str = "rezepte_backup.json"):
+    def exportiere_als_json(self, dateiname: str = "rezepte_backup.json",
+                            ndjson: Optional[bool] = None):
         """
-        Exportiert alle Rezepte als JSON
+        Exportiert alle Rezepte als JSON oder NDJSON
+        
+        Die Rezepte werden einzeln gelesen und geschrieben, der Speicherbedarf
+        bleibt also unabhängig von der Größe der Bibliothek. Endet der
+        Dateiname auf ".gz", wird gzip-komprimiert.
         
         Args:
             dateiname (str): Dateiname für Export
+            ndjson (bool): Ein Rezept pro Zeile; None = nach Dateiendung
+                (.ndjson/.jsonl)
         """
-        rezepte = self.suche_rezepte(limit=10000)
+        if ndjson is None:
+            ndjson = _ist_ndjson(dateiname)
+        
+        cursor = self._verbindung().cursor()
+        cursor.row_factory = sqlite3.Row
+        cursor.execute("SELECT * FROM rezepte ORDER BY id")
         
-        with open(dateiname, 'w', encoding='utf-8') as f:
-            json.dump(rezepte, f, ensure_ascii=False, indent=2)
+        with _oeffne(dateiname, 'w') as f:
+            if not ndjson:
+                f.write("[")
+            for i, row in enumerate(cursor):
+                rezept = self._dekodiere(row)
+                if ndjson:
+                    f.write(json.dumps(rezept, ensure_ascii=False))
+                    f.write("\n")
+                else:
+                    f.write(",\n" if i else "\n")
+                    f.write(json.dumps(rezept, ensure_ascii=False, indent=2))
+            if not ndjson:
+                f.write("\n]\n")
         
+        cursor.close()
         return dateiname
     
-    def importiere_aus_json(self, dateiname: str) -> int:
+    def importiere_aus_json(self, dateiname: str,
+                            batch_groesse: int = IMPORT_BATCH_GROESSE) -> int:
         """
-        Importiert Rezepte aus JSON
+        Importiert Rezepte aus JSON oder NDJSON (optional gzip-komprimiert)
+        
+        Die Datei wird gestreamt gelesen und in Transaktionen zu je
+        'batch_groesse' Rezepten gespeichert.
         
         Args:
             dateiname (str): Dateiname zum Import
+            batch_groesse (int): Rezepte pro Transaktion
             
         Returns:
             int: Anzahl importierter Rezepte
         """
-        with open(dateiname, 'r', encoding='utf-8') as f:
-            rezepte = json.load(f)
-        
         count = 0
-        for rezept in rezepte:
-            # Entferne DB-spezifische Felder
-            rezept.pop('id', None)
-            rezept.pop('erstellt_am', None)
-            rezept.pop('verwendet_count', None)
-            rezept.pop('zuletzt_verwendet', None)
-            
-            self.speichere_rezept(rezept)
-            count += 1
+        batch = []
+        with _oeffne(dateiname, 'r') as f:
+            for rezept in _lies_rezepte(f):
+                batch.append(_aus_export(rezept))
+                if len(batch) >= batch_groesse:
+                    count += sum(self.speichere_rezepte_bulk(batch))
+                    batch = []
+        if batch:
+            count += sum(self.speichere_rezepte_bulk(batch))
+        return count
+
+
+def _lade_json(text: Optional[str], standard):
+    """Parst eine JSON-Spalte; leere oder ungültige Werte ergeben 'standard'"""
+    try:
+        return json.loads(text) if text else standard
+    except ValueError:
+        return standard
+
+
+def _ist_ndjson(dateiname: str) -> bool:
+    """True für *.ndjson/*.jsonl (auch mit .gz)"""
+    name = dateiname.lower()
+    if name.endswith(".gz"):
+        name = name[:-3]
+    return name.endswith(NDJSON_ENDUNGEN)
+
+
+def _oeffne(dateiname: str, modus: str) -> IO[str]:
+    """Öffnet eine Export-Datei als Text, bei Endung .gz über gzip"""
+    if dateiname.lower().endswith(".gz"):
+        return gzip.open(dateiname, modus + 't', encoding='utf-8')
+    return open(dateiname, modus, encoding='utf-8')
+
+
+def _lies_rezepte(f: IO[str]) -> Iterator[Dict]:
+    """
+    Liest Rezepte einzeln aus einer Datei
+    
+    Unterstützt NDJSON (ein Objekt pro Zeile) und JSON-Arrays in beliebiger
+    Formatierung. Arrays werden mit JSONDecoder.raw_decode Element für Element
+    aus einem gleitenden Puffer gelesen, ohne die ganze Datei zu laden.
+    """
+    decoder = json.JSONDecoder()
+    puffer = ""
+    ende = False
+    im_array = None
+    
+    while True:
+        puffer = puffer.lstrip()
+        # Trennzeichen zwischen Elementen überspringen
+        if im_array is None and puffer:
+            im_array = puffer.startswith("[")
+            if im_array:
+                puffer = puffer[1:].lstrip()
+        if im_array and puffer.startswith(","):
+            puffer = puffer[1:].lstrip()
+        if im_array and puffer.startswith("]"):
+            return
+        
+        if puffer:
+            try:
+                element, pos = decoder.raw_decode(puffer)
+            except ValueError:
+                if ende:
+                    raise
+            else:
+                # Ein Wert, der bis ans Pufferende reicht, könnte abgeschnitten
+                # sein (z.B. eine Zahl) - erst nach weiterem Lesen übernehmen
+                if pos < len(puffer) or ende:
+                    puffer = puffer[pos:]
+                    if isinstance(element, dict):
+                        yield element
+                    continue
         
-        return count
\ No newline at end of file
+        if ende:
+            return
+        stueck = f.read(IMPORT_PUFFER_ZEICHEN)
+        if not stueck:
+            ende = True
+        puffer += stueck
+
+
+def _aus_export(rezept: Dict) -> Dict:
+    """
+    Bringt ein exportiertes Rezept (Datenbank-Felder) in die Form, die
+    speichere_rezept erwartet (menu, zeiten)
+    """
+    if 'menu' not in rezept and rezept.get('menu_linie'):
+        rezept['menu'] = rezept['menu_linie']
+    if 'zeiten' not in rezept:
+        rezept['zeiten'] = {
+            'vorbereitung': rezept.get('vorbereitung', ''),
+            'garzeit': rezept.get('garzeit', ''),
+            'gesamt': rezept.get('gesamtzeit', '')
+        }
+    return rezept
@@ -0,0 +1,530 @@
+"""
+Schemata für Tag, Woche, Speiseplan, Rezept, Prüfung und Analyse
+Deklarative JSON-Schemata, die als input_schema aufgabenspezifischer Tools
+(return_tag, return_rezepte, ...) an die API gehen und einmalig zu schnellen
+Prüffunktionen mit strukturierten Fehlerpfaden kompiliert werden
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+
+WOCHENTAGE = ["Montag", "Dienstag", "Mittwoch", "Donnerstag", "Freitag", "Samstag", "Sonntag"]
+MIN_BEILAGEN = 2
+
+_TEXT = {"type": "string"}
+_TEXT_LISTE = {"type": "array", "items": _TEXT}
+# Nährwerte kommen je nach Modell als "650 kcal" oder als Zahl
+_MENGE = {"type": ["string", "number"]}
+
+NAEHRWERTE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "kalorien": _MENGE,
+        "protein": _MENGE,
+        "fett": _MENGE,
+        "kohlenhydrate": _MENGE,
+        "ballaststoffe": _MENGE,
+        "salz": _MENGE
+    },
+    "required": ["kalorien", "protein"]
+}
+
+# Frühstück und Abendessen
+MAHLZEIT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "hauptgericht": _TEXT,
+        "beilagen": _TEXT_LISTE,
+        "getraenk": _TEXT
+    },
+    "required": ["hauptgericht"]
+}
+
+MITTAGESSEN_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "vorspeise": _TEXT,
+        "hauptgericht": {"type": "string", "minLength": 1},
+        "beilagen": {"type": "array", "items": _TEXT, "minItems": MIN_BEILAGEN},
+        "nachspeise": _TEXT,
+        "naehrwerte": NAEHRWERTE_SCHEMA,
+        "allergene": _TEXT_LISTE
+    },
+    "required": ["hauptgericht", "beilagen"]
+}
+
+MENU_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "menuName": {"type": "string", "minLength": 1},
+        "fruehstueck": MAHLZEIT_SCHEMA,
+        "mittagessen": MITTAGESSEN_SCHEMA,
+        "zwischenmahlzeit": _TEXT,
+        "abendessen": MAHLZEIT_SCHEMA
+    },
+    "required": ["menuName", "fruehstueck", "mittagessen", "abendessen"]
+}
+
+REZEPT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string", "minLength": 1},
+        "woche": {"type": "integer"},
+        "tag": _TEXT,
+        "menu": _TEXT,
+        "portionen": {"type": ["integer", "string"]},
+        "zeiten": {"type": "object", "properties": {"vorbereitung": _TEXT, "garzeit": _TEXT, "gesamt": _TEXT}},
+        "zutaten": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "properties": {"name": {"type": "string", "minLength": 1}, "menge": _MENGE, "hinweis": _TEXT},
+                "required": ["name", "menge"]
+            }
+        },
+        "zubereitung": {"type": "array", "items": _TEXT, "minItems": 1},
+        "naehrwerte": NAEHRWERTE_SCHEMA,
+        "allergene": _TEXT_LISTE,
+        # streamlit_app fragt Listen/Objekte an, main_app Fließtext - beides ist gültig
+        "tipps": {"type": ["array", "string"], "items": _TEXT},
+        "variationen": {"type": ["object", "string"], "properties": {"pueriert": _TEXT, "leichteKost": _TEXT}},
+        "haccp": {"type": "object", "properties": {"kritische_punkte": _TEXT_LISTE, "lagerung": _TEXT}}
+    },
+    "required": ["name", "zutaten", "zubereitung", "naehrwerte"]
+}
+
+REZEPTE_SCHEMA = {
+    "type": "object",
+    "properties": {"rezepte": {"type": "array", "items": REZEPT_SCHEMA, "minItems": 1}},
+    "required": ["rezepte"]
+}
+
+
+# Verbesserungsvorschlag in Prüfung (prompts.py) und Analyse
+_VORSCHLAG_SCHEMA = {
+    "type": "object",
+    "properties": {"bereich": _TEXT, "problem": _TEXT, "empfehlung": _TEXT},
+    "required": ["bereich", "problem", "empfehlung"]
+}
+
+# Qualitätsprüfung aus prompts.get_pruefung_prompt (streamlit_app)
+PRUEFUNG_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "gesamtbewertung": _TEXT,
+        "punktzahl": _TEXT,
+        "positiveAspekte": _TEXT_LISTE,
+        "abwechslungspruefung": {
+            "type": "object",
+            "properties": {"wiederholungen": _TEXT_LISTE, "bewertung": _TEXT, "anzahlEinzigartigerGerichte": _TEXT},
+            "required": ["wiederholungen", "bewertung"]
+        },
+        "verbesserungsvorschlaege": {"type": "array", "items": _VORSCHLAG_SCHEMA},
+        "naehrstoffanalyse": {
+            "type": "object",
+            "properties": {"protein": _TEXT, "vitamine": _TEXT, "mineralstoffe": _TEXT, "ballaststoffe": _TEXT}
+        },
+        "praxistauglichkeit": {
+            "type": "object",
+            "properties": {"kuechentechnisch": _TEXT, "wirtschaftlichkeit": _TEXT, "personalaufwand": _TEXT}
+        },
+        "fazit": _TEXT
+    },
+    "required": ["gesamtbewertung", "punktzahl", "abwechslungspruefung", "verbesserungsvorschlaege", "fazit"]
+}
+
+# Qualitätsprüfung mit Punkten aus main_app (PromptGenerator.create_validation_prompt)
+PLAN_PRUEFUNG_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "pruefung": {
+            "type": "object",
+            "properties": {
+                "bewertungen": {
+                    "type": "array",
+                    "minItems": 1,
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "kategorie": _TEXT,
+                            "punkte": {"type": "number"},
+                            "max_punkte": {"type": "number"},
+                            "kommentar": _TEXT,
+                            "verbesserungen": _TEXT_LISTE
+                        },
+                        "required": ["kategorie", "punkte", "max_punkte"]
+                    }
+                },
+                "gesamtpunkte": {"type": "number"},
+                "max_gesamtpunkte": {"type": "number"},
+                "note": _TEXT,
+                "fazit": _TEXT,
+                "empfehlungen": _TEXT_LISTE
+            },
+            "required": ["bewertungen", "gesamtpunkte", "max_gesamtpunkte", "note", "fazit"]
+        }
+    },
+    "required": ["pruefung"]
+}
+
+# Analyse eines vorhandenen Speiseplans aus prompts.get_analyse_prompt (menu_analyzer)
+ANALYSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "gefunden": {"type": "boolean"},
+        "anzahl_tage": {"type": "integer"},
+        "anzahl_gerichte": {"type": "integer"},
+        "struktur": _TEXT,
+        "speiseplan": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "tag": _TEXT,
+                    "menues": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "name": _TEXT,
+                                "hauptgericht": _TEXT,
+                                "beilagen": _TEXT_LISTE,
+                                "zusatzinfo": _TEXT
+                            },
+                            "required": ["name", "hauptgericht"]
+                        }
+                    }
+                },
+                "required": ["tag", "menues"]
+            }
+        },
+        "zusammenfassung": _TEXT,
+        "fachliche_bewertung": {
+            "type": "object",
+            "properties": {
+                "abwechslung": _TEXT,
+                "ausgewogenheit": _TEXT,
+                "seniorengerechtigkeit": _TEXT,
+                "saisonalitaet": _TEXT,
+                "gesamtnote": _TEXT
+            }
+        },
+        "empfehlungen_fuer_kuechenmeister": _TEXT_LISTE,
+        "verbesserungsvorschlaege": {"type": "array", "items": _VORSCHLAG_SCHEMA},
+        "besonderheiten": _TEXT_LISTE,
+        "hinweise": _TEXT
+    },
+    "required": ["gefunden", "speiseplan", "zusammenfassung"]
+}
+
+
+def _anzahl(schema: Dict[str, Any], anzahl: Optional[int]) -> Dict[str, Any]:
+    """Array-Schema mit genau 'anzahl' Einträgen (ohne Anzahl unverändert)"""
+    if anzahl is None:
+        return schema
+    return dict(schema, minItems=anzahl, maxItems=anzahl)
+
+
+@lru_cache(maxsize=None)
+def tag_schema(menulinien: Optional[int] = None) -> Dict[str, Any]:
+    """Schema eines Tages, optional mit genau 'menulinien' Menüs"""
+    return {
+        "type": "object",
+        "properties": {
+            "tag": {"type": "string", "enum": WOCHENTAGE},
+            "menues": _anzahl({"type": "array", "items": MENU_SCHEMA}, menulinien)
+        },
+        "required": ["tag", "menues"]
+    }
+
+
+@lru_cache(maxsize=None)
+def woche_schema(menulinien: Optional[int] = None) -> Dict[str, Any]:
+    """Schema einer Woche mit sieben Tagen"""
+    return {
+        "type": "object",
+        "properties": {
+            "woche": {"type": "integer"},
+            "tage": _anzahl({"type": "array", "items": tag_schema(menulinien)}, len(WOCHENTAGE))
+        },
+        "required": ["woche", "tage"]
+    }
+
+
+@lru_cache(maxsize=None)
+def speiseplan_schema(menulinien: Optional[int] = None, wochen: Optional[int] = None) -> Dict[str, Any]:
+    """Schema eines kompletten Speiseplans ({"speiseplan": {"wochen": [...]}})"""
+    wochen_schema = {"type": "array", "items": woche_schema(menulinien), "minItems": 1}
+    return {
+        "type": "object",
+        "properties": {
+            "speiseplan": {
+                "type": "object",
+                "properties": {
+                    "wochen": _anzahl(wochen_schema, wochen),
+                    "menuLinien": {"type": "integer"},
+                    "menuNamen": _TEXT_LISTE
+                },
+                "required": ["wochen"]
+            }
+        },
+        "required": ["speiseplan"]
+    }
+
+
+# ===================== TOOLS =====================
+
+TOOL_TAG = "return_tag"
+TOOL_SPEISEPLAN = "return_speiseplan"
+TOOL_REZEPT = "return_rezept"
+TOOL_REZEPTE = "return_rezepte"
+TOOL_PRUEFUNG = "return_pruefung"
+TOOL_ANALYSE = "return_analyse"
+TOOL_JSON = "return_json"  # untypisiert, für Aufrufe ohne eigenes Schema
+
+_TOOL_BESCHREIBUNGEN = {
+    TOOL_TAG: "Gibt einen Tag des Speiseplans mit allen Menülinien zurück",
+    TOOL_SPEISEPLAN: "Gibt den kompletten Speiseplan zurück",
+    TOOL_REZEPT: "Gibt ein vollständiges Rezept zurück",
+    TOOL_REZEPTE: "Gibt die Rezepte für die Hauptgerichte zurück",
+    TOOL_PRUEFUNG: "Gibt die Qualitätsprüfung des Speiseplans zurück",
+    TOOL_ANALYSE: "Gibt die Analyse des vorhandenen Speiseplans zurück",
+    TOOL_JSON: "Gibt das Ergebnis als JSON-Objekt zurück"
+}
+
+
+def erstelle_tool(name: str, schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Tool-Definition für die Messages-API
+
+    Das Schema beschreibt den Tool-Input direkt, d.h. das Modell liefert
+    z.B. {"tag": ..., "menues": [...]} ohne umschließendes "input"-Feld.
+
+    Args:
+        name (str): Tool-Name (TOOL_*)
+        schema (dict): input_schema; ohne Schema ein beliebiges Objekt
+
+    Returns:
+        dict: name, description und input_schema
+    """
+    return {
+        "name": name,
+        "description": _TOOL_BESCHREIBUNGEN.get(name, _TOOL_BESCHREIBUNGEN[TOOL_JSON]),
+        "input_schema": schema or {"type": "object"}
+    }
+
+
+# ===================== PRÜFFUNKTIONEN =====================
+
+Pfad = Tuple[Union[str, int], ...]
+
+
+@dataclass(frozen=True)
+class SchemaFehler:
+    """Ein Verstoß gegen ein Schema, z.B. pfad=("menues", 1, "mittagessen", "beilagen")"""
+    pfad: Pfad
+    meldung: str
+
+    def unter(self, schluessel: Union[str, int]) -> "SchemaFehler":
+        """Derselbe Fehler eine Ebene tiefer (Pfad mit vorangestelltem Schlüssel)"""
+        return SchemaFehler((schluessel,) + self.pfad, self.meldung)
+
+    def __str__(self) -> str:
+        if not self.pfad:
+            return self.meldung
+        return f"{'/'.join(map(str, self.pfad))}: {self.meldung}"
+
+
+# Prüffunktion: None, wenn der Wert passt, sonst die Fehler (relativ zum Wert)
+Pruefer = Callable[[Any], Optional[List[SchemaFehler]]]
+
+_PYTHON_TYPEN = {
+    "object": (dict,),
+    "array": (list,),
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "null": (type(None),)
+}
+
+
+def _typ_pruefer(typen: Union[str, List[str]]) -> Pruefer:
+    typen = [typen] if isinstance(typen, str) else list(typen)
+    python_typen = tuple(t for name in typen for t in _PYTHON_TYPEN[name])
+    # bool ist in Python ein int, im Schema aber keine Zahl
+    ohne_bool = "boolean" not in typen
+    beschreibung = " oder ".join(typen)
+
+    def pruefe(wert):
+        if isinstance(wert, python_typen) and not (ohne_bool and isinstance(wert, bool)):
+            return None
+        return [SchemaFehler((), f"{beschreibung} erwartet, {type(wert).__name__} erhalten")]
+    return pruefe
+
+
+def _objekt_pruefer(schema: Dict[str, Any]) -> Pruefer:
+    pflicht = tuple(schema.get("required", ()))
+    eigenschaften = tuple(
+        (schluessel, kompiliere(teil)) for schluessel, teil in schema.get("properties", {}).items()
+    )
+
+    def pruefe(wert):
+        fehler = None
+        for schluessel in pflicht:
+            if schluessel not in wert:
+                fehler = fehler or []
+                fehler.append(SchemaFehler((schluessel,), "fehlt"))
+        for schluessel, teil in eigenschaften:
+            if schluessel in wert:
+                teil_fehler = teil(wert[schluessel])
+                if teil_fehler:
+                    fehler = fehler or []
+                    fehler.extend(f.unter(schluessel) for f in teil_fehler)
+        return fehler
+    return pruefe
+
+
+def _liste_pruefer(schema: Dict[str, Any]) -> Pruefer:
+    minimum = schema.get("minItems")
+    maximum = schema.get("maxItems")
+    element = kompiliere(schema["items"]) if "items" in schema else None
+
+    def pruefe(wert):
+        fehler = None
+        if minimum is not None and len(wert) < minimum:
+            fehler = [SchemaFehler((), f"mindestens {minimum} Einträge erwartet, {len(wert)} erhalten")]
+        elif maximum is not None and len(wert) > maximum:
+            fehler = [SchemaFehler((), f"höchstens {maximum} Einträge erwartet, {len(wert)} erhalten")]
+        if element is not None:
+            for idx, eintrag in enumerate(wert):
+                element_fehler = element(eintrag)
+                if element_fehler:
+                    fehler = fehler or []
+                    fehler.extend(f.unter(idx) for f in element_fehler)
+        return fehler
+    return pruefe
+
+
+def kompiliere(schema: Dict[str, Any]) -> Pruefer:
+    """
+    Kompiliert ein JSON-Schema zu einer Prüffunktion
+
+    Unterstützt type, enum, properties, required, items, minItems,
+    maxItems und minLength; andere Schlüsselwörter (z.B. description)
+    werden ignoriert. Die Prüfung baut nur im Fehlerfall Meldungen auf.
+
+    Returns:
+        Pruefer: wert -> None oder Liste von SchemaFehler
+    """
+    typ = _typ_pruefer(schema["type"]) if "type" in schema else None
+    pruefer: List[Pruefer] = []
+
+    if "enum" in schema:
+        erlaubt = tuple(schema["enum"])
+
+        def pruefe_enum(wert):
+            if wert in erlaubt:
+                return None
+            return [SchemaFehler((), f"ungültiger Wert {wert!r}")]
+        pruefer.append(pruefe_enum)
+
+    if "minLength" in schema:
+        mindestlaenge = schema["minLength"]
+
+        def pruefe_laenge(wert):
+            if not isinstance(wert, str) or len(wert.strip()) >= mindestlaenge:
+                return None
+            return [SchemaFehler((), "leer" if not wert.strip() else f"kürzer als {mindestlaenge} Zeichen")]
+        pruefer.append(pruefe_laenge)
+
+    if "properties" in schema or "required" in schema:
+        objekt = _objekt_pruefer(schema)
+        pruefer.append(lambda wert: objekt(wert) if isinstance(wert, dict) else None)
+
+    if "items" in schema or "minItems" in schema or "maxItems" in schema:
+        liste = _liste_pruefer(schema)
+        pruefer.append(lambda wert: liste(wert) if isinstance(wert, list) else None)
+
+    if not pruefer:
+        return typ or (lambda wert: None)
+    if len(pruefer) == 1 and typ is None:
+        return pruefer[0]
+
+    def pruefe(wert):
+        if typ is not None:
+            fehler = typ(wert)
+            if fehler:
+                return fehler
+        fehler = None
+        for teil in pruefer:
+            teil_fehler = teil(wert)
+            if teil_fehler:
+                fehler = (fehler or []) + teil_fehler
+        return fehler
+    return pruefe
+
+
+@lru_cache(maxsize=None)
+def _pruefer(art: str, menulinien: Optional[int] = None) -> Pruefer:
+    """Kompilierte Prüffunktion je Schema (einmal pro Art und Menülinien-Anzahl)"""
+    schemata = {
+        "menu": lambda: MENU_SCHEMA,
+        "tag": lambda: tag_schema(menulinien),
+        "woche": lambda: woche_schema(menulinien),
+        "speiseplan": lambda: speiseplan_schema(menulinien),
+        "rezept": lambda: REZEPT_SCHEMA,
+        "rezepte": lambda: REZEPTE_SCHEMA,
+        "pruefung": lambda: PRUEFUNG_SCHEMA,
+        "plan_pruefung": lambda: PLAN_PRUEFUNG_SCHEMA,
+        "analyse": lambda: ANALYSE_SCHEMA
+    }
+    return kompiliere(schemata[art]())
+
+
+def pruefe_menu(menu: Any) -> List[SchemaFehler]:
+    """Prüft ein einzelnes Menü (eine Menülinie eines Tages)"""
+    return _pruefer("menu")(menu) or []
+
+
+def pruefe_tag(tag: Any, menulinien: Optional[int] = None) -> List[SchemaFehler]:
+    """Prüft einen Tag, optional auf genau 'menulinien' Menüs"""
+    return _pruefer("tag", menulinien)(tag) or []
+
+
+def pruefe_woche(woche: Any, menulinien: Optional[int] = None) -> List[SchemaFehler]:
+    """Prüft eine Woche (sieben Tage)"""
+    return _pruefer("woche", menulinien)(woche) or []
+
+
+def pruefe_speiseplan(speiseplan: Any, menulinien: Optional[int] = None) -> List[SchemaFehler]:
+    """Prüft einen kompletten Speiseplan"""
+    return _pruefer("speiseplan", menulinien)(speiseplan) or []
+
+
+def pruefe_rezept(rezept: Any) -> List[SchemaFehler]:
+    """Prüft ein einzelnes Rezept"""
+    return _pruefer("rezept")(rezept) or []
+
+
+def pruefe_rezepte(ergebnis: Any) -> List[SchemaFehler]:
+    """Prüft eine Rezept-Antwort ({"rezepte": [...]})"""
+    return _pruefer("rezepte")(ergebnis) or []
+
+
+def pruefe_pruefung(ergebnis: Any) -> List[SchemaFehler]:
+    """Prüft eine Qualitätsprüfung (prompts.get_pruefung_prompt)"""
+    return _pruefer("pruefung")(ergebnis) or []
+
+
+def pruefe_plan_pruefung(ergebnis: Any) -> List[SchemaFehler]:
+    """Prüft eine Qualitätsprüfung mit Punkten ({"pruefung": {...}})"""
+    return _pruefer("plan_pruefung")(ergebnis) or []
+
+
+def pruefe_analyse(ergebnis: Any) -> List[SchemaFehler]:
+    """Prüft eine Speiseplan-Analyse (prompts.get_analyse_prompt)"""
+    return _pruefer("analyse")(ergebnis) or []
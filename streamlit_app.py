@@ -1,10 +1,33 @@
 import streamlit as st
 import requests
-import json
-import re
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from io import BytesIO
 import pandas as pd
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from response_cache import ResponseCache, hole_standard_cache
+from rate_limiter import hole_rate_limiter, schaetze_tokens
+from json_stream import StreamSammler
+from antwort_dekoder import QUELLE_TEXT, dekodiere_antwort
+from reparatur_statistik import EREIGNIS_WIEDERHOLUNG, hole_reparatur_statistik
+from schemata import (
+    PRUEFUNG_SCHEMA,
+    REZEPT_SCHEMA,
+    REZEPTE_SCHEMA,
+    TOOL_JSON,
+    TOOL_PRUEFUNG,
+    TOOL_REZEPT,
+    TOOL_REZEPTE,
+    TOOL_SPEISEPLAN,
+    erstelle_tool,
+    pruefe_rezept,
+    speiseplan_schema
+)
+from batch_client import BATCH_API_URL, MessageBatchClient, lese_batch_url
+from rezept_datenbank import BIBLIOTHEK_MIN_BEWERTUNG, RezeptDatenbank, erstelle_gericht_schluessel
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
@@ -16,6 +39,7 @@ from reportlab.lib.enums import TA_CENTER, TA_LEFT
 
 # WICHTIG: Importiere die optimierten Prompts!
 from prompts import get_speiseplan_prompt, get_rezepte_prompt, get_pruefung_prompt, get_analyse_prompt, TOOL_DIRECTIVE
+from prompts import CACHE_TRENNER, erstelle_nachrichten_inhalt
 
 # Import für Menü-Analyse
 from menu_analyzer import (
@@ -32,13 +56,92 @@ API_BASE_URL = "https://api.anthropic.com/v1/messages"
 API_VERSION = "2023-06-01"
 DEFAULT_MODEL = "claude-sonnet-4-20250514"
 API_TIMEOUT = 180
+MAX_PARALLELE_REZEPTE = 4
 
 # ===================== API-FUNKTIONEN =====================
 
-def rufe_claude_api(prompt, api_key, max_tokens=16000, max_retries=3):
+def _lies_stream(response, tool_name, bei_element=None):
+    """
+    Liest eine SSE-Streaming-Response und setzt das Tool-JSON inkrementell zusammen
+    
+    Args:
+        tool_name: Name des angefragten Tools (tool_choice)
+    
+    Returns:
+        (data, sammler, abbruch) - data im Format einer normalen Messages-Response,
+        abbruch ist None oder der Grund für einen vorzeitig beendeten Stream
+    """
+    sammler = StreamSammler(tool_name, bei_element=bei_element)
+    deadline = time.monotonic() + API_TIMEOUT
+    
+    def zeilen():
+        # Gesamt-Timeout, da der Read-Timeout nur pro Chunk greift
+        for zeile in response.iter_lines(decode_unicode=True):
+            if time.monotonic() > deadline:
+                raise requests.exceptions.Timeout()
+            yield zeile
+    
+    abbruch = None
+    response.encoding = 'utf-8'
+    try:
+        with response:
+            sammler.verarbeite_zeilen(zeilen())
+        abbruch = sammler.fehler
+    except requests.exceptions.Timeout:
+        abbruch = "API-Timeout - Stream dauerte zu lange"
+    except requests.exceptions.RequestException as e:
+        abbruch = f"Stream abgebrochen: {str(e)}"
+    
+    tool_input = sammler.ergebnis()
+    if not abbruch and tool_input is None and sammler.stop_reason == 'max_tokens':
+        abbruch = "Antwort bei max_tokens abgeschnitten"
+    
+    if tool_input is not None:
+        content = [{'type': 'tool_use', 'name': tool_name, 'input': tool_input}]
+    else:
+        content = [{'type': 'text', 'text': sammler.text or sammler.tool_json}]
+    return {'content': content, 'usage': sammler.usage}, sammler, abbruch
+
+
+def erstelle_payload(prompt, max_tokens=16000, tool=None):
+    """
+    Erstellt das Messages-Payload mit dem Tool der Aufgabe (auch für Batch-Anfragen)
+    
+    Args:
+        tool: Optional - Tool aus schemata.erstelle_tool (z.B. return_rezept mit
+            REZEPT_SCHEMA); das Schema beschreibt den Tool-Input direkt. Ohne
+            Tool wird das untypisierte return_json verwendet
+    """
+    tool = tool or erstelle_tool(TOOL_JSON)
+    return {
+        "model": DEFAULT_MODEL,
+        "max_tokens": max_tokens,
+        "messages": [{"role": "user", "content": erstelle_nachrichten_inhalt(prompt)}],
+        # Prompt-Caching: Tool-Definition und statischer Prompt-Anfang werden serverseitig gecacht
+        "tools": [dict(tool, cache_control={"type": "ephemeral"})],
+        "tool_choice": {"type": "tool", "name": tool["name"]}
+    }
+
+
+def rufe_claude_api(prompt, api_key, max_tokens=16000, max_retries=3, use_cache=True,
+                    stream=False, bei_element=None, tool=None):
     """
-    Ruft die Claude API mit Tool-Use auf (return_json)
+    Ruft die Claude API mit Tool-Use auf (Tool der Aufgabe, sonst return_json)
     Mit automatischem Retry bei Überlastung
+    
+    Alle Aufrufe laufen über den prozessweiten Rate-Limiter (rate_limiter.py),
+    der Anfragen und Tokens pro Minute proaktiv drosselt und bei 429/529
+    eine gemeinsame Pause für alle parallelen Aufrufe setzt.
+    
+    Args:
+        use_cache: Antworten aus dem lokalen Antwort-Cache verwenden/speichern
+        stream: SSE-Streaming verwenden; bei Abbruch (Timeout) werden die bereits
+            vollständig empfangenen Tage/Rezepte als Teilergebnis zurückgegeben
+        bei_element: Optional - Callback(schluessel, element), aufgerufen sobald ein
+            Tag ("tage") oder Rezept ("rezepte") im Stream vollständig ist
+        tool: Optional - Tool mit der erwarteten Struktur (schemata.erstelle_tool)
+    
+    Dauer und Wiederholungen werden in der Reparaturstatistik erfasst.
     """
     if not api_key:
         return None, "Kein API-Key vorhanden"
@@ -49,51 +152,53 @@ def rufe_claude_api(prompt, api_key, max_tokens=16000, max_retries=3):
         "anthropic-version": API_VERSION
     }
     
-    # Tool-Definition für JSON-Return
-    tools = [{
-        "name": "return_json",
-        "description": "Gibt ein JSON-Objekt zurück",
-        "input_schema": {
-            "type": "object",
-            "properties": {
-                "input": {
-                    "type": "object",
-                    "description": "Das JSON-Objekt mit den Daten"
-                }
-            },
-            "required": ["input"]
-        }
-    }]
+    payload = erstelle_payload(prompt, max_tokens, tool)
+    tool_name = payload['tool_choice']['name']
+    if stream:
+        payload["stream"] = True
+    
+    # Lokaler Antwort-Cache: identische Anfragen kosten keine Tokens
+    cache = hole_standard_cache() if use_cache else None
+    cache_key = None
+    if cache:
+        cache_key = ResponseCache.erstelle_schluessel(
+            DEFAULT_MODEL, payload['messages'], max_tokens, payload.get('temperature'), payload['tools']
+        )
+        treffer = cache.hole(cache_key)
+        if treffer is not None:
+            return treffer[0], None
     
-    payload = {
-        "model": DEFAULT_MODEL,
-        "max_tokens": max_tokens,
-        "messages": [{"role": "user", "content": prompt}],
-        "tools": tools,
-        "tool_choice": {"type": "tool", "name": "return_json"}
-    }
+    limiter = hole_rate_limiter()
+    statistik = hole_reparatur_statistik()
+    geschaetzte_tokens = schaetze_tokens(prompt)
+    start = time.monotonic()
     
-    # Retry-Schleife mit Exponential Backoff
-    import time
+    # Retry-Schleife; Wartezeiten übernimmt der gemeinsame Rate-Limiter
     for versuch in range(max_retries):
+        reserviert = limiter.erwerbe(geschaetzte_tokens)
         try:
             response = requests.post(
                 API_BASE_URL,
                 headers=headers,
                 json=payload,
+                stream=stream,
                 timeout=API_TIMEOUT
             )
+            wartezeit = limiter.melde_antwort(response.status_code, response.headers)
             
             # Bei Erfolg: Weiter wie bisher
             if response.status_code == 200:
                 break
             
-            # Bei Überlastung (529) oder Rate Limit (429): Retry
-            elif response.status_code in [429, 529]:
-                wartezeit = (2 ** versuch) * 2  # Exponential: 2s, 4s, 8s
+            # Abgelehnter Versuch: Reservierung ohne Verbrauch zurückgeben
+            limiter.verbuche(reserviert, None)
+            reserviert = 0
+            
+            # Bei Überlastung (529) oder Rate Limit (429): Retry nach gemeinsamer Pause
+            if response.status_code in [429, 529]:
                 if versuch < max_retries - 1:  # Nicht beim letzten Versuch
-                    st.warning(f"⏳ API überlastet (Fehler {response.status_code}). Warte {wartezeit}s und versuche es erneut... (Versuch {versuch + 1}/{max_retries})")
-                    time.sleep(wartezeit)
+                    statistik.zaehle(EREIGNIS_WIEDERHOLUNG)
+                    st.warning(f"⏳ API überlastet (Fehler {response.status_code}). Warte {wartezeit:.0f}s und versuche es erneut... (Versuch {versuch + 1}/{max_retries})")
                     continue
                 else:
                     return None, f"API überlastet nach {max_retries} Versuchen. Bitte später erneut versuchen."
@@ -103,68 +208,46 @@ def rufe_claude_api(prompt, api_key, max_tokens=16000, max_retries=3):
                 response.raise_for_status()
         
         except requests.exceptions.Timeout:
+            limiter.verbuche(reserviert, None)
             if versuch < max_retries - 1:
+                statistik.zaehle(EREIGNIS_WIEDERHOLUNG)
                 st.warning(f"⏳ Timeout. Versuche erneut... (Versuch {versuch + 1}/{max_retries})")
                 time.sleep(2)
                 continue
             return None, "API-Timeout - Anfrage dauerte zu lange"
         
         except requests.exceptions.RequestException as e:
+            limiter.verbuche(reserviert, None)
             if versuch < max_retries - 1 and "529" in str(e):
-                wartezeit = (2 ** versuch) * 2
-                st.warning(f"⏳ API überlastet. Warte {wartezeit}s... (Versuch {versuch + 1}/{max_retries})")
-                time.sleep(wartezeit)
+                wartezeit = limiter.melde_antwort(529)
+                statistik.zaehle(EREIGNIS_WIEDERHOLUNG)
+                st.warning(f"⏳ API überlastet. Warte {wartezeit:.0f}s... (Versuch {versuch + 1}/{max_retries})")
                 continue
             return None, f"API-Fehler: {str(e)}"
     
     # Nach erfolgreicher Response oder Fehler
+    usage = None
     try:
-        data = response.json()
-        
-        # Debug: Zeige Antwort-Struktur in Session State
-        if 'debug_responses' not in st.session_state:
-            st.session_state['debug_responses'] = []
-        st.session_state['debug_responses'].append({
-            'timestamp': str(datetime.now()),
-            'has_content': 'content' in data,
-            'content_blocks': len(data.get('content', [])) if 'content' in data else 0
-        })
+        if stream:
+            data, sammler, abbruch = _lies_stream(response, tool_name, bei_element)
+        else:
+            data = response.json()
+        usage = data.get('usage')
+        statistik.erfasse_aufruf(tool_name, time.monotonic() - start)
         
-        # Extrahiere JSON aus Tool-Use Response
-        if 'content' in data:
-            for block in data['content']:
-                if block.get('type') == 'tool_use' and block.get('name') == 'return_json':
-                    # Versuche verschiedene Strukturen
-                    try:
-                        # Variante 1: block['input']['input']
-                        if 'input' in block and isinstance(block['input'], dict) and 'input' in block['input']:
-                            return block['input']['input'], None
-                        # Variante 2: block['input'] ist direkt das Objekt
-                        elif 'input' in block and isinstance(block['input'], dict):
-                            return block['input'], None
-                        else:
-                            st.warning(f"⚠️ Unerwartete Tool-Response-Struktur: {list(block.keys())}")
-                            # Speichere für Debug
-                            st.session_state['last_tool_response'] = block
-                    except KeyError as e:
-                        return None, f"Tool-Response-Struktur-Fehler: {e}. Keys: {list(block.keys())}"
+        if stream and abbruch:
+            teil = sammler.teilergebnis()
+            if not teil:
+                return None, abbruch
+            # Teilergebnis wird nicht gecacht
+            st.warning(f"⚠️ {abbruch} - verwende {len(sammler.scanner.elemente or sammler.text_scanner.elemente)} bereits vollständig empfangene Einträge")
+            return teil.get('input', teil), None
         
-        # Fallback: Versuche Text-Content zu parsen
-        if 'content' in data and len(data['content']) > 0:
-            text_content = data['content'][0].get('text', '')
-            if text_content:
-                # Bereinige und parse JSON
-                cleaned = bereinigeJSON(text_content)
-                try:
-                    return json.loads(cleaned), None
-                except json.JSONDecodeError as e:
-                    st.session_state['last_json_error'] = {
-                        'error': str(e),
-                        'text': text_content[:500]
-                    }
-                    return None, f"JSON-Parsing fehlgeschlagen: {e}"
-        
-        return None, "Keine gültige Antwort von API"
+        daten, error = werte_antwort_aus(data)
+        # Abgeschnittene Antworten (nur vollständige Einträge) nicht cachen
+        if cache and daten and data.get('stop_reason') != 'max_tokens':
+            cache.speichere(cache_key, daten, data.get('usage'))
+        return daten, error
         
     except Exception as e:
         # Bessere Fehlerausgabe
@@ -172,27 +255,49 @@ def rufe_claude_api(prompt, api_key, max_tokens=16000, max_retries=3):
         error_details = traceback.format_exc()
         st.session_state['last_exception'] = error_details
         return None, f"Unerwarteter Fehler: {str(e)}"
+    
+    finally:
+        # Ohne Usage (z.B. Exception beim Lesen) wird die Reservierung zurückgegeben
+        limiter.verbuche(reserviert, usage)
 
 
-def bereinigeJSON(text):
-    """Bereinigt JSON-Text von Markdown und anderen Artefakten"""
-    # Entferne Markdown Code-Blöcke
-    text = re.sub(r"```(?:json)?\s*", "", text, flags=re.IGNORECASE)
-    text = text.replace("```", "").strip()
-    
-    # Ersetze Smart Quotes
-    replacements = {
-        """: '"', """: '"', "„": '"',
-        "'": "'", "‚": "'", "'": "'",
-        "–": "-", "—": "-"
-    }
-    for old, new in replacements.items():
-        text = text.replace(old, new)
+def werte_antwort_aus(data):
+    """
+    Extrahiert das JSON aus einer Messages-Response (Tool-Input oder Text)
     
-    # Entferne trailing commas
-    text = re.sub(r",\s*(?=[}\]])", "", text)
+    Returns:
+        (daten, error)
+    """
+    # Debug: Zeige Antwort-Struktur in Session State
+    if 'debug_responses' not in st.session_state:
+        st.session_state['debug_responses'] = []
+    st.session_state['debug_responses'].append({
+        'timestamp': str(datetime.now()),
+        'has_content': 'content' in data,
+        'content_blocks': len(data.get('content', [])) if 'content' in data else 0
+    })
+    
+    # Tool-Input wird direkt übernommen, Text über den gemeinsamen Dekoder gelesen
+    ergebnis = dekodiere_antwort(data)
+    if ergebnis.daten is not None:
+        if ergebnis.verworfen:
+            st.warning(f"⚠️ Antwort bei max_tokens abgeschnitten - unvollständiger Eintrag {'/'.join(map(str, ergebnis.verworfen))} verworfen")
+        return ergebnis.daten, None
+
+    tool_bloecke = [b for b in data.get('content', []) if isinstance(b, dict) and b.get('type') == 'tool_use']
+    if tool_bloecke:
+        # Speichere für Debug
+        st.session_state['last_tool_response'] = tool_bloecke[0]
+
+    if ergebnis.quelle == QUELLE_TEXT:
+        texte = [b.get('text', '') for b in data.get('content', []) if isinstance(b, dict) and b.get('text')]
+        st.session_state['last_json_error'] = {
+            'error': ergebnis.fehler,
+            'text': (texte[0] if texte else '')[:500]
+        }
+        return None, f"JSON-Parsing fehlgeschlagen: {ergebnis.fehler}"
     
-    return text.strip()
+    return None, ergebnis.fehler
 
 
 # ===================== SPEISEPLAN-GENERIERUNG =====================
@@ -213,8 +318,27 @@ def generiere_speiseplan(wochen, menulinien, menu_namen, api_key, produktliste=N
     with st.expander("🔍 Verwendeter Prompt (erste 1000 Zeichen)"):
         st.code(prompt[:1000] + "...", language="text")
     
-    # API-Aufruf
-    speiseplan, error = rufe_claude_api(prompt, api_key, max_tokens=16000)
+    # Fortschritt: Jeder Tag wird angezeigt, sobald er im Stream vollständig ist
+    fortschritt = st.empty()
+    fertige_tage = []
+    
+    def zeige_tag(schluessel, tag):
+        if schluessel != 'tage' or not isinstance(tag, dict):
+            return
+        gerichte = [
+            m.get('mittagessen', {}).get('hauptgericht', '')
+            for m in tag.get('menues', []) if isinstance(m, dict)
+        ]
+        fertige_tage.append(f"✅ {tag.get('tag', '?')}: {' | '.join(g for g in gerichte if g)}")
+        fortschritt.markdown(
+            f"**{len(fertige_tage)}/{wochen * 7} Tage empfangen**\n\n" + "\n\n".join(fertige_tage[-7:])
+        )
+    
+    # API-Aufruf (gestreamt)
+    speiseplan, error = rufe_claude_api(
+        prompt, api_key, max_tokens=16000, stream=True, bei_element=zeige_tag,
+        tool=erstelle_tool(TOOL_SPEISEPLAN, speiseplan_schema(menulinien, wochen))
+    )
     
     if error:
         return None, error
@@ -222,21 +346,21 @@ def generiere_speiseplan(wochen, menulinien, menu_namen, api_key, produktliste=N
     if not speiseplan or 'speiseplan' not in speiseplan:
         return None, "Ungültige Speiseplan-Struktur"
     
+    # Teilergebnis nach Stream-Abbruch: fehlende Wochennummern ergänzen
+    for i, woche in enumerate(speiseplan['speiseplan'].get('wochen', []), 1):
+        woche.setdefault('woche', i)
+    
     return speiseplan, None
 
 
-def generiere_einzelnes_rezept(gericht_info, produktliste=None, produktlisten_prozent=0, api_key=None):
+def erstelle_rezept_prompt(gericht_info, produktliste=None, produktlisten_prozent=0):
     """
-    Generiert ein einzelnes Rezept
+    Erstellt den Prompt für ein einzelnes Rezept
     
     Args:
         gericht_info: Dict mit 'gericht', 'beilagen', 'woche', 'tag', 'menu'
         produktliste: Optional - Verfügbare Produkte
         produktlisten_prozent: 0-100
-        api_key: API-Key
-    
-    Returns:
-        (rezept_dict, error)
     """
     # Produktlisten-Text für einzelnes Rezept
     produktlisten_text = ""
@@ -270,15 +394,12 @@ Nutze diese Produkte bevorzugt, ergänze nach Bedarf.
     # Kompakter Prompt für einzelnes Rezept
     beilagen_text = ', '.join(gericht_info['beilagen']) if gericht_info['beilagen'] else "ohne Beilagen"
     
+    # Statischer Teil zuerst (für alle Rezepte eines Laufs identisch -> Prompt-Caching),
+    # gerichtspezifische Angaben nach CACHE_TRENNER
     prompt = f"""Du bist ein Küchenmeister für Gemeinschaftsverpflegung. {TOOL_DIRECTIVE}
 
 {produktlisten_text}
 
-AUFGABE: Erstelle EIN detailliertes Rezept für:
-
-**{gericht_info['gericht']} mit {beilagen_text}**
-- Für: {gericht_info['menu']} | {gericht_info['tag']}, Woche {gericht_info['woche']}
-
 ANFORDERUNGEN:
 - Rezept für 10 Personen
 - Mengenangaben in g/ml
@@ -289,10 +410,10 @@ ANFORDERUNGEN:
 
 ANTWORT-SCHEMA (JSON-OBJEKT):
 {{
-  "name": "{gericht_info['gericht']} mit {beilagen_text}",
-  "woche": {gericht_info['woche']},
-  "tag": "{gericht_info['tag']}",
-  "menu": "{gericht_info['menu']}",
+  "name": "Gericht mit Beilagen",
+  "woche": 1,
+  "tag": "Wochentag",
+  "menu": "Menülinie",
   "portionen": 10,
   "zeiten": {{
     "vorbereitung": "X Minuten",
@@ -320,15 +441,26 @@ ANTWORT-SCHEMA (JSON-OBJEKT):
     "leichteKost": "Anpassung für leichte Vollkost"
   }}
 }}
+{CACHE_TRENNER}
+AUFGABE: Erstelle EIN detailliertes Rezept für:
+
+**{gericht_info['gericht']} mit {beilagen_text}**
+- Für: {gericht_info['menu']} | {gericht_info['tag']}, Woche {gericht_info['woche']}
+
+Setze im Schema: "name": "{gericht_info['gericht']} mit {beilagen_text}", "woche": {gericht_info['woche']}, "tag": "{gericht_info['tag']}", "menu": "{gericht_info['menu']}".
 
 Gib das komplette Rezept mit allen Details zurück!"""
     
-    # API-Call
-    rezept_data, error = rufe_claude_api(prompt, api_key, max_tokens=4000)
-    
-    if error:
-        return None, error
+    return prompt
+
+
+def vervollstaendige_rezept(rezept_data, gericht_info):
+    """
+    Prüft eine Rezept-Antwort und ergänzt fehlende Pflichtfelder
     
+    Returns:
+        (rezept_dict, error)
+    """
     if not rezept_data:
         return None, "Keine Daten erhalten"
     
@@ -337,6 +469,7 @@ Gib das komplette Rezept mit allen Details zurück!"""
         return None, f"Ungültige Antwort-Struktur: {type(rezept_data)}"
     
     # Stelle sicher dass wichtige Felder vorhanden sind
+    beilagen_text = ', '.join(gericht_info['beilagen']) if gericht_info['beilagen'] else "ohne Beilagen"
     if 'name' not in rezept_data:
         rezept_data['name'] = f"{gericht_info['gericht']} mit {beilagen_text}"
     if 'woche' not in rezept_data:
@@ -345,13 +478,119 @@ Gib das komplette Rezept mit allen Details zurück!"""
         rezept_data['tag'] = gericht_info['tag']
     if 'menu' not in rezept_data:
         rezept_data['menu'] = gericht_info['menu']
+    rezept_data['gericht_schluessel'] = erstelle_gericht_schluessel(gericht_info['gericht'], gericht_info['beilagen'])
+    
+    fehler = pruefe_rezept(rezept_data)
+    if fehler:
+        return None, "Unvollständiges Rezept: " + "; ".join(str(f) for f in fehler[:5])
     
     return rezept_data, None
 
 
-def generiere_rezepte_einzeln(speiseplan, api_key, produktliste=None, produktlisten_prozent=0):
+def generiere_einzelnes_rezept(gericht_info, produktliste=None, produktlisten_prozent=0, api_key=None):
+    """
+    Generiert ein einzelnes Rezept
+    
+    Args:
+        gericht_info: Dict mit 'gericht', 'beilagen', 'woche', 'tag', 'menu'
+        produktliste: Optional - Verfügbare Produkte
+        produktlisten_prozent: 0-100
+        api_key: API-Key
+    
+    Returns:
+        (rezept_dict, error)
+    """
+    prompt = erstelle_rezept_prompt(gericht_info, produktliste, produktlisten_prozent)
+    
+    # API-Call
+    rezept_data, error = rufe_claude_api(
+        prompt, api_key, max_tokens=4000, tool=erstelle_tool(TOOL_REZEPT, REZEPT_SCHEMA)
+    )
+    
+    if error:
+        return None, error
+    
+    return vervollstaendige_rezept(rezept_data, gericht_info)
+
+
+def generiere_rezepte_batch(alle_gerichte, api_key, produktliste=None, produktlisten_prozent=0,
+                            bei_status=None, batch_url=BATCH_API_URL):
     """
-    Generiert Rezepte einzeln nacheinander (robuster!)
+    Generiert alle Rezepte über die Message Batches API (halber Preis, Ergebnis bis zu 24 h)
+    
+    Jedes Gericht erhält die custom_id "rezept-<index>", über die das Ergebnis
+    wieder zugeordnet wird. Bereits gecachte Rezepte werden nicht erneut angefragt.
+    batch_url ist der Batch-Endpunkt (siehe lese_batch_url).
+    
+    Returns:
+        (liste von (rezept_dict, error) in Reihenfolge von alle_gerichte, error)
+    """
+    cache = hole_standard_cache()
+    ergebnisse = [None] * len(alle_gerichte)
+    anfragen = {}
+    cache_keys = {}
+    rezept_tool = erstelle_tool(TOOL_REZEPT, REZEPT_SCHEMA)
+    
+    for i, gericht in enumerate(alle_gerichte):
+        payload = erstelle_payload(
+            erstelle_rezept_prompt(gericht, produktliste, produktlisten_prozent), 4000, rezept_tool
+        )
+        cache_key = ResponseCache.erstelle_schluessel(
+            DEFAULT_MODEL, payload['messages'], payload['max_tokens'], payload.get('temperature'), payload['tools']
+        )
+        treffer = cache.hole(cache_key)
+        if treffer is not None:
+            ergebnisse[i] = vervollstaendige_rezept(treffer[0], gericht)
+        else:
+            anfragen[f"rezept-{i}"] = payload
+            cache_keys[i] = cache_key
+    
+    antworten, error = MessageBatchClient(api_key, base_url=batch_url).fuehre_aus(anfragen, bei_status)
+    if error:
+        return None, error
+    
+    for i, gericht in enumerate(alle_gerichte):
+        if ergebnisse[i] is not None:
+            continue
+        message, fehler = antworten[f"rezept-{i}"]
+        if fehler:
+            ergebnisse[i] = (None, fehler)
+            continue
+        daten, fehler = werte_antwort_aus(message)
+        if daten and message.get('stop_reason') != 'max_tokens':
+            cache.speichere(cache_keys[i], daten, message.get('usage'))
+        ergebnisse[i] = (None, fehler) if fehler else vervollstaendige_rezept(daten, gericht)
+    
+    return ergebnisse, None
+
+
+@st.cache_resource
+def hole_rezept_bibliothek():
+    """Gemeinsame Rezept-Datenbank aller Sitzungen"""
+    return RezeptDatenbank()
+
+
+def markiere_bibliotheks_rezepte(bibliothek, rezepte):
+    """Markiert aus der Bibliothek übernommene Rezepte als verwendet"""
+    for rezept in rezepte:
+        try:
+            bibliothek.markiere_als_verwendet(
+                rezept['bibliothek_id'], f"Woche {rezept['woche']}, {rezept['tag']}, {rezept['menu']}"
+            )
+        except Exception as e:
+            st.warning(f"⚠️ Verwendung von Rezept {rezept['bibliothek_id']} nicht gespeichert: {e}")
+
+
+def generiere_rezepte_einzeln(speiseplan, api_key, produktliste=None, produktlisten_prozent=0,
+                              max_parallel=MAX_PARALLELE_REZEPTE, batch=False, bibliothek=None,
+                              batch_url=BATCH_API_URL):
+    """
+    Generiert Rezepte einzeln (robuster!) mit bis zu max_parallel gleichzeitigen Anfragen
+    
+    Mit batch=True werden alle Rezept-Prompts stattdessen als ein Message Batch
+    an batch_url gesendet (halber Preis, Ergebnis kann bis zu 24 Stunden dauern). Ist eine
+    Rezept-Bibliothek übergeben, werden Gerichte (Hauptgericht und Beilagen)
+    mit einem gut bewerteten gespeicherten Rezept nicht erneut generiert.
     
     Returns:
         (rezepte_dict, error)
@@ -374,15 +613,39 @@ def generiere_rezepte_einzeln(speiseplan, api_key, produktliste=None, produktlis
     # Dedupliziere
     unique_gerichte = {}
     for g in alle_gerichte:
-        key = (g['gericht'], tuple(sorted(g['beilagen'])))
+        key = erstelle_gericht_schluessel(g['gericht'], g['beilagen'])
         if key not in unique_gerichte:
             unique_gerichte[key] = g
     
-    alle_gerichte = list(unique_gerichte.values())
+    # Zuerst in der Bibliothek nachsehen, nur fehlende Rezepte generieren
+    aus_bibliothek = {}
+    if bibliothek is not None:
+        try:
+            aus_bibliothek = bibliothek.hole_bibliotheks_rezepte(list(unique_gerichte), BIBLIOTHEK_MIN_BEWERTUNG)
+            for key, rezept in aus_bibliothek.items():
+                g = unique_gerichte[key]
+                rezept.update(woche=g['woche'], tag=g['tag'], menu=g['menu'])
+        except Exception as e:
+            st.warning(f"⚠️ Rezept-Bibliothek nicht lesbar, generiere alle Rezepte: {e}")
+            aus_bibliothek = {}
+        st.info(
+            f"📚 {len(aus_bibliothek)} von {len(unique_gerichte)} Rezepten aus der Bibliothek übernommen "
+            f"({len(aus_bibliothek) / max(len(unique_gerichte), 1):.0%})"
+        )
+    
+    reihenfolge = list(unique_gerichte)
+    offen = [key for key in reihenfolge if key not in aus_bibliothek]
+    alle_gerichte = [unique_gerichte[key] for key in offen]
     anzahl = len(alle_gerichte)
+    if not anzahl:
+        markiere_bibliotheks_rezepte(bibliothek, aus_bibliothek.values())
+        return {'rezepte': [aus_bibliothek[key] for key in reihenfolge]}, None
     
     # Info-Anzeige
-    st.info(f"📖 Generiere {anzahl} Rezepte einzeln nacheinander...")
+    if batch:
+        st.info(f"📦 Sende {anzahl} Rezepte als Message Batch (halber Preis, Ergebnis kann bis zu 24 Stunden dauern)...")
+    else:
+        st.info(f"📖 Generiere {anzahl} Rezepte einzeln ({max_parallel} parallel)...")
     if produktliste and produktlisten_prozent > 0:
         st.info(f"📦 Berücksichtige {len(produktliste)} Produkte ({produktlisten_prozent}%)")
     
@@ -390,40 +653,85 @@ def generiere_rezepte_einzeln(speiseplan, api_key, produktliste=None, produktlis
     progress_bar = st.progress(0)
     status_text = st.empty()
     
-    # Sammle generierte Rezepte
-    erfolgreiche_rezepte = []
+    # Ergebnisse in Original-Reihenfolge, auch wenn sie ungeordnet eintreffen
+    ergebnisse = [None] * anzahl
     fehlgeschlagene = []
     
-    # Generiere jedes Rezept einzeln
-    for i, gericht in enumerate(alle_gerichte, 1):
-        # Update Progress
-        progress = i / anzahl
-        progress_bar.progress(progress)
-        beilagen_text = ', '.join(gericht['beilagen']) if gericht['beilagen'] else "ohne Beilagen"
-        status_text.text(f"📖 Rezept {i}/{anzahl}: {gericht['gericht']} mit {beilagen_text}")
+    if batch:
+        def zeige_batch_status(batch_info):
+            zaehler = batch_info.get('request_counts', {})
+            fertig = sum(zaehler.get(k, 0) for k in ('succeeded', 'errored', 'canceled', 'expired'))
+            progress_bar.progress(min(fertig / anzahl, 1.0) if anzahl else 1.0)
+            status_text.text(f"📦 Batch {batch_info.get('id', '')}: {batch_info.get('processing_status', '?')} – {fertig} Anfragen abgeschlossen")
         
-        # Generiere Rezept
-        rezept, error = generiere_einzelnes_rezept(
-            gericht, 
-            produktliste, 
-            produktlisten_prozent,
-            api_key
+        batch_ergebnisse, error = generiere_rezepte_batch(
+            alle_gerichte, api_key, produktliste, produktlisten_prozent, zeige_batch_status, batch_url
         )
-        
         if error:
-            fehlgeschlagene.append({
-                'gericht': gericht['gericht'],
-                'fehler': error
-            })
-            st.warning(f"⚠️ Rezept {i} fehlgeschlagen: {gericht['gericht']} - {error}")
-        else:
-            erfolgreiche_rezepte.append(rezept)
-            st.success(f"✅ Rezept {i}/{anzahl} erfolgreich: {gericht['gericht']}")
+            return None, error
         
-        # Kurze Pause zwischen Anfragen (Rate Limiting vermeiden)
-        if i < anzahl:
-            import time
-            time.sleep(0.5)
+        for i, (rezept, error) in enumerate(batch_ergebnisse):
+            if error:
+                fehlgeschlagene.append({
+                    'index': i,
+                    'gericht': alle_gerichte[i]['gericht'],
+                    'fehler': error
+                })
+            else:
+                ergebnisse[i] = rezept
+    else:
+        # Worker-Threads brauchen den Script-Kontext für st.warning/session_state
+        ctx = get_script_run_ctx()
+    
+        def init_worker():
+            add_script_run_ctx(threading.current_thread(), ctx)
+    
+        with ThreadPoolExecutor(max_workers=max(1, min(max_parallel, anzahl)), initializer=init_worker) as pool:
+            futures = {
+                pool.submit(
+                    generiere_einzelnes_rezept,
+                    gericht,
+                    produktliste,
+                    produktlisten_prozent,
+                    api_key
+                ): i
+                for i, gericht in enumerate(alle_gerichte)
+            }
+        
+            fertig = 0
+            for future in as_completed(futures):
+                i = futures[future]
+                gericht = alle_gerichte[i]
+                fertig += 1
+            
+                try:
+                    rezept, error = future.result()
+                except Exception as e:
+                    rezept, error = None, f"Unerwarteter Fehler: {str(e)}"
+            
+                # Update Progress
+                progress_bar.progress(fertig / anzahl)
+                beilagen_text = ', '.join(gericht['beilagen']) if gericht['beilagen'] else "ohne Beilagen"
+                status_text.text(f"📖 {fertig}/{anzahl} fertig – zuletzt Rezept {i + 1}: {gericht['gericht']} mit {beilagen_text}")
+            
+                if error:
+                    fehlgeschlagene.append({
+                        'index': i,
+                        'gericht': gericht['gericht'],
+                        'fehler': error
+                    })
+                    st.warning(f"⚠️ Rezept {i + 1} fehlgeschlagen: {gericht['gericht']} - {error}")
+                else:
+                    ergebnisse[i] = rezept
+                    st.success(f"✅ Rezept {i + 1}/{anzahl} erfolgreich ({fertig}/{anzahl} fertig): {gericht['gericht']}")
+    
+    generierte = {offen[i]: r for i, r in enumerate(ergebnisse) if r is not None}
+    erfolgreiche_rezepte = [
+        aus_bibliothek.get(key) or generierte[key]
+        for key in reihenfolge
+        if key in aus_bibliothek or key in generierte
+    ]
+    fehlgeschlagene.sort(key=lambda f: f['index'])
     
     # Fertig
     progress_bar.progress(1.0)
@@ -438,6 +746,8 @@ def generiere_rezepte_einzeln(speiseplan, api_key, produktliste=None, produktlis
         for f in fehlgeschlagene:
             st.write(f"- {f['gericht']}: {f['fehler']}")
     
+    # Erst jetzt, da das Ergebnis steht: abgebrochene Läufe zählen nicht als Verwendung
+    markiere_bibliotheks_rezepte(bibliothek, aus_bibliothek.values())
     return {'rezepte': erfolgreiche_rezepte}, None
     """
     Generiert Rezepte in Batches
@@ -488,7 +798,9 @@ def generiere_rezepte_einzeln(speiseplan, api_key, produktliste=None, produktlis
     st.session_state['last_rezept_prompt_length'] = len(prompt)
     
     # Erhöhe max_tokens für Rezepte (sind länger als Speisepläne)
-    rezepte_data, error = rufe_claude_api(prompt, api_key, max_tokens=16000)
+    rezepte_data, error = rufe_claude_api(
+        prompt, api_key, max_tokens=16000, tool=erstelle_tool(TOOL_REZEPTE, REZEPTE_SCHEMA)
+    )
     
     if error:
         st.session_state['last_rezept_error'] = {
@@ -534,7 +846,9 @@ def generiere_pruefung(speiseplan, api_key):
     Generiert Qualitätsprüfung
     """
     prompt = get_pruefung_prompt(speiseplan)
-    pruefung, error = rufe_claude_api(prompt, api_key, max_tokens=4000)
+    pruefung, error = rufe_claude_api(
+        prompt, api_key, max_tokens=4000, tool=erstelle_tool(TOOL_PRUEFUNG, PRUEFUNG_SCHEMA)
+    )
     
     if error:
         return None, error
@@ -786,6 +1100,24 @@ with st.sidebar:
         name = st.text_input(f"Menülinie {i+1}", value=f"Menü {i+1}", key=f"menu_{i}")
         menu_namen.append(name)
     
+    max_parallel_rezepte = st.slider(
+        "Parallele Rezept-Anfragen",
+        min_value=1,
+        max_value=8,
+        value=MAX_PARALLELE_REZEPTE,
+        help="Wie viele Rezepte gleichzeitig bei der API angefragt werden"
+    )
+    rezepte_als_batch = st.checkbox(
+        "Rezepte als Message Batch (halber Preis)",
+        value=False,
+        help="Für Übernacht-Läufe: alle Rezepte in einem Batch, Ergebnis kann bis zu 24 Stunden dauern"
+    )
+    rezepte_aus_bibliothek = st.checkbox(
+        "Rezepte aus der Bibliothek übernehmen",
+        value=True,
+        help=f"Gerichte mit einem gespeicherten Rezept ab {BIBLIOTHEK_MIN_BEWERTUNG} Sternen werden nicht neu generiert"
+    )
+    
     st.divider()
     
     st.header("📦 Produktliste (optional)")
@@ -1258,7 +1590,11 @@ if 'speiseplan' in st.session_state and st.session_state['speiseplan']:
                     st.session_state['speiseplan'],
                     api_key,
                     produktliste,
-                    produktlisten_prozent
+                    produktlisten_prozent,
+                    max_parallel=max_parallel_rezepte,
+                    batch=rezepte_als_batch,
+                    batch_url=lese_batch_url(st.secrets),
+                    bibliothek=hole_rezept_bibliothek() if rezepte_aus_bibliothek else None
                 )
                 
                 if error:
@@ -1332,6 +1668,18 @@ with st.expander("🔧 Debug-Informationen (bei Problemen öffnen)"):
         st.markdown("### 📝 Letzter JSON-Parse-Fehler")
         st.json(st.session_state['last_json_error'])
     
+    st.markdown("### 🗄️ Antwort-Cache")
+    st.json(hole_standard_cache().hole_statistiken())
+    if st.button("Antwort-Cache leeren", key="cache_leeren_btn"):
+        hole_standard_cache().leeren()
+        st.success("Cache geleert")
+    
+    st.markdown("### 🚦 Rate-Limiter")
+    st.json(hole_rate_limiter().hole_statistiken())
+    
+    st.markdown("### 🩹 Reparaturen & Wiederholungen")
+    st.json(hole_reparatur_statistik().hole_statistiken())
+    
     if 'debug_responses' in st.session_state and st.session_state['debug_responses']:
         st.markdown("### 📊 API-Response-Historie")
         for i, resp in enumerate(st.session_state['debug_responses'][-3:], 1):
@@ -0,0 +1,130 @@
+"""
+Lokaler Stub-Server für die Message Batches API (nur für Tests)
+Implementiert POST /v1/messages/batches, GET /v1/messages/batches/{id} und
+GET /v1/messages/batches/{id}/results (JSONL)
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+
+BATCH_PFAD = "/v1/messages/batches"
+
+
+def tool_nachricht(name: str, eingabe: Dict[str, Any], stop_reason: str = "tool_use") -> Dict:
+    """Eine Messages-Antwort mit genau einem tool_use-Block"""
+    return {
+        "type": "message",
+        "role": "assistant",
+        "content": [{"type": "tool_use", "id": "toolu_stub", "name": name, "input": eingabe}],
+        "stop_reason": stop_reason,
+        "usage": {"input_tokens": 100, "output_tokens": 50}
+    }
+
+
+class BatchStubServer:
+    """
+    Message-Batches-Endpunkte auf 127.0.0.1 mit zufälligem Port
+
+    Ein Batch meldet "in_progress", bis sein Status polls_bis_ende-mal
+    abgefragt wurde, danach "ended" samt results_url. Die Ergebnis-Zeilen
+    erzeugt antwort(custom_id, params): eine Message oder None für eine
+    fehlgeschlagene Anfrage.
+
+    Verwendung als Kontextmanager; url ist die base_url für MessageBatchClient.
+    """
+
+    def __init__(self, antwort: Callable[[str, Dict], Optional[Dict]], polls_bis_ende: int = 2):
+        self.antwort = antwort
+        self.polls_bis_ende = polls_bis_ende
+        self.batches: Dict[str, Dict] = {}  # id -> {"requests": [...], "polls": n}
+        self.anfragen: List[Dict[str, Any]] = []  # (methode, pfad, header) je HTTP-Anfrage
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}{BATCH_PFAD}"
+
+    def __enter__(self) -> "BatchStubServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _batch_objekt(self, batch_id: str) -> Dict:
+        batch = self.batches[batch_id]
+        fertig = batch["polls"] >= self.polls_bis_ende
+        anzahl = len(batch["requests"])
+        return {
+            "id": batch_id,
+            "type": "message_batch",
+            "processing_status": "ended" if fertig else "in_progress",
+            "request_counts": {
+                "processing": 0 if fertig else anzahl,
+                "succeeded": anzahl if fertig else 0,
+                "errored": 0, "canceled": 0, "expired": 0
+            },
+            "results_url": f"{self.url}/{batch_id}/results" if fertig else None
+        }
+
+    def _ergebnisse(self, batch_id: str) -> str:
+        zeilen = []
+        for anfrage in self.batches[batch_id]["requests"]:
+            message = self.antwort(anfrage["custom_id"], anfrage["params"])
+            if message is None:
+                ergebnis = {
+                    "type": "errored",
+                    "error": {"type": "error", "error": {"type": "invalid_request_error", "message": "Stub-Fehler"}}
+                }
+            else:
+                ergebnis = {"type": "succeeded", "message": message}
+            zeilen.append(json.dumps({"custom_id": anfrage["custom_id"], "result": ergebnis}, ensure_ascii=False))
+        return "\n".join(zeilen) + "\n"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _sende(self, status: int, text: str, content_type: str = "application/json"):
+                daten = text.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(daten)))
+                self.end_headers()
+                self.wfile.write(daten)
+
+            def _protokolliere(self):
+                with stub._lock:
+                    stub.anfragen.append({"methode": self.command, "pfad": self.path, "header": dict(self.headers)})
+
+            def do_POST(self):
+                self._protokolliere()
+                if self.path != BATCH_PFAD:
+                    return self._sende(404, '{"type": "error"}')
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                with stub._lock:
+                    batch_id = f"msgbatch_stub{len(stub.batches) + 1}"
+                    stub.batches[batch_id] = {"requests": body["requests"], "polls": 0}
+                    self._sende(200, json.dumps(stub._batch_objekt(batch_id)))
+
+            def do_GET(self):
+                self._protokolliere()
+                teile = self.path[len(BATCH_PFAD):].strip("/").split("/")
+                if not self.path.startswith(BATCH_PFAD) or teile[0] not in stub.batches:
+                    return self._sende(404, '{"type": "error"}')
+                with stub._lock:
+                    if teile[1:] == ["results"]:
+                        return self._sende(200, stub._ergebnisse(teile[0]), "application/x-jsonl")
+                    stub.batches[teile[0]]["polls"] += 1
+                    self._sende(200, json.dumps(stub._batch_objekt(teile[0])))
+
+        return Handler
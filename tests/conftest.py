@@ -0,0 +1,8 @@
+"""
+Gemeinsame Test-Einstellungen: Module liegen flach im Projektverzeichnis
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,122 @@
+"""
+Tests für batch_client und den Batch-Modus des Generators gegen den lokalen
+Stub-Server (tests/batch_stub.py)
+"""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import batch_client
+from batch_client import BATCH_API_URL, BATCH_URL_SCHLUESSEL, POLL_FAKTOR, MessageBatchClient, lese_batch_url
+from batch_stub import BatchStubServer, tool_nachricht
+
+
+@pytest.fixture
+def pausen(monkeypatch):
+    """Zeichnet die Polling-Pausen auf, statt zu schlafen"""
+    aufgezeichnet = []
+    monkeypatch.setattr(batch_client, "time", SimpleNamespace(monotonic=time.monotonic, sleep=aufgezeichnet.append))
+    return aufgezeichnet
+
+
+def echo(custom_id, params):
+    if custom_id == "kaputt":
+        return None
+    return tool_nachricht("return_json", {"id": custom_id, "max_tokens": params["max_tokens"]})
+
+
+def test_fuehre_aus_sendet_pollt_und_ordnet_zu(pausen):
+    status = []
+    with BatchStubServer(echo, polls_bis_ende=4) as stub:
+        client = MessageBatchClient("test-key", base_url=stub.url, poll_start=1.0, poll_maximum=2.0)
+        ergebnisse, fehler = client.fuehre_aus(
+            {"w1-Montag": {"max_tokens": 10}, "kaputt": {"max_tokens": 20}, "rezepte-0": {"max_tokens": 30}},
+            lambda batch: status.append(batch["processing_status"])
+        )
+
+    assert fehler is None
+    assert ergebnisse["w1-Montag"][0]["content"][0]["input"] == {"id": "w1-Montag", "max_tokens": 10}
+    assert ergebnisse["rezepte-0"][0]["content"][0]["input"] == {"id": "rezepte-0", "max_tokens": 30}
+    assert ergebnisse["kaputt"] == (None, "Batch-Anfrage errored: Stub-Fehler")
+
+    # Anlegen, vier Statusabfragen, Ergebnisse - dazwischen wachsende Pausen
+    assert [(a["methode"], a["pfad"].rsplit("/", 1)[-1]) for a in stub.anfragen] == (
+        [("POST", "batches")] + [("GET", "msgbatch_stub1")] * 4 + [("GET", "results")]
+    )
+    assert status == ["in_progress"] * 4 + ["ended"]
+    assert pausen == [1.0, 1.0 * POLL_FAKTOR, 2.0]
+    assert all(a["header"]["x-api-key"] == "test-key" for a in stub.anfragen)
+
+
+def test_fuehre_aus_meldet_zeitueberschreitung(pausen):
+    with BatchStubServer(echo, polls_bis_ende=100) as stub:
+        client = MessageBatchClient("test-key", base_url=stub.url, poll_start=1.0, max_wartezeit=0)
+        ergebnisse, fehler = client.fuehre_aus({"w1-Montag": {"max_tokens": 10}})
+
+    assert ergebnisse == {}
+    assert "nicht beendet" in fehler
+    assert pausen == []
+
+
+class FehlendeSecrets(dict):
+    """Verhält sich wie st.secrets ohne secrets.toml"""
+
+    def __contains__(self, schluessel):
+        raise FileNotFoundError("secrets.toml")
+
+
+def test_lese_batch_url_aus_einstellungen_sonst_standard():
+    assert lese_batch_url({BATCH_URL_SCHLUESSEL: "http://127.0.0.1:1/v1/messages/batches"}) == (
+        "http://127.0.0.1:1/v1/messages/batches"
+    )
+    assert lese_batch_url({}) == BATCH_API_URL
+    assert lese_batch_url(None) == BATCH_API_URL
+    assert lese_batch_url(FehlendeSecrets()) == BATCH_API_URL
+
+
+def test_generator_ordnet_batch_ergebnisse_woche_und_tag_zu(pausen):
+    main_app = pytest.importorskip("main_app")
+    from schemata import TOOL_TAG
+
+    config = main_app.PlanConfig(
+        wochen=2, menulinien=2, menu_namen=["Vollkost", "Vegetarisch"],
+        execution_mode=main_app.ExecutionMode.BATCH, checkpoint=False
+    )
+
+    def tagesplan(custom_id, params):
+        assert params["tool_choice"]["name"] == TOOL_TAG
+        if custom_id == "w2-Dienstag":
+            return None
+        _, tag = custom_id.split("-")
+        return tool_nachricht(TOOL_TAG, {
+            "tag": tag,
+            "menues": [
+                {
+                    "menuName": linie,
+                    "fruehstueck": {"hauptgericht": "Müsli"},
+                    "mittagessen": {"hauptgericht": f"{linie} {custom_id}", "beilagen": ["Reis", "Salat"]},
+                    "abendessen": {"hauptgericht": "Brotzeit"}
+                }
+                for linie in config.menu_namen
+            ]
+        })
+
+    with BatchStubServer(tagesplan) as stub:
+        api_client = main_app.AnthropicClient(main_app.APIConfig(api_key="test-key", use_cache=False, batch_url=stub.url))
+        generator = main_app.SpeiseplanGenerator(
+            api_client, batch_client=MessageBatchClient("test-key", base_url=stub.url, poll_start=0.5)
+        )
+        ergebnisse = generator._generate_days_batch(config, [(1, "Montag"), (2, "Montag"), (2, "Dienstag")])
+
+    assert len(stub.batches) == 1
+    assert pausen == [0.5]
+    for woche, tag in ((1, "Montag"), (2, "Montag")):
+        tagesplan_ergebnis, fehler = ergebnisse[(woche, tag)]
+        assert fehler is None
+        assert tagesplan_ergebnis["tag"] == tag
+        assert [m["mittagessen"]["hauptgericht"] for m in tagesplan_ergebnis["menues"]] == [
+            f"{linie} w{woche}-{tag}" for linie in config.menu_namen
+        ]
+    assert ergebnisse[(2, "Dienstag")] == (None, "Fehler bei Dienstag: Batch-Anfrage errored: Stub-Fehler")
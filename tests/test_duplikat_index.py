@@ -0,0 +1,68 @@
+"""
+Tests für duplikat_index
+"""
+
+import pytest
+
+from duplikat_index import (
+    AEHNLICHKEIT_SCHWELLE,
+    ZUSAMMENFUEHREN_SCHWELLE,
+    bewerte_kandidaten,
+    jaccard,
+    merkmale,
+    normalisiere_name,
+    zerlege_wort,
+)
+
+
+def zutaten(*namen):
+    return [{'name': name} for name in namen]
+
+
+GULASCH = zutaten("Rindfleisch", "Zwiebeln", "Paprikapulver", "Tomatenmark", "Spätzle", "Salz")
+SCHWEINEBRATEN = zutaten("Schweinenacken", "Zwiebeln", "Karotten", "Semmelknödel", "Senf", "Salz")
+RINDERBRATEN = zutaten("Rinderbraten", "Zwiebeln", "Karotten", "Semmelknödel", "Senf", "Salz")
+
+
+def aehnlichkeit(name_a, zutaten_a, name_b, zutaten_b):
+    return jaccard(merkmale(name_a, zutaten_a), merkmale(name_b, zutaten_b))
+
+
+def test_normalisiere_name():
+    assert normalisiere_name("Rindergulasch mit Spätzle ") == "rindergulasch spaetzle"
+
+
+def test_zerlege_wort():
+    assert zerlege_wort("rindergulasch") == ["rind", "gulasch"]
+    assert zerlege_wort("schweinebraten") == ["schwein", "braten"]
+    assert zerlege_wort("gulasch") == ["gulasch"]
+    assert zerlege_wort("rinder") == ["rinder"]
+
+
+def test_gleicher_normalisierter_name_wird_zusammengefuehrt():
+    treffer = bewerte_kandidaten(
+        "Rindergulasch mit Spätzle ", [], {1: ("Rindergulasch mit Spätzle", GULASCH)}
+    )
+    assert treffer == [(1, "Rindergulasch mit Spätzle", 1.0)]
+    assert treffer[0][2] >= ZUSAMMENFUEHREN_SCHWELLE
+
+
+@pytest.mark.parametrize("name_a, zutaten_a, name_b, zutaten_b", [
+    ("Gulasch vom Rind", GULASCH, "Rindergulasch mit Spätzle", GULASCH),
+    ("Schweinebraten mit Knödeln", SCHWEINEBRATEN, "Rinderbraten mit Knödeln", RINDERBRATEN),
+])
+def test_beinahe_duplikate_werden_markiert(name_a, zutaten_a, name_b, zutaten_b):
+    wert = aehnlichkeit(name_a, zutaten_a, name_b, zutaten_b)
+    assert AEHNLICHKEIT_SCHWELLE <= wert < ZUSAMMENFUEHREN_SCHWELLE
+
+
+@pytest.mark.parametrize("name_a, zutaten_a, name_b, zutaten_b", [
+    ("Rindergulasch mit Spätzle", GULASCH, "Kartoffelsuppe", zutaten("Kartoffeln", "Lauch", "Sahne")),
+    ("Rindergulasch mit Spätzle", GULASCH, "Rinderbraten mit Knödeln", RINDERBRATEN),
+    ("Spaghetti Bolognese", zutaten("Spaghetti", "Hackfleisch", "Tomaten"),
+     "Spaghetti Carbonara", zutaten("Spaghetti", "Speck", "Eier", "Parmesan")),
+    ("Gemüselasagne", zutaten("Lasagneplatten", "Zucchini", "Tomaten", "Käse"),
+     "Gemüsecurry mit Reis", zutaten("Zucchini", "Kokosmilch", "Currypaste", "Reis")),
+])
+def test_verschiedene_gerichte_bleiben_getrennt(name_a, zutaten_a, name_b, zutaten_b):
+    assert aehnlichkeit(name_a, zutaten_a, name_b, zutaten_b) < AEHNLICHKEIT_SCHWELLE
@@ -0,0 +1,21 @@
+"""
+Tests für json_reparatur
+"""
+
+from json_reparatur import REPARATUR_KOMMA_ZUVIEL, REPARATUR_WERT, lade_tolerant
+
+
+def test_gueltiges_json_ohne_reparatur():
+    assert lade_tolerant('{"t": true, "n": null}') == ({"t": True, "n": None}, [])
+
+
+def test_python_literale_werden_gemeldet():
+    daten, reparaturen = lade_tolerant('{"t": True, "f": False, "n": None}')
+    assert daten == {"t": True, "f": False, "n": None}
+    assert REPARATUR_WERT in reparaturen
+
+
+def test_json_literale_neben_reparatur_werden_nicht_gemeldet():
+    daten, reparaturen = lade_tolerant('{"t": true, "n": null,}')
+    assert daten == {"t": True, "n": None}
+    assert reparaturen == [REPARATUR_KOMMA_ZUVIEL]
@@ -0,0 +1,100 @@
+"""
+Tests für main_app (API-Clients mit Attrappen statt HTTP, Generator)
+"""
+
+import os
+
+import pytest
+
+from rate_limiter import RateLimiter
+
+main_app = pytest.importorskip("main_app")
+
+
+class AttrappenResponse:
+    """Minimale requests.Response für stream=True"""
+
+    def __init__(self, status_code, zeilen=(), daten=None):
+        self.status_code = status_code
+        self.headers = {}
+        self.zeilen = list(zeilen)
+        self.daten = daten or {}
+        self.text = ""
+        self.encoding = None
+        self.geschlossen = False
+
+    def json(self):
+        return self.daten
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self.zeilen)
+
+    def close(self):
+        self.geschlossen = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class AttrappenSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+
+    def post(self, *args, **kwargs):
+        return self.responses.pop(0)
+
+
+def client(*responses, rate_limiter=None, max_retries=1):
+    api = main_app.AnthropicClient(
+        main_app.APIConfig(api_key="test-key", use_cache=False, max_retries=max_retries),
+        rate_limiter=rate_limiter or RateLimiter()
+    )
+    api.session = AttrappenSession(*responses)
+    return api
+
+
+def test_stream_fehlerstatus_schliesst_response():
+    response = AttrappenResponse(400, daten={"error": {"message": "kaputt"}})
+    assert client(response).call_api_stream("Prompt") == (None, "kaputt", None)
+    assert response.geschlossen
+
+
+def test_stream_unerwarteter_fehler_wird_gemeldet(monkeypatch):
+    def fehler(self, zeilen):
+        raise ValueError("Sammler defekt")
+
+    monkeypatch.setattr(main_app.StreamSammler, "verarbeite_zeilen", fehler)
+    response = AttrappenResponse(200, zeilen=["data: {}"])
+    assert client(response).call_api_stream("Prompt") == (None, "Unerwarteter Fehler: Sammler defekt", None)
+    assert response.geschlossen
+
+
+def test_checkpoints_sind_je_sitzung_getrennt():
+    import checkpoint
+
+    config = main_app.PlanConfig(wochen=1, menulinien=1, menu_namen=["Vollkost"])
+    pfade = {
+        main_app.SpeiseplanGenerator(client(), checkpoint_scope=sitzung)._open_checkpoints(config).pfad
+        for sitzung in ("sitzung-a", "sitzung-b", "sitzung-a")
+    }
+    assert len(pfade) == 2
+    assert all(pfad.startswith(checkpoint.CHECKPOINT_VERZEICHNIS) for pfad in pfade)
+    assert os.path.isabs(checkpoint.CHECKPOINT_VERZEICHNIS)
+
+
+@pytest.mark.parametrize("aufruf", ["call_api", "call_api_stream"])
+def test_abgelehnte_versuche_geben_reservierung_zurueck(aufruf):
+    limiter = RateLimiter(input_tokens_pro_minute=1000)
+    # Keine gemeinsame Pause nach 429, damit der Test nicht wartet
+    limiter.melde_antwort = lambda status_code, headers=None: 0.0
+    responses = [AttrappenResponse(429), AttrappenResponse(529),
+                 AttrappenResponse(500, daten={"error": {"message": "Serverfehler"}})]
+    api = client(*responses, rate_limiter=limiter, max_retries=3)
+
+    ergebnis, fehler, usage = getattr(api, aufruf)("x" * 2000)
+
+    assert (ergebnis, fehler) == (None, "Serverfehler")
+    assert limiter.input_tokens.stand == pytest.approx(1000, abs=5)
@@ -0,0 +1,21 @@
+"""
+Tests für rate_limiter
+"""
+
+from rate_limiter import RateLimiter
+
+
+def test_verbuche_ohne_usage_gibt_reservierung_zurueck():
+    limiter = RateLimiter(input_tokens_pro_minute=1000)
+    reserviert = limiter.erwerbe(300)
+    assert limiter.input_tokens.stand <= 700
+    limiter.verbuche(reserviert, None)
+    assert 999 < limiter.input_tokens.stand <= 1000
+
+
+def test_verbuche_mit_usage_rechnet_tatsaechlichen_verbrauch_ab():
+    limiter = RateLimiter(input_tokens_pro_minute=1000, output_tokens_pro_minute=1000)
+    reserviert = limiter.erwerbe(300)
+    limiter.verbuche(reserviert, {"input_tokens": 100, "cache_read_input_tokens": 500, "output_tokens": 50})
+    assert 899 < limiter.input_tokens.stand <= 901
+    assert 949 < limiter.output_tokens.stand <= 951
@@ -0,0 +1,152 @@
+"""
+Tests für rezept_datenbank
+"""
+
+import sqlite3
+
+import pytest
+
+from rezept_datenbank import RezeptDatenbank
+
+
+def rezept(name, allergene=None, zutaten=None, zubereitung=None):
+    return {
+        'name': name,
+        'menu': 'Hauptgericht',
+        'zutaten': zutaten if zutaten is not None else [
+            {'name': 'Rindfleisch', 'menge': '2 kg'},
+            {'name': 'Zwiebeln', 'menge': '1 kg'},
+            {'name': 'Spätzle', 'menge': '1,5 kg'},
+        ],
+        'zubereitung': zubereitung if zubereitung is not None else ['Anbraten', 'Schmoren'],
+        'allergene': allergene if allergene is not None else [],
+    }
+
+
+@pytest.fixture
+def db(tmp_path):
+    datenbank = RezeptDatenbank(str(tmp_path / "rezepte.db"))
+    yield datenbank
+    datenbank.schliesse()
+
+
+def test_zusammenfuehren_behaelt_allergene(db):
+    original_id = db.speichere_rezept(rezept("Rindergulasch mit Spätzle", allergene=["Gluten", "Ei"]))
+    neue_id = db.speichere_rezept(rezept("rindergulasch mit spätzle", zutaten=[], zubereitung=[]))
+
+    assert neue_id == original_id
+    gespeichert = db.hole_rezept(original_id)
+    assert gespeichert['name'] == "Rindergulasch mit Spätzle"
+    assert gespeichert['allergene'] == ["Gluten", "Ei"]
+    assert len(gespeichert['zutaten']) == 3
+    assert gespeichert['zubereitung'] == ['Anbraten', 'Schmoren']
+    assert db.suche_rezepte(ohne_allergene=["Gluten"]) == []
+
+
+def test_zusammenfuehren_im_bulk_behaelt_allergene(db):
+    db.speichere_rezept(rezept("Rindergulasch mit Spätzle", allergene=["Gluten", "Ei"]))
+
+    eingefuegt, zusammengefuehrt = db.speichere_rezepte_bulk([
+        rezept("rindergulasch mit spätzle"),
+        rezept("Kartoffelsuppe", zutaten=[{'name': 'Kartoffeln', 'menge': '3 kg'}]),
+        rezept("kartoffelsuppe", allergene=["Sellerie"]),
+    ])
+
+    assert (eingefuegt, zusammengefuehrt) == (1, 2)
+    namen = {r['name']: r for r in db.suche_rezepte()}
+    assert set(namen) == {"Rindergulasch mit Spätzle", "Kartoffelsuppe"}
+    assert namen["Rindergulasch mit Spätzle"]['allergene'] == ["Gluten", "Ei"]
+    assert namen["Kartoffelsuppe"]['allergene'] == []
+    assert [r['name'] for r in db.suche_rezepte(ohne_allergene=["Gluten"])] == ["Kartoffelsuppe"]
+
+
+def test_gleicher_name_aktualisiert(db):
+    rezept_id = db.speichere_rezept(rezept("Rindergulasch mit Spätzle", allergene=["Gluten"]))
+    assert db.speichere_rezept(rezept("Rindergulasch mit Spätzle", allergene=["Gluten", "Ei"])) == rezept_id
+    assert db.hole_rezept(rezept_id)['allergene'] == ["Gluten", "Ei"]
+
+
+def test_beinahe_duplikate_werden_markiert(db):
+    db.speichere_rezept(rezept("Rindergulasch mit Spätzle"))
+    db.speichere_rezept(rezept("Gulasch vom Rind"))
+    db.speichere_rezept(rezept("Kartoffelsuppe", zutaten=[{'name': 'Kartoffeln', 'menge': '3 kg'}]))
+
+    seite, _ = db.hole_rezept_seite(sortierung="name")
+    aehnlich_zu = {r['name']: r['aehnlich_zu'] for r in seite}
+    assert aehnlich_zu == {
+        "Gulasch vom Rind": "Rindergulasch mit Spätzle",
+        "Kartoffelsuppe": None,
+        "Rindergulasch mit Spätzle": None,
+    }
+
+
+def test_suche_findet_wortteile_neben_volltext_treffern(db):
+    db.speichere_rezepte_bulk([
+        rezept("Gulasch vom Rind"),
+        rezept("Rindergulasch mit Spätzle", zutaten=[{'name': 'Rinderschulter', 'menge': '2 kg'}]),
+        rezept("Püree aus Sellerie", zutaten=[{'name': 'Knollensellerie', 'menge': '2 kg'}]),
+        rezept("Kartoffelpüree", zutaten=[{'name': 'Kartoffeln', 'menge': '3 kg'}]),
+    ])
+
+    gulasch = [r['name'] for r in db.suche_rezepte("gulasch")]
+    assert sorted(gulasch) == ["Gulasch vom Rind", "Rindergulasch mit Spätzle"]
+    pueree = [r['name'] for r in db.suche_rezepte("püree")]
+    assert pueree[0] == "Püree aus Sellerie"
+    assert "Kartoffelpüree" in pueree
+    assert len(db.suche_rezepte("püree", limit=1)) == 1
+
+    for suchbegriff, erwartet in (("gulasch", 2), ("püree", 2)):
+        seite, _ = db.hole_rezept_seite(suchbegriff=suchbegriff)
+        assert len(seite) == erwartet
+        assert db.zaehle_rezepte(suchbegriff=suchbegriff) == erwartet
+
+
+def test_migration_fuehrt_doppelte_namen_zusammen(tmp_path):
+    pfad = str(tmp_path / "alt.db")
+    verbindung = sqlite3.connect(pfad)
+    # Schema älterer Versionen: kein eindeutiger Index auf name
+    verbindung.executescript("""
+        CREATE TABLE rezepte (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, menu_linie TEXT,
+            portionen INTEGER DEFAULT 10, vorbereitung TEXT, garzeit TEXT, gesamtzeit TEXT,
+            zutaten TEXT NOT NULL, zubereitung TEXT NOT NULL, naehrwerte TEXT, allergene TEXT,
+            tipps TEXT, variationen TEXT, tags TEXT, erstellt_am TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            verwendet_count INTEGER DEFAULT 0, zuletzt_verwendet TIMESTAMP,
+            bewertung INTEGER DEFAULT 0, notizen TEXT
+        );
+        CREATE TABLE verwendungen (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, rezept_id INTEGER,
+            datum TIMESTAMP DEFAULT CURRENT_TIMESTAMP, speiseplan_info TEXT
+        );
+    """)
+    verbindung.executemany(
+        "INSERT INTO rezepte (name, zutaten, zubereitung, naehrwerte, allergene, verwendet_count, "
+        "zuletzt_verwendet, bewertung, notizen) VALUES (?, '[]', '[]', '{}', ?, ?, ?, ?, ?)",
+        [
+            ("Kartoffelsuppe", '["Sellerie"]', 2, "2025-01-10T12:00:00", 3, "Mit Majoran"),
+            ("Linseneintopf", '[]', 1, None, 0, None),
+            ("Kartoffelsuppe", '[]', 5, "2025-03-01T12:00:00", 5, ""),
+            ("Kartoffelsuppe", '[]', 0, None, 0, "Weniger Salz"),
+        ]
+    )
+    verbindung.executemany(
+        "INSERT INTO verwendungen (rezept_id, speiseplan_info) VALUES (?, ?)", [(1, "KW 2"), (3, "KW 9")]
+    )
+    verbindung.commit()
+    verbindung.close()
+
+    db = RezeptDatenbank(pfad)
+    try:
+        suppen = [r for r in db.suche_rezepte() if r['name'] == "Kartoffelsuppe"]
+        assert len(suppen) == 1
+        suppe = suppen[0]
+        assert suppe['id'] == 1
+        assert suppe['allergene'] == ["Sellerie"]
+        assert suppe['bewertung'] == 5
+        assert suppe['verwendet_count'] == 7
+        assert suppe['zuletzt_verwendet'] == "2025-03-01T12:00:00"
+        assert suppe['notizen'] == "Mit Majoran\nWeniger Salz"
+        cursor = db._verbindung().execute("SELECT rezept_id FROM verwendungen ORDER BY id")
+        assert [zeile[0] for zeile in cursor.fetchall()] == [1, 1]
+    finally:
+        db.schliesse()